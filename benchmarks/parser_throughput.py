@@ -0,0 +1,56 @@
+import argparse
+import time
+
+from truffle_logs_analyzer.ParseTruffleEngineOptLogEntry import ParseTruffleEngineOptLogEntry
+from truffle_logs_analyzer.TruffleEngineOptLogTokenizer import TruffleEngineOptLogTokenizer
+
+SAMPLE_LINES = [
+    "[engine] opt queued   engine=1 id=278    fn278                         |Tier 2|Count/Thres      109/     1000|Queue: Size    6 Change +1 Load  0.97 Time    237us|UTC 2024-05-01T10:00:02.141|Src file5.js:278",
+    "[engine] opt start    engine=1 id=278    fn278                         |Tier 2|Priority     4213|Rate 0.412300|Queue: Size    5 Change -1 Load  0.91 Time   1210us|UTC 2024-05-01T10:00:02.388|Src file5.js:278",
+    "[engine] opt done     engine=1 id=278    fn278                         |Tier 2|Time   121( 10+20 )ms|AST   254|Inlined   3Y   0N|IR    457/   920|CodeSize    99840|Addr 0x7f3988ec5|CompId    101|UTC 2024-05-01T10:00:02.509|Src file5.js:278",
+    "[engine] opt deopt    engine=1 id=278    fn278                         |Addr 0x7f3988ec5|UTC 2024-05-01T10:00:03.514|Src file5.js:278",
+    "[engine] opt inval.   engine=1 id=278    fn278                         |UTC 2024-05-01T10:00:03.515|Src file5.js:278|Reason assumption invalidated",
+    "[engine] opt unque.   engine=1 id=91     fn91                          |Tier 1|Count/Thres      100/     1000|Queue: Size    4 Change -1 Load  0.33 Time   2210us|UTC 2024-05-01T10:00:04.001|Src file0.js:91|Reason dequeued",
+    "[engine] opt failed   engine=1 id=98     fn98                          |Tier 2|Time   291( 10+20 )ms|Reason: Maximum compilation count reached|UTC 2024-05-01T10:00:04.081|Src file7.js:98",
+    "[engine] opt flushed  engine=1 id=17     fn17                          |UTC 2024-05-01T10:00:05.001|Src file4.js:17",
+]
+
+
+def load_lines(path: str) -> list[str]:
+    with open(path, 'r') as file:
+        return [line.rstrip() for line in file if line.startswith("[engine] opt")]
+
+
+def run(name: str, parse, lines: list[str], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            parse(line)
+        best = min(best, time.perf_counter() - start)
+
+    lines_per_sec = len(lines) / best
+    print(f"{name:>10} | {len(lines):>10} lines | {best:>8.3f} s | {lines_per_sec:>12,.0f} lines/s")
+    return lines_per_sec
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the throughput of the "[engine] opt" line parsers.')
+    parser.add_argument('logfile', nargs='?', help='Log file to take the "[engine] opt" lines from. Uses built-in samples if omitted.')
+    parser.add_argument('--lines', type=int, default=200_000, help='Number of sample lines when no log file is given.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs; the best one is reported.')
+    args = parser.parse_args()
+
+    if args.logfile is not None:
+        lines = load_lines(args.logfile)
+    else:
+        lines = (SAMPLE_LINES * (args.lines // len(SAMPLE_LINES) + 1))[:args.lines]
+
+    tokenizer = TruffleEngineOptLogTokenizer()
+    legacy = run("legacy", lambda line: ParseTruffleEngineOptLogEntry(line).entry(), lines, args.repeat)
+    fast = run("fast", tokenizer.parse, lines, args.repeat)
+    print(f"Speedup: {fast / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic_log import generate
+from truffle_logs_analyzer.truffle_logs import (argument_parser, code_cache, collect_call_targets, comp_pareto,
+                                                comp_rate, deopts, expand_log_paths, group_log_files, histogram,
+                                                hotspots, load_log_files, populate_events_to_call_targets, query, queue,
+                                                stats, thrash)
+
+# Times every stage of the analysis of a log (parsing, loading from the parsed log cache, collecting and populating
+# the call targets, and each report) and writes the results as JSON, so that runs before and after a change can be
+# compared with --compare. The log is either given or generated with a fixed seed.
+
+# Reports run after parsing, with the arguments they get from the command line
+REPORTS = {
+    'stats': lambda args, call_targets, hotspot_events, truffle_events:
+        stats(args, call_targets, hotspot_events, truffle_events),
+    'histogram': lambda args, call_targets, hotspot_events, truffle_events: histogram(20, call_targets),
+    'hotspots': lambda args, call_targets, hotspot_events, truffle_events: hotspots(20, call_targets),
+    'comp_rate': lambda args, call_targets, hotspot_events, truffle_events: comp_rate('minute', call_targets),
+    'comp_pareto': lambda args, call_targets, hotspot_events, truffle_events: comp_pareto(call_targets),
+    'code_cache': lambda args, call_targets, hotspot_events, truffle_events:
+        code_cache(args, 'minute', call_targets, hotspot_events, truffle_events),
+    'queue': lambda args, call_targets, hotspot_events, truffle_events: queue(args, 'minute', truffle_events),
+    'thrash': lambda args, call_targets, hotspot_events, truffle_events:
+        thrash(args, call_targets, hotspot_events, truffle_events),
+    'deopts': lambda args, call_targets, hotspot_events, truffle_events: deopts(args, call_targets, truffle_events),
+    'query': lambda args, call_targets, hotspot_events, truffle_events:
+        query("select tier, count(), p99(comp_time) from done group by tier", hotspot_events, truffle_events),
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, workers) / scale
+
+
+def timed(stage: str, timings: dict[str, float], function, *arguments):
+    # Keeps the best time of every stage over the repetitions; report output is discarded
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = function(*arguments)
+        elapsed = time.perf_counter() - start
+    timings[stage] = min(timings.get(stage, float('inf')), elapsed)
+    return result
+
+
+def run(path: str, jobs: int, repeat: int, cache_dir: str) -> dict:
+    args = argument_parser().parse_args([path])
+    args.jobs = jobs
+    args.cache_dir = cache_dir
+    args.log_groups = group_log_files(expand_log_paths(args.logfiles))
+    uncached = argparse.Namespace(**{**vars(args), 'no_cache': True})
+
+    timings: dict[str, float] = {}
+    # Fills the cache, so that the cached loads below only read the snapshot
+    load_log_files(args)
+    for _ in range(repeat):
+        hotspot_events, truffle_events = timed('parse', timings, load_log_files, uncached)
+        timed('load_cached', timings, load_log_files, args)
+        call_targets = timed('collect', timings, collect_call_targets, truffle_events)
+        timed('populate', timings, populate_events_to_call_targets, call_targets, hotspot_events, truffle_events)
+        for report, function in REPORTS.items():
+            timed(f'report.{report}', timings, function, args, call_targets, hotspot_events, truffle_events)
+
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        lines = sum(block.count(b'\n') for block in iter(lambda: file.read(1 << 20), b''))
+    return {
+        'input': {'path': path, 'bytes': size, 'lines': lines, 'truffle_events': len(truffle_events),
+                  'hotspot_events': len(hotspot_events), 'call_targets': len(call_targets)},
+        'config': {'jobs': jobs, 'repeat': repeat, 'python': platform.python_version(), 'numpy': np.__version__,
+                   'machine': platform.machine(), 'cpus': os.cpu_count()},
+        'parse': {'lines_per_sec': lines / timings['parse'], 'mb_per_sec': size / (1024 * 1024) / timings['parse']},
+        'stages': timings,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(base: dict, result: dict) -> None:
+    print(f"{'Stage':<24} | {'Base (s)':>10} | {'Now (s)':>10} | {'Change':>8}")
+    for stage, seconds in result['stages'].items():
+        before = base['stages'].get(stage)
+        change = f"{(seconds - before) / before:>+8.1%}" if before else f"{'new':>8}"
+        before = f"{before:>10.4f}" if before is not None else f"{'':>10}"
+        print(f"{stage:<24} | {before} | {seconds:>10.4f} | {change}")
+    print(f"{'parse lines/s':<24} | {base['parse']['lines_per_sec']:>10,.0f} | {result['parse']['lines_per_sec']:>10,.0f} |")
+    print(f"{'peak RSS (MB)':<24} | {base['peak_rss_mb']:>10.1f} | {result['peak_rss_mb']:>10.1f} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time parsing and analysis of a Truffle engine log and report JSON.')
+    parser.add_argument('logfile', nargs='?', help='Log file to analyze. A synthetic log is generated if omitted.')
+    parser.add_argument('--lines', type=int, default=1_000_000, help='Lines of the synthetic log.')
+    parser.add_argument('--targets', type=int, default=1000, help='Call targets of the synthetic log.')
+    parser.add_argument('--engines', type=int, default=1, help='Engines of the synthetic log.')
+    parser.add_argument('--noise', type=float, default=0.5, help='Fraction of non-Truffle lines in the synthetic log.')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the synthetic log.')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of worker processes used to parse the log.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs; the best time of each stage is reported.')
+    parser.add_argument('--output', type=str, help='File to write the JSON results to. Printed if omitted.')
+    parser.add_argument('--compare', type=str, help='JSON results of an earlier run to compare with.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.logfile
+        if path is None:
+            path = os.path.join(directory, 'synthetic.log')
+            with open(path, 'w') as out:
+                generate(out, args.lines, args.targets, args.engines, args.noise, args.seed)
+        result = run(path, args.jobs, args.repeat, os.path.join(directory, 'cache'))
+
+    if args.logfile is None:
+        result['input'].update(path=None, generator={'lines': args.lines, 'targets': args.targets,
+                                                     'engines': args.engines, 'noise': args.noise, 'seed': args.seed})
+
+    if args.output is not None:
+        with open(args.output, 'w') as out:
+            json.dump(result, out, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            compare(json.load(file), result)
+    elif args.output is None:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
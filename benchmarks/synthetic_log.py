@@ -0,0 +1,152 @@
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import TextIO
+
+# Seeded generator of Truffle engine logs. Call targets go through the life of a compilation (queued, then start or
+# unque., then done or failed), compiled code gets deoptimized, invalidated and flushed from the code cache, and
+# HotSpot '*flushing nmethod' lines and unrelated noise lines are interleaved, so the same seed always gives the same
+# log for comparing runs.
+
+START = datetime(2024, 5, 1, 10, 0, 0, tzinfo=timezone.utc)
+
+NOISE_LINES = [
+    "[{hotspot}] [info][gc] GC({n}) Pause Young (Normal) (G1 Evacuation Pause) 2048M->1024M(4096M) 12.345ms",
+    "{date} INFO  [worker-{worker}] c.e.app.RequestHandler - handled request {n} in {ms} ms",
+    "{date} DEBUG [worker-{worker}] c.e.app.Cache - miss for key user:{n}",
+    "[{hotspot}] [info][safepoint] Safepoint \"Cleanup\", Time since last: {n} ns, Reaching safepoint: 2112 ns",
+    "[engine] Truffle runtime initialized with {worker} compiler threads",
+]
+
+REASONS = ["assumption invalidated", "profile changed", "call target replaced", "context disposed"]
+FAILURES = ["Reason: Maximum compilation count reached", "Reason: bailout", "Reason: Compilation cancelled"]
+
+
+class SyntheticLog:
+    def __init__(self, seed: int, targets: int, engines: int, noise: float):
+        self.random = random.Random(seed)
+        self.targets = targets
+        self.engines = engines
+        self.noise = noise
+        self.time = START
+        self.comp_id = 100
+        self.exec_counts = [0] * (targets + 1)
+        self.tiers = [0] * (targets + 1)
+        self.queued: dict[int, int] = {}
+        self.running: dict[int, int] = {}
+        self.live: list[int] = []
+        self.compiled: list[int] = []
+        self.lines = 0
+
+    def utc(self) -> str:
+        return "UTC " + self.time.strftime("%Y-%m-%dT%H:%M:%S.") + f"{self.time.microsecond // 1000:03d}"
+
+    def hotspot_time(self) -> str:
+        return self.time.strftime("%Y-%m-%dT%H:%M:%S.") + f"{self.time.microsecond // 1000:03d}+0000"
+
+    def head(self, kind: str, target: int) -> str:
+        return f"[engine] opt {kind:<8} engine={target % self.engines + 1} id={target:<6} fn{target:<28}"
+
+    def source(self, target: int) -> str:
+        return f"Src file{target % 97}.js:{target}"
+
+    def queue_stats(self, change: str) -> str:
+        return (f"Queue: Size {len(self.queued):4} Change {change} Load {self.random.random():5.2f} "
+                f"Time {self.random.randint(0, 5000):6}us")
+
+    def line(self) -> str:
+        self.time += timedelta(microseconds=int(self.random.expovariate(1 / 20_000)))
+        self.lines += 1
+        if self.random.random() < self.noise:
+            return self.noise_line()
+
+        r = self.random.random()
+        if r < 0.05 and self.live:
+            comp_id = self.live.pop(self.random.randrange(len(self.live)))
+            return f"[{self.hotspot_time()}] *flushing  nmethod {comp_id}/0x00007f{comp_id:08x} level 4 size 1234"
+        if r < 0.15 and self.compiled:
+            target = self.compiled[self.random.randrange(len(self.compiled))]
+            if self.random.random() < 0.5:
+                return self.head("deopt", target) + f"|Addr 0x7f{target:08x}|{self.utc()}|{self.source(target)}"
+            self.tiers[target] = 0
+            return (self.head("inval.", target) + f"|{self.utc()}|{self.source(target)}"
+                    f"|Reason {self.random.choice(REASONS)}")
+        if r < 0.17:
+            target = self.random.randint(1, self.targets)
+            kind = self.random.choice(["flushed", "disabled", "enabled"])
+            return self.head(kind, target) + f"|{self.utc()}|{self.source(target)}"
+        if r < 0.45 and self.running:
+            return self.finish(self.random.choice(list(self.running)))
+        if r < 0.70 and self.queued:
+            return self.dequeue(self.random.choice(list(self.queued)))
+        target = self.random.randint(1, self.targets)
+        if target in self.queued:
+            return self.dequeue(target)
+        if target in self.running:
+            return self.finish(target)
+        return self.enqueue(target)
+
+    def enqueue(self, target: int) -> str:
+        tier = 1 if self.tiers[target] == 0 else 2
+        self.exec_counts[target] += self.random.randint(100, 1000)
+        self.queued[target] = tier
+        return (self.head("queued", target) + f"|Tier {tier}|Count/Thres {self.exec_counts[target]:8}/ {1000:8}"
+                f"|{self.queue_stats('+1')}|{self.utc()}|{self.source(target)}")
+
+    def dequeue(self, target: int) -> str:
+        tier = self.queued.pop(target)
+        if self.random.random() < 0.05:
+            return (self.head("unque.", target) + f"|Tier {tier}|Count/Thres {self.exec_counts[target]:8}/ {1000:8}"
+                    f"|{self.queue_stats('-1')}|{self.utc()}|{self.source(target)}|Reason dequeued")
+        self.running[target] = tier
+        return (self.head("start", target) + f"|Tier {tier}|Priority {self.random.randint(1, 10000):8}"
+                f"|Rate {self.random.random():.6f}|{self.queue_stats('-1')}|{self.utc()}|{self.source(target)}")
+
+    def finish(self, target: int) -> str:
+        tier = self.running.pop(target)
+        comp_time = self.random.randint(1, 900) * tier
+        if self.random.random() < 0.05:
+            return (self.head("failed", target) + f"|Tier {tier}|Time {comp_time:5}( 10+20 )ms"
+                    f"|{self.random.choice(FAILURES)}|{self.utc()}|{self.source(target)}")
+        self.comp_id += 1
+        self.live.append(self.comp_id)
+        if self.tiers[target] == 0:
+            self.compiled.append(target)
+        self.tiers[target] = tier
+        return (self.head("done", target) + f"|Tier {tier}|Time {comp_time:5}( 10+20 )ms|AST {self.random.randint(1, 500):5}"
+                f"|Inlined   3Y   0N|IR    457/   920|CodeSize {self.random.randint(100, 100_000) * tier:8}"
+                f"|Addr 0x7f{self.comp_id:08x}|CompId {self.comp_id:6}|{self.utc()}|{self.source(target)}")
+
+    def noise_line(self) -> str:
+        return self.random.choice(NOISE_LINES).format(
+            hotspot=self.hotspot_time(), date=self.time.strftime("%Y-%m-%d %H:%M:%S,%f")[:-3], n=self.lines,
+            worker=self.random.randint(1, 16), ms=self.random.randint(1, 500))
+
+
+def generate(out: TextIO, lines: int, targets: int = 1000, engines: int = 1, noise: float = 0.5, seed: int = 1) -> None:
+    log = SyntheticLog(seed, targets, engines, noise)
+    for _ in range(lines):
+        out.write(log.line())
+        out.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a seeded synthetic Truffle engine log.')
+    parser.add_argument('output', nargs='?', help='File to write the log to. Writes to stdout if omitted.')
+    parser.add_argument('--lines', type=int, default=1_000_000, help='Number of lines.')
+    parser.add_argument('--targets', type=int, default=1000, help='Number of call targets.')
+    parser.add_argument('--engines', type=int, default=1, help='Number of engines the call targets are spread over.')
+    parser.add_argument('--noise', type=float, default=0.5, help='Fraction of lines that are not Truffle or HotSpot events.')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the random generator.')
+    args = parser.parse_args()
+
+    if args.output is None:
+        generate(sys.stdout, args.lines, args.targets, args.engines, args.noise, args.seed)
+    else:
+        with open(args.output, 'w') as out:
+            generate(out, args.lines, args.targets, args.engines, args.noise, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,40 @@
+import heapq
 from dataclasses import dataclass, field
+from typing import Optional
 
+import numpy as np
+
+from truffle_logs_analyzer.CallTargetSummary import CallTargetSummary
+from truffle_logs_analyzer.Event import Event
+from truffle_logs_analyzer.EventList import EventList
+from truffle_logs_analyzer.EventStore import EventStore
 from truffle_logs_analyzer.LogEventType import LogEventType
-from truffle_logs_analyzer.TruffleEngineOptLogEntry import TruffleEngineOptLogEntry
+
+# Which CallTarget list holds the events of each type, in the order all_events_sorted merges them
+EVENT_LISTS = {
+    LogEventType.Deoptimization: 'deopts',
+    LogEventType.Done: 'dones',
+    LogEventType.Start: 'starts',
+    LogEventType.Invalidation: 'invals',
+    LogEventType.TransferToInterpreter: 'ttis',
+    LogEventType.Failed: 'failures',
+    LogEventType.CacheFlushing: 'evictions',
+    LogEventType.Enqueued: 'enqueues',
+    LogEventType.Dequeued: 'dequeues',
+    LogEventType.Flushed: 'flushed',
+    LogEventType.Disabled: 'disabled',
+    LogEventType.Enabled: 'enabled',
+}
+
+
+# Sometimes Truffle emits events with the exact same timestamp (perhaps it's not granular enough?)
+# In that case, we'll assume queued, start, and done events follow in that order
+TYPE_PRIORITY = {LogEventType.Enqueued: 1, LogEventType.Start: 2, LogEventType.Done: 3}
+OTHER_PRIORITY = 999
+
+# Call target ids are only unique within one engine of one process, so targets are identified by
+# (process, engine id, id)
+CallTargetKey = tuple[int, int, int]
 
 
 @dataclass
@@ -9,44 +42,61 @@ class CallTarget:
     id: int
     name: str
     source: str
-    starts: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    dones: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    deopts: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    invals: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    ttis: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    failures: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    evictions: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    enqueues: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    dequeues: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    flushed: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    disabled: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
-    enabled: list[TruffleEngineOptLogEntry] = field(default_factory=list[TruffleEngineOptLogEntry])
+    process: int = 0
+    engine_id: int = 0
+    starts: EventList = field(default_factory=EventList.empty)
+    dones: EventList = field(default_factory=EventList.empty)
+    deopts: EventList = field(default_factory=EventList.empty)
+    invals: EventList = field(default_factory=EventList.empty)
+    ttis: EventList = field(default_factory=EventList.empty)
+    failures: EventList = field(default_factory=EventList.empty)
+    evictions: EventList = field(default_factory=EventList.empty)
+    enqueues: EventList = field(default_factory=EventList.empty)
+    dequeues: EventList = field(default_factory=EventList.empty)
+    flushed: EventList = field(default_factory=EventList.empty)
+    disabled: EventList = field(default_factory=EventList.empty)
+    enabled: EventList = field(default_factory=EventList.empty)
+    summary: CallTargetSummary = field(default_factory=CallTargetSummary)
+    # Merged timeline of all lists as (list name, position in the list) pairs, built on first use and dropped whenever
+    # events are attached
+    _timeline: Optional[list[tuple[str, int]]] = field(default=None, repr=False, compare=False)
+    _timeline_events: Optional[list[Event]] = field(default=None, repr=False, compare=False)
+
+    @property
+    def key(self) -> CallTargetKey:
+        return self.process, self.engine_id, self.id
+
+    def attach(self, event_type: LogEventType, store: EventStore, indices: np.ndarray) -> None:
+        list_name = EVENT_LISTS[event_type]
+        setattr(self, list_name, getattr(self, list_name).extend(store, indices))
+        self.summary.add(event_type, store, indices)
+        self._timeline = None
+        self._timeline_events = None
 
     def exec_count(self) -> int:
-        if len(self.enqueues) > 0:
-            return sorted(self.enqueues, key=lambda e: e.timestamp, reverse=True)[0].exec_count
-        else:
-            return 0
-
-    def all_events_sorted(self) -> list[TruffleEngineOptLogEntry]:
-        all_events = self.deopts
-        all_events.extend(self.dones)
-        all_events.extend(self.starts)
-        all_events.extend(self.invals)
-        all_events.extend(self.ttis)
-        all_events.extend(self.failures)
-        all_events.extend(self.evictions)
-        all_events.extend(self.enqueues)
-        all_events.extend(self.dequeues)
-        all_events.extend(self.flushed)
-        all_events.extend(self.disabled)
-        all_events.extend(self.enabled)
-
-        # Sometimes Truffle emits events with the exact same timestamp (perhaps it's not granular enough?)
-        # In that case, we'll assume queued, start, and done events follow in that order
-        type_priority = { LogEventType.Enqueued: 1, LogEventType.Start: 2, LogEventType.Done: 3, }
-        def sort_by_timestamp_and_type(event: TruffleEngineOptLogEntry):
-            # Use the priority mapping for the secondary sort
-            return event.timestamp, type_priority.get(event.log_event_type, 999)
-
-        return sorted(all_events, key=sort_by_timestamp_and_type)
+        return self.summary.exec_count
+
+    def timeline(self) -> list[tuple[str, int]]:
+        # Every list is in log order, which is nearly sorted by time, so each one is sorted on its own (cheap) and then
+        # they are merged. heapq.merge is stable, which keeps events with equal keys in list order, exactly like
+        # sorting the concatenation of all lists would.
+        if self._timeline is None:
+            runs = []
+            for event_type, list_name in EVENT_LISTS.items():
+                events = getattr(self, list_name)
+                if len(events) == 0:
+                    continue
+                timestamps = events.column('timestamp')
+                positions = np.argsort(timestamps, kind='stable')
+                priority = TYPE_PRIORITY.get(event_type, OTHER_PRIORITY)
+                runs.append([(timestamp, priority, list_name, position)
+                             for timestamp, position in zip(timestamps[positions].tolist(), positions.tolist())])
+            self._timeline = [(list_name, position) for _, _, list_name, position in
+                              heapq.merge(*runs, key=lambda entry: (entry[0], entry[1]))]
+        return self._timeline
+
+    def all_events_sorted(self) -> list[Event]:
+        if self._timeline_events is None:
+            self._timeline_events = [getattr(self, list_name)[position] for list_name, position in self.timeline()]
+        # A copy, so callers can't change the cached timeline
+        return list(self._timeline_events)
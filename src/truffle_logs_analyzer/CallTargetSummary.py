@@ -0,0 +1,56 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from .EventStore import EventStore
+from .LogEventType import LogEventType
+
+
+# Aggregates of the events of one call target, updated as events are attached to it, so that reports don't need to
+# go over the events again
+@dataclass
+class CallTargetSummary:
+    counts: dict[LogEventType, int] = field(default_factory=dict)
+    # Totals of the 'done' events, overall and per tier
+    comp_time: int = 0
+    code_size: int = 0
+    comp_time_by_tier: dict[int, int] = field(default_factory=dict)
+    code_size_by_tier: dict[int, int] = field(default_factory=dict)
+    max_code_size: int = 0
+    first_timestamp: Optional[int] = None
+    last_timestamp: Optional[int] = None
+    # Execution count of the first of the latest enqueues, and the timestamp of that enqueue
+    exec_count: int = 0
+    exec_count_timestamp: Optional[int] = None
+
+    def count(self, event_type: LogEventType) -> int:
+        return self.counts.get(event_type, 0)
+
+    def add(self, event_type: LogEventType, store: EventStore, indices: np.ndarray) -> None:
+        if len(indices) == 0:
+            return
+
+        self.counts[event_type] = self.count(event_type) + len(indices)
+
+        timestamps = store.timestamp[indices]
+        first, last = int(timestamps.min()), int(timestamps.max())
+        self.first_timestamp = first if self.first_timestamp is None else min(self.first_timestamp, first)
+        self.last_timestamp = last if self.last_timestamp is None else max(self.last_timestamp, last)
+
+        if event_type == LogEventType.Done:
+            tiers = store.tier[indices]
+            comp_times = store.comp_time[indices]
+            code_sizes = store.code_size_in_bytes[indices]
+            self.comp_time += int(comp_times.sum())
+            self.code_size += int(code_sizes.sum())
+            self.max_code_size = max(self.max_code_size, int(code_sizes.max()))
+            for tier in np.unique(tiers).tolist():
+                self.comp_time_by_tier[tier] = self.comp_time_by_tier.get(tier, 0) + int(comp_times[tiers == tier].sum())
+                self.code_size_by_tier[tier] = self.code_size_by_tier.get(tier, 0) + int(code_sizes[tiers == tier].sum())
+        elif event_type == LogEventType.Enqueued:
+            # On equal timestamps the enqueue attached first wins
+            latest = int(np.argmax(timestamps))
+            if self.exec_count_timestamp is None or int(timestamps[latest]) > self.exec_count_timestamp:
+                self.exec_count = int(store.exec_count[indices[latest]])
+                self.exec_count_timestamp = int(timestamps[latest])
@@ -0,0 +1,84 @@
+import numpy as np
+
+from .CallTarget import CallTargetKey
+from .EventStore import EventStore
+from .LogEventType import LogEventType
+from .StringTable import MISSING
+
+
+def sorted_join(keys: np.ndarray, lookup_keys: np.ndarray) -> np.ndarray:
+    # Position in 'keys' of the first occurrence of every lookup key, or -1 if it's not there
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    positions = np.searchsorted(sorted_keys, lookup_keys)
+    found = positions < len(sorted_keys)
+    found[found] = sorted_keys[positions[found]] == lookup_keys[found]
+    return np.where(found, order[np.minimum(positions, len(order) - 1)], -1)
+
+
+def search_by_key_and_time(keys: np.ndarray, timestamps: np.ndarray, lookup_keys: np.ndarray,
+                           lookup_timestamps: np.ndarray, side: str = 'left') -> np.ndarray:
+    # 'keys' and 'timestamps' are sorted by key and then time. Returns where every (lookup key, lookup timestamp) would
+    # be inserted, like np.searchsorted. Timestamps are replaced by their rank among all timestamps, so that key and
+    # time fit in one int64 that a single binary search can look up.
+    times = np.unique(np.concatenate((timestamps, lookup_timestamps)))
+    stride = len(times) + 1
+    return np.searchsorted(keys * stride + np.searchsorted(times, timestamps),
+                           lookup_keys * stride + np.searchsorted(times, lookup_timestamps), side)
+
+
+# Lifetime of every compiled method (nmethod) in the log: from its 'done' event to the code cache flush of its
+# compilation id, matched within the same process. Everything is computed with sorts and searches over whole columns,
+# i.e., in O(n log n) for n compilations.
+class CodeCacheAnalysis:
+    def __init__(self, hotspot_events: EventStore, truffle_events: EventStore):
+        dones = np.flatnonzero((truffle_events.log_event_type == LogEventType.Done.value) &
+                               (truffle_events.comp_id != MISSING))
+        self.process = truffle_events.process[dones]
+        self.engine_ids = truffle_events.engine_id[dones]
+        self.ids = truffle_events.id[dones]
+        self.tiers = truffle_events.tier[dones]
+        self.comp_times = truffle_events.comp_time[dones]
+        self.code_sizes = truffle_events.code_size_in_bytes[dones]
+        self.done_timestamps = truffle_events.timestamp[dones]
+
+        # Compilation ids are only unique within a process, so the join key combines both
+        flush_keys = self.join_keys(hotspot_events.process, hotspot_events.comp_id)
+        flushes = sorted_join(flush_keys, self.join_keys(self.process, truffle_events.comp_id[dones]))
+        self.evicted = flushes >= 0
+        self.flush_timestamps = np.where(self.evicted, hotspot_events.timestamp[np.maximum(flushes, 0)], MISSING)
+        self.lifetimes = self.flush_timestamps - self.done_timestamps
+
+    @staticmethod
+    def join_keys(process: np.ndarray, comp_id: np.ndarray) -> np.ndarray:
+        return process.astype(np.int64) << 40 | comp_id
+
+    def lifetimes_of_tier(self, tier: int) -> np.ndarray:
+        return self.lifetimes[self.evicted & (self.tiers == tier)]
+
+    def live_code(self) -> tuple[np.ndarray, np.ndarray]:
+        # Sweep over the compilations (+ code size) and flushes (- code size) in time order. Returns the time of every
+        # step and the bytes of compiled code in the code cache right after it. On equal timestamps compilations come
+        # first.
+        times = np.concatenate((self.done_timestamps, self.flush_timestamps[self.evicted]))
+        deltas = np.concatenate((self.code_sizes, -self.code_sizes[self.evicted]))
+        order = np.argsort(times, kind='stable')
+        return times[order], np.cumsum(deltas[order])
+
+    def wasted_compile_time(self, short_lived_ns: int) -> list[tuple[CallTargetKey, int, int]]:
+        # Compile time spent on code that was flushed within 'short_lived_ns', per call target: (key, time, count),
+        # most wasted first
+        wasted = np.flatnonzero(self.evicted & (self.lifetimes <= short_lived_ns))
+        if len(wasted) == 0:
+            return []
+
+        keys = np.stack((self.process[wasted].astype(np.int64), self.engine_ids[wasted].astype(np.int64),
+                         self.ids[wasted]))
+        targets, owners = np.unique(keys, axis=1, return_inverse=True)
+        owners = owners.reshape(-1)
+        times = np.bincount(owners, weights=self.comp_times[wasted]).astype(np.int64)
+        counts = np.bincount(owners)
+
+        ranking = np.lexsort((-counts, -times))
+        return [((int(targets[0, i]), int(targets[1, i]), int(targets[2, i])), int(times[i]), int(counts[i]))
+                for i in ranking]
@@ -0,0 +1,86 @@
+import gzip
+import lzma
+import queue
+import threading
+from typing import BinaryIO, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Magic bytes at the start of each supported compressed format
+MAGIC_BYTES = {
+    'gzip': b'\x1f\x8b',
+    'zstd': b'\x28\xb5\x2f\xfd',
+    'xz': b'\xfd7zXZ\x00',
+}
+
+# Size of the decompressed blocks handed to the parser, and how many of them may be waiting to be parsed
+BLOCK_SIZE = 16 * 1024 * 1024
+QUEUED_BLOCKS = 4
+
+
+def detect_compression(path: str) -> Optional[str]:
+    with open(path, 'rb') as file:
+        head = file.read(max(len(magic) for magic in MAGIC_BYTES.values()))
+    for compression, magic in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_decompressed(path: str, compression: str) -> BinaryIO:
+    # All three readers continue with the next member/stream/frame at the end of one, so logs that were compressed in
+    # pieces and concatenated (e.g., 'cat a.gz b.gz') read as a single log
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'xz':
+        return lzma.open(path, 'rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed, which needs the 'zstandard' package")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+    raise ValueError(f"Unknown compression '{compression}'")
+
+
+# Yields the decompressed content of a log file in blocks of about BLOCK_SIZE bytes. Decompression runs in a background
+# thread, which overlaps with the parsing of the previous blocks since zlib, lzma and zstd release the GIL while working.
+def decompressed_blocks(path: str, compression: str) -> Iterator[bytes]:
+    blocks: queue.Queue = queue.Queue(maxsize=QUEUED_BLOCKS)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Give up when the consumer went away, instead of blocking on a full queue forever
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def decompress() -> None:
+        try:
+            with open_decompressed(path, compression) as stream:
+                while True:
+                    block = stream.read(BLOCK_SIZE)
+                    if not block or not put(block):
+                        break
+            put(None)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=decompress, name=f"decompress {path}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            block = blocks.get()
+            if block is None:
+                return
+            if isinstance(block, BaseException):
+                raise block
+            yield block
+    finally:
+        stop.set()
+        thread.join()
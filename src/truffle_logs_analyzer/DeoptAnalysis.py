@@ -0,0 +1,107 @@
+import numpy as np
+
+from .CallTarget import CallTargetKey
+from .CodeCacheAnalysis import search_by_key_and_time
+from .EventStore import EventStore
+from .LogEventType import LogEventType
+from .StringTable import MISSING
+
+
+# Deoptimizations and invalidations of every call target. The 'done', 'deopt' and 'inval.' events are sorted once by
+# call target and time; everything else is a single pass over the sorted columns:
+# - storms: the most deopts and invalidations of a target within any sliding window of 'window_ns'
+# - deopt -> recompile loops: compilations that directly follow a deopt or invalidation of earlier compiled code
+# - wasted compile time: compilations invalidated within 'short_lived_ns' of being done
+class DeoptAnalysis:
+    def __init__(self, truffle_events: EventStore, window_ns: int, short_lived_ns: int):
+        types = truffle_events.log_event_type
+        selected = np.flatnonzero(np.isin(types, [LogEventType.Done.value, LogEventType.Deoptimization.value,
+                                                  LogEventType.Invalidation.value]))
+        targets, keys = np.unique(np.stack((truffle_events.process[selected].astype(np.int64),
+                                            truffle_events.engine_id[selected].astype(np.int64),
+                                            truffle_events.id[selected])), axis=1, return_inverse=True)
+        keys = keys.reshape(-1)
+        timestamps = truffle_events.timestamp[selected]
+        order = np.lexsort((np.arange(len(selected)), timestamps, keys))
+        self.targets = targets
+        self.keys = keys[order]
+        self.timestamps = timestamps[order]
+        self.events = selected[order]
+        types = types[self.events]
+        is_done = types == LogEventType.Done.value
+        is_deopt = types == LogEventType.Deoptimization.value
+        is_inval = types == LogEventType.Invalidation.value
+        self.is_inval = is_inval
+        num_targets = targets.shape[1]
+
+        # Sliding windows over the deopts and invalidations of each target, ending at each of them
+        storm_events = np.flatnonzero(is_deopt | is_inval)
+        storm_keys = self.keys[storm_events]
+        self.storm_timestamps = self.timestamps[storm_events]
+        window_starts = search_by_key_and_time(storm_keys, self.storm_timestamps, storm_keys,
+                                               self.storm_timestamps - window_ns)
+        self.window_counts = np.arange(len(storm_events)) - window_starts + 1
+        self.peaks = np.zeros(num_targets, dtype=np.int64)
+        np.maximum.at(self.peaks, storm_keys, self.window_counts)
+        # Time of the first window of each target with its peak count
+        at_peak = np.flatnonzero(self.window_counts == self.peaks[storm_keys])
+        peak_keys, firsts = np.unique(storm_keys[at_peak], return_index=True)
+        self.peak_timestamps = np.full(num_targets, MISSING, dtype=np.int64)
+        self.peak_timestamps[peak_keys] = self.storm_timestamps[at_peak[firsts]]
+        self.deopt_counts = np.bincount(self.keys[is_deopt], minlength=num_targets)
+        self.inval_counts = np.bincount(self.keys[is_inval], minlength=num_targets)
+
+        # Latest 'done' of the same target at or before every position, or -1
+        positions = np.arange(len(self.keys))
+        last_done = np.maximum.accumulate(np.where(is_done, positions, -1))
+        last_done = np.where((last_done >= 0) & (self.keys[np.maximum(last_done, 0)] == self.keys), last_done, -1)
+
+        after_deopt = np.concatenate(([False], (is_deopt | is_inval)[:-1])) & \
+                      np.concatenate(([False], self.keys[1:] == self.keys[:-1]))
+        had_done = np.concatenate(([-1], last_done[:-1])) >= 0
+        recompiles = is_done & after_deopt & had_done
+        self.recompile_counts = np.bincount(self.keys[recompiles], minlength=num_targets)
+
+        # Every invalidated compilation counts once, for the first invalidation after it
+        invals = np.flatnonzero(is_inval & (last_done >= 0))
+        invalidated, firsts = np.unique(last_done[invals], return_index=True)
+        invals = invals[firsts]
+        short_lived = self.timestamps[invals] - self.timestamps[invalidated] <= short_lived_ns
+        self.wasted_dones = self.events[invalidated[short_lived]]
+        self.wasted_invals = self.events[invals[short_lived]]
+        comp_times = truffle_events.comp_time[self.wasted_dones]
+        self.wasted_times = np.bincount(self.keys[invalidated[short_lived]], weights=comp_times,
+                                        minlength=num_targets).astype(np.int64)
+
+    def target_key(self, target: int) -> CallTargetKey:
+        return int(self.targets[0, target]), int(self.targets[1, target]), int(self.targets[2, target])
+
+    def storm_targets(self, threshold: int) -> np.ndarray:
+        # Targets with at least 'threshold' deopts and invalidations within one window, most in a window first
+        flagged = np.flatnonzero(self.peaks >= threshold)
+        return flagged[np.lexsort((-self.wasted_times[flagged], -self.peaks[flagged]))]
+
+    def busiest_window(self, window_ns: int) -> tuple[int, int]:
+        # Most deopts and invalidations of all targets together within one window, and when that window ended
+        if len(self.storm_timestamps) == 0:
+            return 0, MISSING
+        timestamps = np.sort(self.storm_timestamps, kind='stable')
+        counts = np.arange(len(timestamps)) - np.searchsorted(timestamps, timestamps - window_ns) + 1
+        busiest = int(np.argmax(counts))
+        return int(counts[busiest]), int(timestamps[busiest])
+
+    def reasons(self, truffle_events: EventStore) -> list[tuple[str, int, int, int]]:
+        # Invalidations grouped by reason: (reason, invalidations, call targets, wasted compile time), most first
+        invals = np.flatnonzero(self.is_inval)
+        codes, owners = np.unique(truffle_events.reason[self.events[invals]], return_inverse=True)
+        owners = owners.reshape(-1)
+        counts = np.bincount(owners, minlength=len(codes))
+        pairs = np.unique(np.stack((owners, self.keys[invals])), axis=1)
+        targets = np.bincount(pairs[0], minlength=len(codes))
+        wasted_owners = np.searchsorted(codes, truffle_events.reason[self.wasted_invals])
+        wasted = np.bincount(wasted_owners, weights=truffle_events.comp_time[self.wasted_dones],
+                             minlength=len(codes)).astype(np.int64)
+
+        ranking = np.lexsort((-wasted, -counts))
+        return [(truffle_events.string('reason', int(codes[i])) or "(none)", int(counts[i]), int(targets[i]),
+                 int(wasted[i])) for i in ranking]
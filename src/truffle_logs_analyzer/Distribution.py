@@ -0,0 +1,29 @@
+import numpy as np
+
+# Percentiles printed by the reports
+PERCENTILES = (50, 90, 95, 99, 99.9, 100)
+
+
+# Sorted values of a distribution with their percentiles, all computed at once
+class Distribution:
+    def __init__(self, values: np.ndarray):
+        self.values = np.sort(values)
+        self.percentiles = dict(zip(PERCENTILES, np.percentile(self.values, PERCENTILES))) if len(values) > 0 else {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def sum(self) -> int:
+        return self.values.sum()
+
+    def average(self) -> float:
+        return np.average(self.values)
+
+    def min(self):
+        return np.min(self.values)
+
+    def percentile(self, perc: float) -> float:
+        return self.percentiles[perc]
+
+    def count_at_most(self, value: float) -> int:
+        return int(np.searchsorted(self.values, value, side='right'))
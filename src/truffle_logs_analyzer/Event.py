@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from .LogEventType import LogEventType
+
+
+@dataclass
+class Event:
+    index: int
+    log_event_type: LogEventType
+    engine_id: Optional[int]
+    id: Optional[int]
+    name: Optional[str]
+    tier: Optional[int]
+    exec_count: Optional[int]
+    comp_time: Optional[int]
+    code_size_in_bytes: Optional[int]
+    comp_id: Optional[int]
+    timestamp: datetime
+    source: Optional[str]
+    reason: Optional[str]
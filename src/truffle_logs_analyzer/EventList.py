@@ -0,0 +1,45 @@
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .Event import Event
+from .EventStore import EventStore
+
+
+class EventList:
+    def __init__(self, store: Optional[EventStore], indices: np.ndarray):
+        self.store = store
+        self.indices = indices
+
+    @staticmethod
+    def empty() -> 'EventList':
+        return EventList(None, np.empty(0, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __iter__(self) -> Iterator[Event]:
+        for i in self.indices:
+            yield self.store.row(i)
+
+    def __getitem__(self, position: int) -> Event:
+        return self.store.row(self.indices[position])
+
+    def column(self, name: str) -> np.ndarray:
+        if self.store is None:
+            return np.empty(0, dtype=np.int64)
+        return self.store.columns[name][self.indices]
+
+    @staticmethod
+    def concat(event_lists: list['EventList']) -> 'EventList':
+        stores = {id(event_list.store): event_list.store for event_list in event_lists if event_list.store is not None}
+        if len(stores) > 1:
+            raise ValueError("Cannot mix events from different stores in one EventList")
+        if len(stores) == 0:
+            return EventList.empty()
+        return EventList(next(iter(stores.values())), np.concatenate([event_list.indices for event_list in event_lists]))
+
+    def extend(self, store: EventStore, indices: np.ndarray) -> 'EventList':
+        if self.store is not None and self.store is not store:
+            raise ValueError("Cannot mix events from different stores in one EventList")
+        return EventList(store, np.concatenate((self.indices, indices)))
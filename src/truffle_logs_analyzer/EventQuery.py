@@ -0,0 +1,570 @@
+import operator
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+import numpy as np
+
+from .EventStore import FLOAT_COLUMNS, NUMERIC_COLUMNS, STRING_COLUMNS, EventStore, ns_to_datetime
+from .LogEventType import LogEventType
+from .StringTable import MISSING
+from .TimestampDecoder import datetime_to_ns
+
+# Query language over the columns of the event stores, e.g.
+#   select tier, count(), p99(comp_time) from done where source like '%foo.js%' group by tier order by 3 desc limit 20
+# Grammar (keywords are case insensitive):
+#   select <item>, ... from <source> [where <condition>] [group by <column>, ...]
+#          [order by <item|position> [asc|desc], ...] [limit <n>]
+#   <item>:      * | <column> | count() | count(*) | <function>(<column>), optionally followed by 'as <label>'
+#   <function>:  count, sum, avg, min, max, or a percentile such as p50, p99 or p99.9
+#   <source>:    events (all Truffle events), hotspot (all HotSpot events), or an event type such as done or deopt
+#   <condition>: <column> =|!=|<>|<|<=|>|>= <value> | <column> [not] like '<pattern>' | <column> [not] in (<values>)
+#                | <column> is [not] null | <condition> and|or <condition> | not <condition> | (<condition>)
+# Absent values are null: they only match 'is null' and aggregates skip them.
+
+TOKEN = re.compile(r"\s*(?:(?P<string>'(?:[^']|'')*')|(?P<number>-?\d+(?:\.\d+)?)|"
+                   r"(?P<name>p\d+\.\d+|[A-Za-z_][A-Za-z0-9_]*)|(?P<symbol><=|>=|!=|<>|[=<>(),*]))")
+
+KEYWORDS = {'select', 'from', 'where', 'group', 'by', 'order', 'limit', 'and', 'or', 'not', 'like', 'in', 'is', 'null',
+            'asc', 'desc', 'as'}
+
+COMPARISONS = {'=': operator.eq, '!=': operator.ne, '<>': operator.ne, '<': operator.lt, '<=': operator.le,
+               '>': operator.gt, '>=': operator.ge}
+
+# Opposite of every predicate operator, for pushing 'not' down to the predicates
+NEGATIONS = {'=': '!=', '!=': '=', '<>': '=', '<': '>=', '<=': '>', '>': '<=', '>=': '<', 'like': 'not like',
+             'not like': 'like', 'in': 'not in', 'not in': 'in', 'is null': 'is not null', 'is not null': 'is null'}
+
+FUNCTIONS = ('count', 'sum', 'avg', 'min', 'max')
+PERCENTILE = re.compile(r'p(\d+(?:\.\d+)?)')
+
+# Event type names usable as a source and as values of the 'type' column, including the words of the log lines
+EVENT_TYPES = {event_type.name.lower(): event_type for event_type in LogEventType}
+EVENT_TYPES.update({'queued': LogEventType.Enqueued, 'unqueued': LogEventType.Dequeued,
+                    'deopt': LogEventType.Deoptimization, 'inval': LogEventType.Invalidation})
+
+# Queryable columns in the order of 'select *'. 'type' is the event type, stored as log_event_type.
+COLUMNS = (('type',) + tuple(name for name in NUMERIC_COLUMNS if name != 'log_event_type') +
+           tuple(FLOAT_COLUMNS) + STRING_COLUMNS)
+COLUMN_ALIASES = {'log_event_type': 'type'}
+
+
+def column_kind(column: str) -> str:
+    if column == 'type':
+        return 'type'
+    elif column == 'timestamp':
+        return 'timestamp'
+    elif column in STRING_COLUMNS:
+        return 'string'
+    elif column in FLOAT_COLUMNS:
+        return 'float'
+    return 'int'
+
+
+def stored_column(store: EventStore, column: str) -> np.ndarray:
+    return store.columns['log_event_type' if column == 'type' else column]
+
+
+def dictionary(store: EventStore, column: str) -> list[Optional[str]]:
+    # Text of every code of a string column (or the name of every event type value of 'type')
+    if column == 'type':
+        names = [None] * (max(event_type.value for event_type in LogEventType) + 1)
+        for event_type in LogEventType:
+            names[event_type.value] = event_type.name.lower()
+        return names
+    return store.strings[column].strings
+
+
+def nulls(values: np.ndarray, kind: str) -> np.ndarray:
+    if kind == 'float':
+        return np.isnan(values)
+    return values == MISSING
+
+
+@dataclass
+class Column:
+    name: str
+
+
+@dataclass
+class Aggregate:
+    function: str
+    column: Optional[str] = None
+    percentile: Optional[float] = None
+
+
+@dataclass
+class SelectItem:
+    expression: Union[Column, Aggregate]
+    label: str
+
+
+@dataclass
+class Comparison:
+    column: str
+    op: str
+    value: object = None
+
+
+@dataclass
+class BoolOp:
+    op: str
+    left: object
+    right: object
+
+
+def negate(condition):
+    # 'not' is pushed down to the predicates (De Morgan), so that absent values match neither a predicate nor its
+    # negation, and only ever match 'is null'
+    if isinstance(condition, BoolOp):
+        return BoolOp('or' if condition.op == 'and' else 'and', negate(condition.left), negate(condition.right))
+    return Comparison(condition.column, NEGATIONS[condition.op], condition.value)
+
+
+def event_type_name(value: Union[int, float, str]) -> str:
+    # Name of an event type as stored in the 'type' column, for any of the names in EVENT_TYPES
+    event_type = EVENT_TYPES.get(str(value).lower())
+    if event_type is None:
+        raise ValueError(f"Unknown event type '{value}'. Event types: {', '.join(EVENT_TYPES)}")
+    return event_type.name.lower()
+
+
+# One column of a query result. 'values' holds codes for the 'string' and 'type' kinds.
+@dataclass
+class ResultColumn:
+    label: str
+    kind: str
+    values: np.ndarray
+    null: np.ndarray
+    names: list[Optional[str]] = field(default_factory=list)
+
+    def take(self, indices: np.ndarray) -> 'ResultColumn':
+        return ResultColumn(self.label, self.kind, self.values[indices], self.null[indices], self.names)
+
+    def sort_key(self) -> np.ndarray:
+        if self.kind in ('string', 'type'):
+            # Rank of every code in alphabetical order; the extra slot ranks MISSING first
+            order = sorted(range(len(self.names)), key=lambda code: self.names[code] or '')
+            ranks = np.empty(len(self.names) + 1, dtype=np.int64)
+            ranks[order] = np.arange(1, len(order) + 1)
+            ranks[-1] = 0
+            return ranks[self.values]
+        return np.where(self.null, -np.inf, self.values) if self.kind == 'float' else self.values
+
+    def cells(self) -> list[str]:
+        cells = []
+        for value, null in zip(self.values.tolist(), self.null.tolist()):
+            if null:
+                cells.append("")
+            elif self.kind in ('string', 'type'):
+                cells.append(self.names[value])
+            elif self.kind == 'timestamp':
+                cells.append(ns_to_datetime(int(value)).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3])
+            elif self.kind == 'float':
+                cells.append(f"{value:.2f}")
+            else:
+                cells.append(str(value))
+        return cells
+
+    def is_text(self) -> bool:
+        return self.kind in ('string', 'type')
+
+
+class QueryParser:
+    def __init__(self, text: str):
+        self.tokens = []
+        text = text.strip().rstrip(';')
+        position = 0
+        while position < len(text):
+            match = TOKEN.match(text, position)
+            if match is None or match.end() == position:
+                if text[position:].strip() == "":
+                    break
+                raise ValueError(f"Unexpected input at '{text[position:position + 20]}'")
+            kind = match.lastgroup
+            token = match.group(kind)
+            if kind == 'name' and token.lower() in KEYWORDS:
+                kind, token = 'keyword', token.lower()
+            self.tokens.append((kind, token))
+            position = match.end()
+        self.position = 0
+
+    def peek(self, *tokens: str) -> bool:
+        if self.position >= len(self.tokens):
+            return False
+        kind, token = self.tokens[self.position]
+        return kind in ('keyword', 'symbol') and token in tokens
+
+    def accept(self, *tokens: str) -> Optional[str]:
+        if self.peek(*tokens):
+            self.position += 1
+            return self.tokens[self.position - 1][1]
+        return None
+
+    def expect(self, *tokens: str) -> str:
+        token = self.accept(*tokens)
+        if token is None:
+            raise ValueError(f"Expected {' or '.join(repr(t) for t in tokens)} {self.location()}")
+        return token
+
+    def location(self) -> str:
+        if self.position >= len(self.tokens):
+            return "at the end of the query"
+        return f"at '{self.tokens[self.position][1]}'"
+
+    def next(self, kind: str, description: str) -> str:
+        if self.position >= len(self.tokens) or self.tokens[self.position][0] != kind:
+            raise ValueError(f"Expected {description} {self.location()}")
+        self.position += 1
+        return self.tokens[self.position - 1][1]
+
+    def column(self) -> str:
+        name = self.next('name', "a column").lower()
+        name = COLUMN_ALIASES.get(name, name)
+        if name not in COLUMNS:
+            raise ValueError(f"Unknown column '{name}'. Columns: {', '.join(COLUMNS)}")
+        return name
+
+    def query(self) -> 'EventQuery':
+        self.expect('select')
+        items = []
+        while True:
+            items.extend(self.select_items())
+            if not self.accept(','):
+                break
+
+        self.expect('from')
+        source = self.next('name', "an event source").lower()
+        if source not in ('events', 'hotspot') and source not in EVENT_TYPES:
+            raise ValueError(f"Unknown source '{source}'. Sources: events, hotspot, {', '.join(EVENT_TYPES)}")
+
+        condition = self.condition() if self.accept('where') else None
+
+        group_by = []
+        if self.accept('group'):
+            self.expect('by')
+            group_by.append(self.column())
+            while self.accept(','):
+                group_by.append(self.column())
+
+        order_by = []
+        if self.accept('order'):
+            self.expect('by')
+            order_by.append(self.order_item(items))
+            while self.accept(','):
+                order_by.append(self.order_item(items))
+
+        limit = int(self.next('number', "the number of rows")) if self.accept('limit') else None
+        if self.position < len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.position][1]}'")
+        return EventQuery(items, source, condition, group_by, order_by, limit)
+
+    def select_items(self) -> list[SelectItem]:
+        if self.accept('*'):
+            return [SelectItem(Column(name), name) for name in COLUMNS]
+
+        name = self.next('name', "a column or an aggregate").lower()
+        if self.accept('('):
+            percentile = PERCENTILE.fullmatch(name)
+            if name not in FUNCTIONS and percentile is None:
+                raise ValueError(f"Unknown function '{name}'. Functions: {', '.join(FUNCTIONS)}, p<percentile>")
+            if name == 'count' and self.peek(')', '*'):
+                self.accept('*')
+                self.expect(')')
+                expression = Aggregate('count')
+                label = "count()"
+            else:
+                column = self.column()
+                self.expect(')')
+                if percentile is not None:
+                    value = float(percentile.group(1))
+                    if value > 100:
+                        raise ValueError(f"Percentile {percentile.group(1)} is above 100")
+                    expression = Aggregate('percentile', column, value)
+                else:
+                    expression = Aggregate(name, column)
+                label = f"{name}({column})"
+        else:
+            self.position -= 1
+            column = self.column()
+            expression, label = Column(column), column
+
+        if self.accept('as'):
+            label = self.next('name', "a label")
+        return [SelectItem(expression, label)]
+
+    def order_item(self, items: list[SelectItem]) -> tuple[int, bool]:
+        # Resolves to (index of the selected item, descending)
+        if self.position < len(self.tokens) and self.tokens[self.position][0] == 'number':
+            position = int(self.next('number', "a position"))
+            if not 1 <= position <= len(items):
+                raise ValueError(f"Order by position {position} is not between 1 and {len(items)}")
+            index = position - 1
+        else:
+            start = self.position
+            label = self.next('name', "a selected item").lower()
+            if self.accept('('):
+                while not self.accept(')'):
+                    if self.position >= len(self.tokens):
+                        raise ValueError("Missing ')'")
+                    self.position += 1
+                label = ''.join(token for _, token in self.tokens[start:self.position]).lower().replace('(*)', '()')
+            labels = [item.label.lower() for item in items]
+            columns = [item.expression.name if isinstance(item.expression, Column) else None for item in items]
+            if label in labels:
+                index = labels.index(label)
+            elif label in columns:
+                index = columns.index(label)
+            else:
+                raise ValueError(f"Can only order by selected items, '{label}' is not one of {', '.join(labels)}")
+        descending = self.accept('asc', 'desc') == 'desc'
+        return index, descending
+
+    def condition(self):
+        condition = self.conjunction()
+        while self.accept('or'):
+            condition = BoolOp('or', condition, self.conjunction())
+        return condition
+
+    def conjunction(self):
+        condition = self.negation()
+        while self.accept('and'):
+            condition = BoolOp('and', condition, self.negation())
+        return condition
+
+    def negation(self):
+        if self.accept('not'):
+            return negate(self.negation())
+        if self.accept('('):
+            condition = self.condition()
+            self.expect(')')
+            return condition
+        return self.predicate()
+
+    def predicate(self) -> Comparison:
+        column = self.column()
+        if self.accept('is'):
+            negated = self.accept('not') is not None
+            self.expect('null')
+            return Comparison(column, 'is not null' if negated else 'is null')
+
+        negated = self.accept('not') is not None
+        if self.accept('like'):
+            return Comparison(column, 'not like' if negated else 'like', self.next('string', "a quoted pattern")[1:-1].replace("''", "'"))
+        if self.accept('in'):
+            self.expect('(')
+            values = [self.value()]
+            while self.accept(','):
+                values.append(self.value())
+            self.expect(')')
+            return Comparison(column, 'not in' if negated else 'in', values)
+        if negated:
+            raise ValueError(f"Expected 'like' or 'in' {self.location()}")
+
+        op = self.expect(*COMPARISONS)
+        return Comparison(column, op, self.value())
+
+    def value(self) -> Union[int, float, str]:
+        if self.position < len(self.tokens):
+            kind, token = self.tokens[self.position]
+            if kind == 'string':
+                self.position += 1
+                return token[1:-1].replace("''", "'")
+            if kind == 'number':
+                self.position += 1
+                return float(token) if '.' in token else int(token)
+        raise ValueError(f"Expected a number or a quoted string {self.location()}")
+
+
+@dataclass
+class EventQuery:
+    items: list[SelectItem]
+    source: str
+    condition: object
+    group_by: list[str]
+    order_by: list[tuple[int, bool]]
+    limit: Optional[int]
+
+    @staticmethod
+    def parse(text: str) -> 'EventQuery':
+        return QueryParser(text).query()
+
+    def is_aggregated(self) -> bool:
+        return len(self.group_by) > 0 or any(isinstance(item.expression, Aggregate) for item in self.items)
+
+    def run(self, truffle_events: EventStore, hotspot_events: EventStore) -> list[ResultColumn]:
+        if self.source == 'hotspot' or EVENT_TYPES.get(self.source) == LogEventType.CacheFlushing:
+            store = hotspot_events
+        else:
+            store = truffle_events
+
+        # The source and then every condition narrow down the rows the next condition is evaluated on, so only the
+        # columns of matching rows are ever read
+        if self.source in EVENT_TYPES:
+            rows = np.flatnonzero(store.log_event_type == EVENT_TYPES[self.source].value)
+        else:
+            rows = np.arange(len(store))
+        if self.condition is not None:
+            rows = rows[self.evaluate(store, self.condition, rows)]
+
+        if self.is_aggregated():
+            result = self.aggregate(store, rows)
+        else:
+            if self.limit is not None and len(self.order_by) == 0:
+                rows = rows[:self.limit]
+            result = [self.gather(store, item.expression.name, rows, item.label) for item in self.items]
+
+        if len(self.order_by) > 0 and len(result) > 0:
+            # lexsort takes the most significant key last
+            keys = []
+            for index, descending in reversed(self.order_by):
+                key = result[index].sort_key()
+                keys.append(-key if descending else key)
+            order = np.lexsort(keys)
+            if self.limit is not None:
+                order = order[:self.limit]
+            result = [column.take(order) for column in result]
+        elif self.limit is not None:
+            result = [column.take(np.arange(min(self.limit, len(column.values)))) for column in result]
+        return result
+
+    @staticmethod
+    def gather(store: EventStore, column: str, rows: np.ndarray, label: str) -> ResultColumn:
+        kind = column_kind(column)
+        values = stored_column(store, column)[rows]
+        names = dictionary(store, column) if kind in ('string', 'type') else []
+        return ResultColumn(label, kind, values, nulls(values, kind), names)
+
+    def evaluate(self, store: EventStore, condition, rows: np.ndarray) -> np.ndarray:
+        # Mask over 'rows' of the rows matching the condition
+        if isinstance(condition, BoolOp):
+            mask = self.evaluate(store, condition.left, rows)
+            # 'and' only looks at the rows matching the left side, 'or' only at the others
+            rest = mask.copy() if condition.op == 'and' else ~mask
+            mask[rest] = self.evaluate(store, condition.right, rows[rest])
+            return mask
+        column, op, value = condition.column, condition.op, condition.value
+        kind = column_kind(column)
+        values = stored_column(store, column)[rows]
+        if op == 'is null':
+            return nulls(values, kind)
+        if op == 'is not null':
+            return ~nulls(values, kind)
+
+        if kind == 'type' and op not in ('like', 'not like'):
+            value = [event_type_name(v) for v in value] if op in ('in', 'not in') else event_type_name(value)
+        if kind in ('string', 'type'):
+            # Evaluated once per distinct string and then looked up by code; the extra slot is for MISSING
+            if op in ('like', 'not like'):
+                pattern = re.compile(''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in value),
+                                     re.DOTALL)
+                matches = lambda s: pattern.fullmatch(s) is not None
+            elif op in ('in', 'not in'):
+                options = set(str(option) for option in value)
+                matches = lambda s: s in options
+            else:
+                compare = COMPARISONS[op]
+                matches = lambda s: compare(s, str(value))
+            lookup = np.array([s is not None and matches(s) for s in dictionary(store, column)] + [False])
+            mask = lookup[values]
+            if op in ('not like', 'not in'):
+                mask = ~mask & (values != MISSING)
+            return mask
+
+        if op in ('like', 'not like'):
+            raise ValueError(f"'like' needs a text column, '{column}' is numeric")
+        options = [self.numeric(column, option) for option in (value if op in ('in', 'not in') else [value])]
+        if op in ('in', 'not in'):
+            mask = np.isin(values, options)
+            mask = ~mask if op == 'not in' else mask
+        else:
+            mask = COMPARISONS[op](values, options[0])
+        return mask & ~nulls(values, kind)
+
+    @staticmethod
+    def numeric(column: str, value: Union[int, float, str]) -> Union[int, float]:
+        if not isinstance(value, str):
+            return value
+        if column == 'timestamp':
+            try:
+                timestamp = datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"'{value}' is not a timestamp such as '2024-05-01 10:30:00'")
+            return datetime_to_ns(timestamp if timestamp.tzinfo is not None else timestamp.replace(tzinfo=timezone.utc))
+        raise ValueError(f"Column '{column}' is numeric, '{value}' is not a number")
+
+    def aggregate(self, store: EventStore, rows: np.ndarray) -> list[ResultColumn]:
+        if len(self.group_by) > 0:
+            keys = np.stack([stored_column(store, column)[rows].astype(np.int64) for column in self.group_by])
+            groups, owners = np.unique(keys, axis=1, return_inverse=True)
+            owners = owners.reshape(-1)
+            num_groups = groups.shape[1]
+        else:
+            # Without 'group by' all rows form one group, even when there are none
+            groups, owners, num_groups = None, np.zeros(len(rows), dtype=np.int64), 1
+
+        result = []
+        for item in self.items:
+            expression = item.expression
+            if isinstance(expression, Column):
+                if expression.name not in self.group_by:
+                    raise ValueError(f"Column '{expression.name}' must be in 'group by' or inside an aggregate")
+                kind = column_kind(expression.name)
+                values = groups[self.group_by.index(expression.name)].astype(stored_column(store, expression.name).dtype)
+                names = dictionary(store, expression.name) if kind in ('string', 'type') else []
+                result.append(ResultColumn(item.label, kind, values, nulls(values, kind), names))
+            else:
+                result.append(self.aggregate_column(store, item.label, expression, rows, owners, num_groups))
+        return result
+
+    @staticmethod
+    def aggregate_column(store: EventStore, label: str, aggregate: Aggregate, rows: np.ndarray, owners: np.ndarray,
+                         num_groups: int) -> ResultColumn:
+        if aggregate.column is None:
+            counts = np.bincount(owners, minlength=num_groups)
+            return ResultColumn(label, 'int', counts, np.zeros(num_groups, dtype=bool))
+
+        kind = column_kind(aggregate.column)
+        values = stored_column(store, aggregate.column)[rows]
+        present = ~nulls(values, kind)
+        values, owners = values[present], owners[present]
+        counts = np.bincount(owners, minlength=num_groups)
+        if aggregate.function == 'count':
+            return ResultColumn(label, 'int', counts, np.zeros(num_groups, dtype=bool))
+        if kind in ('string', 'type'):
+            raise ValueError(f"{aggregate.function}() needs a numeric column, '{aggregate.column}' is text")
+
+        # Values sorted by group and then value, so every group is a sorted slice
+        order = np.lexsort((values, owners))
+        values = values[order]
+        starts = np.cumsum(counts) - counts
+        empty = counts == 0
+        firsts = np.where(empty, 0, starts)
+        lasts = np.where(empty, 0, starts + counts - 1)
+
+        if aggregate.function in ('sum', 'avg'):
+            if aggregate.function == 'avg':
+                values = values.astype(np.float64)
+            sums = np.zeros(num_groups, dtype=values.dtype)
+            if len(values) > 0:
+                sums[~empty] = np.add.reduceat(values, starts[~empty])
+            if aggregate.function == 'sum':
+                return ResultColumn(label, 'float' if kind == 'float' else 'int', sums, empty)
+            return ResultColumn(label, 'timestamp' if kind == 'timestamp' else 'float', sums / np.maximum(counts, 1), empty)
+
+        if len(values) == 0:
+            values = np.zeros(1, dtype=values.dtype)
+        if aggregate.function == 'min':
+            return ResultColumn(label, kind, values[firsts], empty)
+        if aggregate.function == 'max':
+            return ResultColumn(label, kind, values[lasts], empty)
+
+        # Linear interpolation between the closest ranks, as np.percentile does
+        positions = aggregate.percentile / 100 * np.maximum(counts - 1, 0)
+        below = np.floor(positions).astype(np.int64)
+        above = np.minimum(below + 1, np.maximum(counts - 1, 0))
+        low = values[np.where(empty, 0, starts + below)].astype(np.float64)
+        high = values[np.where(empty, 0, starts + above)].astype(np.float64)
+        return ResultColumn(label, 'timestamp' if kind == 'timestamp' else 'float',
+                            low + (high - low) * (positions - below), empty)
@@ -0,0 +1,156 @@
+import heapq
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from .Event import Event
+from .LogEventType import LogEventType
+from .StringTable import MISSING, StringTable
+from .TimestampDecoder import EPOCH
+
+# Numeric columns and their dtypes. Absent values are stored as MISSING (-1).
+NUMERIC_COLUMNS = {
+    'log_event_type': np.int8,
+    'engine_id': np.int32,
+    'id': np.int64,
+    'tier': np.int8,
+    'exec_count': np.int64,
+    'comp_time': np.int64,
+    'code_size_in_bytes': np.int64,
+    'comp_id': np.int64,
+    'timestamp': np.int64,
+    'priority': np.int64,
+    'queue_size': np.int32,
+    'queue_time': np.int64,
+    # Index of the group of log files (i.e., the process) the event was read from. Not parsed, so it's 0 until set.
+    'process': np.int32,
+}
+
+# Numeric columns that come from the parsed log entries
+PARSED_COLUMNS = tuple(name for name in NUMERIC_COLUMNS if name != 'process')
+
+# Fractional columns. Absent values are stored as NaN.
+FLOAT_COLUMNS = {
+    'rate': np.float64,
+    'queue_load': np.float64,
+}
+
+# String columns hold codes into the per-column StringTable.
+STRING_COLUMNS = ('name', 'source', 'reason')
+STRING_DTYPE = np.int32
+
+
+def ns_to_datetime(ns: int) -> datetime:
+    return EPOCH + timedelta(microseconds=int(ns) // 1000)
+
+
+class EventStore:
+    def __init__(self, columns: dict[str, np.ndarray], strings: dict[str, StringTable]):
+        self.columns = columns
+        self.strings = strings
+
+    @staticmethod
+    def empty() -> 'EventStore':
+        columns = {name: np.empty(0, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+        columns.update({name: np.empty(0, dtype=dtype) for name, dtype in FLOAT_COLUMNS.items()})
+        columns.update({name: np.empty(0, dtype=STRING_DTYPE) for name in STRING_COLUMNS})
+        return EventStore(columns, {name: StringTable() for name in STRING_COLUMNS})
+
+    def __len__(self) -> int:
+        return len(self.columns['log_event_type'])
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get('columns')
+        if columns is not None and name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    def string(self, column: str, code: int) -> Optional[str]:
+        return self.strings[column][code]
+
+    def row(self, i: int) -> Event:
+        columns = self.columns
+        tier = int(columns['tier'][i])
+        return Event(
+            index=int(i),
+            log_event_type=LogEventType(int(columns['log_event_type'][i])),
+            engine_id=self._optional(columns['engine_id'][i]),
+            id=self._optional(columns['id'][i]),
+            name=self.strings['name'][int(columns['name'][i])],
+            tier=None if tier == MISSING else tier,
+            exec_count=self._optional(columns['exec_count'][i]),
+            comp_time=self._optional(columns['comp_time'][i]),
+            code_size_in_bytes=self._optional(columns['code_size_in_bytes'][i]),
+            comp_id=self._optional(columns['comp_id'][i]),
+            timestamp=ns_to_datetime(columns['timestamp'][i]),
+            source=self.strings['source'][int(columns['source'][i])],
+            reason=self.strings['reason'][int(columns['reason'][i])],
+        )
+
+    @staticmethod
+    def _optional(value) -> Optional[int]:
+        value = int(value)
+        return None if value == MISSING else value
+
+    def to_arrays(self, prefix: str) -> dict[str, np.ndarray]:
+        arrays = {f"{prefix}{name}": column for name, column in self.columns.items()}
+        for name, table in self.strings.items():
+            arrays[f"{prefix}{name}_strings"], arrays[f"{prefix}{name}_ends"] = table.to_arrays()
+        return arrays
+
+    @staticmethod
+    def from_arrays(arrays, prefix: str) -> 'EventStore':
+        columns = {name: arrays[f"{prefix}{name}"] for name in list(NUMERIC_COLUMNS) + list(FLOAT_COLUMNS) + list(STRING_COLUMNS)}
+        strings = {name: StringTable.from_arrays(arrays[f"{prefix}{name}_strings"], arrays[f"{prefix}{name}_ends"])
+                   for name in STRING_COLUMNS}
+        return EventStore(columns, strings)
+
+    def take(self, indices: np.ndarray) -> 'EventStore':
+        return EventStore({name: column[indices] for name, column in self.columns.items()}, self.strings)
+
+    def extend(self, other: 'EventStore') -> None:
+        # Appends the events of 'other' after the events of this store. Existing indices into this store stay valid.
+        self.columns = self._concat_columns([self, other])
+
+    @staticmethod
+    def concat(stores: list['EventStore']) -> 'EventStore':
+        result = EventStore.empty()
+        result.columns = result._concat_columns(stores)
+        return result
+
+    @staticmethod
+    def merge(stores: list['EventStore']) -> 'EventStore':
+        # k-way merge by timestamp of stores whose events are each in log order. A heap holds the next event of every
+        # store; all events of the store with the earliest one up to the next event of another store are taken at once,
+        # so logs that don't overlap in time (e.g., rotated files) are merged a whole store at a time. Events keep
+        # their order within their store and, on equal timestamps, earlier stores come first.
+        merged = EventStore.concat(stores)
+        if len(stores) < 2:
+            return merged
+
+        offsets = np.cumsum([0] + [len(store) for store in stores])
+        # Events that are a bit out of order within their log stay after the latest event before them
+        keys = [np.maximum.accumulate(store.timestamp) for store in stores]
+        heap = [(int(key[0]), k, 0) for k, key in enumerate(keys) if len(key) > 0]
+        heapq.heapify(heap)
+
+        runs = []
+        while heap:
+            _, k, start = heapq.heappop(heap)
+            key = keys[k]
+            end = int(np.searchsorted(key, heap[0][0], side='right')) if heap else len(key)
+            runs.append(np.arange(offsets[k] + start, offsets[k] + end))
+            if end < len(key):
+                heapq.heappush(heap, (int(key[end]), k, end))
+
+        return merged.take(np.concatenate(runs))
+
+    def _concat_columns(self, stores: list['EventStore']) -> dict[str, np.ndarray]:
+        parts = {name: [] for name in self.columns}
+        for store in stores:
+            for name, column in store.columns.items():
+                if name in STRING_COLUMNS and store.strings[name] is not self.strings[name]:
+                    column = self.strings[name].merge(store.strings[name])[column]
+                parts[name].append(column)
+        return {name: np.concatenate(columns).astype(self.columns[name].dtype, copy=False) for name, columns in parts.items()}
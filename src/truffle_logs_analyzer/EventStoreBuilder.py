@@ -0,0 +1,58 @@
+import math
+from array import array
+
+import numpy as np
+
+from .EventStore import FLOAT_COLUMNS, NUMERIC_COLUMNS, PARSED_COLUMNS, STRING_COLUMNS, STRING_DTYPE, EventStore
+from .StringTable import MISSING, StringTable
+from .TruffleEngineOptLogEntry import TruffleEngineOptLogEntry
+
+
+class EventStoreBuilder:
+    def __init__(self):
+        # array.array keeps each value in its machine representation while the store is growing
+        self._columns = {name: array('q') for name in PARSED_COLUMNS}
+        self._columns.update({name: array('d') for name in FLOAT_COLUMNS})
+        self._columns.update({name: array('i') for name in STRING_COLUMNS})
+        self._strings = {name: StringTable() for name in STRING_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._columns['log_event_type'])
+
+    def append(self, entry: TruffleEngineOptLogEntry) -> None:
+        columns = self._columns
+        columns['log_event_type'].append(entry.log_event_type.value)
+        columns['engine_id'].append(self._value(entry.engine_id))
+        columns['id'].append(self._value(entry.id))
+        columns['tier'].append(self._value(entry.tier))
+        columns['exec_count'].append(self._value(entry.exec_count))
+        columns['comp_time'].append(self._value(entry.comp_time))
+        columns['code_size_in_bytes'].append(self._value(entry.code_size_in_bytes))
+        columns['comp_id'].append(self._value(entry.comp_id))
+        columns['timestamp'].append(entry.timestamp)
+        columns['priority'].append(self._value(entry.priority))
+        columns['queue_size'].append(self._value(entry.queue_size))
+        columns['queue_time'].append(self._value(entry.queue_time))
+        columns['rate'].append(self._float(entry.rate))
+        columns['queue_load'].append(self._float(entry.queue_load))
+        columns['name'].append(self._strings['name'].intern(entry.name))
+        columns['source'].append(self._strings['source'].intern(entry.source))
+        columns['reason'].append(self._strings['reason'].intern(entry.reason))
+
+    @staticmethod
+    def _value(value) -> int:
+        return MISSING if value is None else value
+
+    @staticmethod
+    def _float(value) -> float:
+        return math.nan if value is None else value
+
+    def build(self) -> EventStore:
+        columns = {name: np.frombuffer(self._columns[name], dtype=np.int64).astype(NUMERIC_COLUMNS[name])
+                   for name in PARSED_COLUMNS}
+        columns['process'] = np.zeros(len(self), dtype=NUMERIC_COLUMNS['process'])
+        columns.update({name: np.frombuffer(self._columns[name], dtype=np.float64).astype(dtype)
+                        for name, dtype in FLOAT_COLUMNS.items()})
+        columns.update({name: np.frombuffer(self._columns[name], dtype=np.int32).astype(STRING_DTYPE)
+                        for name in STRING_COLUMNS})
+        return EventStore(columns, self._strings)
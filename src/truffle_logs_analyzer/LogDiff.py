@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .CallTarget import CallTarget, CallTargetKey
+from .Distribution import PERCENTILES, Distribution
+from .EventStore import EventStore
+from .LogEventType import LogEventType
+
+# Tiers whose compile time and code size distributions are compared
+TIERS = (1, 2)
+
+# Call targets are matched between runs by (name, source), since their ids differ from run to run
+MethodKey = tuple[str, str]
+
+
+# Totals of all call targets of one run with the same name and source
+@dataclass
+class MethodTotals:
+    call_targets: int = 0
+    compilations: int = 0
+    comp_time: int = 0
+    code_size: int = 0
+    failures: int = 0
+    evictions: int = 0
+
+
+def method_totals(call_targets: dict[CallTargetKey, CallTarget]) -> dict[MethodKey, MethodTotals]:
+    totals: dict[MethodKey, MethodTotals] = {}
+    for ct in call_targets.values():
+        method = totals.setdefault((ct.name, ct.source), MethodTotals())
+        method.call_targets += 1
+        method.compilations += ct.summary.count(LogEventType.Done)
+        method.comp_time += ct.summary.comp_time
+        method.code_size += ct.summary.code_size
+        method.failures += ct.summary.count(LogEventType.Failed)
+        method.evictions += ct.summary.count(LogEventType.CacheFlushing)
+    return totals
+
+
+def run_metrics(call_targets: dict[CallTargetKey, CallTarget], truffle_events: EventStore) -> dict[str, float]:
+    # Metrics of one run by label, in the order they are reported
+    def total(event_type: LogEventType) -> int:
+        return sum(ct.summary.count(event_type) for ct in call_targets.values())
+
+    metrics = {
+        "Call targets": len(call_targets),
+        "Compilations": total(LogEventType.Done),
+        "Failures": total(LogEventType.Failed),
+        "Evictions": total(LogEventType.CacheFlushing),
+        "Invalidations": total(LogEventType.Invalidation),
+        "Deoptimizations": total(LogEventType.Deoptimization),
+        "Compile time (Sec)": sum(ct.summary.comp_time for ct in call_targets.values()) / 1000,
+        "Produced code (MB)": sum(ct.summary.code_size for ct in call_targets.values()) / 1024 / 1024,
+    }
+
+    dones = truffle_events.log_event_type == LogEventType.Done.value
+    tiers = truffle_events.tier[dones]
+    comp_times = truffle_events.comp_time[dones]
+    code_sizes = truffle_events.code_size_in_bytes[dones]
+    for tier in TIERS:
+        tier_comp_times = Distribution(comp_times[tiers == tier])
+        tier_code_sizes = Distribution(code_sizes[tiers == tier])
+        empty = len(tier_comp_times) == 0
+        metrics[f"Tier {tier} compilations"] = len(tier_comp_times)
+        metrics[f"  Tier {tier} avg Comp Entry (ms)"] = np.nan if empty else tier_comp_times.average()
+        for perc in PERCENTILES:
+            metrics[f"  Tier {tier} p{perc} Comp Entry (ms)"] = np.nan if empty else tier_comp_times.percentile(perc)
+        metrics[f"  Tier {tier} produced code (MB)"] = tier_code_sizes.sum() / 1024 / 1024
+        metrics[f"  Tier {tier} avg Cache Entry (KB)"] = np.nan if empty else tier_code_sizes.average() / 1024
+        metrics[f"  Tier {tier} p99 Cache Entry (KB)"] = np.nan if empty else tier_code_sizes.percentile(99) / 1024
+    return metrics
+
+
+# Comparison of two runs of the same workload (e.g., before and after a GraalVM upgrade): the metrics of both runs
+# and the call targets, matched by name and source, whose compile cost changed
+class LogDiff:
+    def __init__(self, base_call_targets: dict[CallTargetKey, CallTarget], base_truffle_events: EventStore,
+                 candidate_call_targets: dict[CallTargetKey, CallTarget], candidate_truffle_events: EventStore):
+        self.base_metrics = run_metrics(base_call_targets, base_truffle_events)
+        self.candidate_metrics = run_metrics(candidate_call_targets, candidate_truffle_events)
+        self.base_methods = method_totals(base_call_targets)
+        self.candidate_methods = method_totals(candidate_call_targets)
+
+    def metrics(self) -> list[tuple[str, float, float]]:
+        return [(label, value, self.candidate_metrics[label]) for label, value in self.base_metrics.items()]
+
+    def matched(self) -> int:
+        return len(self.base_methods.keys() & self.candidate_methods.keys())
+
+    def only_in_base(self) -> int:
+        return len(self.base_methods.keys() - self.candidate_methods.keys())
+
+    def only_in_candidate(self) -> int:
+        return len(self.candidate_methods.keys() - self.base_methods.keys())
+
+    def regressions(self) -> list[tuple[MethodKey, MethodTotals, MethodTotals]]:
+        # Methods whose compile time grew, most first. Methods missing from a run count with zero totals.
+        changes = []
+        for method in self.base_methods.keys() | self.candidate_methods.keys():
+            base = self.base_methods.get(method, MethodTotals())
+            candidate = self.candidate_methods.get(method, MethodTotals())
+            if candidate.comp_time > base.comp_time:
+                changes.append((method, base, candidate))
+        changes.sort(key=lambda change: (change[1].comp_time - change[2].comp_time, str(change[0])))
+        return changes
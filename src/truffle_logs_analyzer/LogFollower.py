@@ -0,0 +1,82 @@
+import io
+import os
+from typing import BinaryIO, Optional
+
+# Upper bound on the bytes read per call, so a burst of log lines doesn't have to fit in memory at once
+READ_SIZE = 16 * 1024 * 1024
+
+
+# Reads the lines appended to a log file, like 'tail -F'. The file is reopened when it's replaced (e.g., rotated) and
+# read from the start again when it's truncated. A line is only returned once its newline has been written.
+class LogFollower:
+    def __init__(self, path: str, from_start: bool = False):
+        self.path = path
+        self.from_start = from_start
+        self._file: Optional[BinaryIO] = None
+        self._inode: Optional[int] = None
+        self._partial = b''
+        # Whether the file didn't exist yet when following started
+        self._missing = False
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read_lines(self) -> list[str]:
+        if self._file is None:
+            # A log that only appears after following started is read from its beginning, like 'tail -F' does
+            if not self._open(at_end=not self.from_start and not self._missing):
+                self._missing = True
+                return []
+
+        data = self._read_available()
+        lines = self._complete_lines(data)
+        if len(data) < READ_SIZE and self._replaced():
+            # Drain what was written to the old file before it was replaced, then continue with the new one. Its
+            # last line won't get a newline anymore.
+            rest = self._file.read()
+            if (self._partial or rest) and not rest.endswith(b'\n'):
+                rest += b'\n'
+            lines.extend(self._complete_lines(rest))
+            self.close()
+            self._partial = b''
+            if self._open(at_end=False):
+                lines.extend(self._complete_lines(self._read_available()))
+
+        return lines
+
+    def _open(self, at_end: bool) -> bool:
+        try:
+            self._file = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        if at_end:
+            self._file.seek(0, os.SEEK_END)
+        return True
+
+    def _replaced(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return False
+
+    def _read_available(self) -> bytes:
+        if self._file is None:
+            return b''
+
+        if os.fstat(self._file.fileno()).st_size < self._file.tell():
+            # Truncated (e.g., copytruncate rotation): start over from the beginning
+            self._file.seek(0)
+            self._partial = b''
+
+        return self._file.read(READ_SIZE)
+
+    def _complete_lines(self, data: bytes) -> list[str]:
+        data = self._partial + data
+        end = data.rfind(b'\n') + 1
+        self._partial = data[end:]
+        # Decode through TextIOWrapper so that line splitting matches open(path, 'r')
+        return list(io.TextIOWrapper(io.BytesIO(data[:end])))
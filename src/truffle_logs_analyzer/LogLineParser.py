@@ -0,0 +1,168 @@
+import io
+import locale
+import mmap
+import time
+from typing import Callable, Iterable, Optional
+
+from .EventStore import EventStore
+from .EventStoreBuilder import EventStoreBuilder
+from .ParseHotspotLogEntry import ParseHotspotLogEntry
+from .ParseProfile import ParseProfile
+from .ParseTruffleEngineOptLogEntry import ParseTruffleEngineOptLogEntry
+from .TruffleEngineOptLogEntry import TruffleEngineOptLogEntry
+from .TruffleEngineOptLogTokenizer import TruffleEngineOptLogTokenizer
+
+PARSERS = ('fast', 'legacy')
+
+# Byte ranges are decoded in blocks of about this size, extended to the end of the line they stop in
+BLOCK_SIZE = 16 * 1024 * 1024
+
+# Every line the parsers use contains one of these. Lines without them are skipped without being decoded.
+TRUFFLE_MARKER = b"[engine] opt"
+HOTSPOT_MARKER = b"*flushing "
+
+
+def candidate_lines(buffer, start: int, end: int):
+    # Yields the lines of buffer[start:end] that contain a marker, with their line terminator. 'start' must be at the
+    # beginning of a line. Works on anything with bytes-like find/rfind, e.g., bytes or mmap.
+    next_truffle = buffer.find(TRUFFLE_MARKER, start, end)
+    next_hotspot = buffer.find(HOTSPOT_MARKER, start, end)
+    while next_truffle >= 0 or next_hotspot >= 0:
+        marker = next_truffle if next_hotspot < 0 or 0 <= next_truffle < next_hotspot else next_hotspot
+        line_start = buffer.rfind(b'\n', start, marker) + 1 or start
+        line_end = buffer.find(b'\n', marker, end) + 1 or end
+        yield buffer[line_start:line_end]
+
+        if 0 <= next_truffle < line_end:
+            next_truffle = buffer.find(TRUFFLE_MARKER, line_end, end)
+        if 0 <= next_hotspot < line_end:
+            next_hotspot = buffer.find(HOTSPOT_MARKER, line_end, end)
+
+
+def count_lines(buffer, start: int, end: int) -> int:
+    return sum(buffer[offset:min(offset + BLOCK_SIZE, end)].count(b'\n') for offset in range(start, end, BLOCK_SIZE))
+
+
+class LogLineParser:
+    def __init__(self, trace: bool = False, log: Callable[[str], None] = print, parser: str = 'fast',
+                 profile: Optional[ParseProfile] = None, keep_raw: bool = False):
+        self.trace = trace
+        self.log = log
+        self.profile = profile
+        # Whether entries keep their raw line; the event store doesn't need it
+        self.keep_raw = keep_raw
+        if parser == 'fast':
+            tokenizer = TruffleEngineOptLogTokenizer(keep_raw)
+            if profile is not None:
+                tokenizer.parse_timestamp = self.timed_timestamps(tokenizer.parse_timestamp)
+            self.parse_truffle_entry = tokenizer.parse
+        elif parser == 'legacy':
+            self.parse_truffle_entry = self.parse_truffle_entry_legacy
+        else:
+            raise ValueError(f"Unknown parser '{parser}'")
+        self.hotspot_events = EventStoreBuilder()
+        self.truffle_events = EventStoreBuilder()
+        # Same encoding as open(path, 'r')
+        self.encoding = locale.getpreferredencoding(False)
+        if profile is not None:
+            self.parse = self.parse_profiled
+
+    def parse(self, line: str) -> None:
+        stripped = line.rstrip()
+        if stripped.startswith("[engine] opt"):
+            entry = self.parse_truffle_entry(stripped)
+            if entry is not None:
+                self.truffle_events.append(entry)
+            elif self.trace:
+                self.log(f"Ignoring engine log entry: {stripped}")
+        elif stripped.find("*flushing ") >= 0:
+            entry = ParseHotspotLogEntry(stripped, self.keep_raw).entry()
+            if entry is not None:
+                self.hotspot_events.append(entry)
+            elif self.trace:
+                self.log(f"Ignoring codecache log entry: {stripped}")
+        elif self.trace:
+            self.log(f"Ignoring log entry: {stripped}")
+
+    def parse_profiled(self, line: str) -> None:
+        # Times every line and attributes it to the handler of its kind
+        if line.startswith("[engine] opt"):
+            handler = (line[len("[engine] opt"):].split(None, 1) or ["?"])[0]
+        elif line.find("*flushing ") >= 0:
+            handler = "flushing"
+        else:
+            handler = "other"
+        events = len(self.hotspot_events) + len(self.truffle_events)
+        start = time.perf_counter()
+        LogLineParser.parse(self, line)
+        seconds = time.perf_counter() - start
+        self.profile.record(handler, seconds, len(self.hotspot_events) + len(self.truffle_events) > events)
+
+    def timed_timestamps(self, parse_timestamp: Callable[[str], int]) -> Callable[[str], int]:
+        def timed(s: str) -> int:
+            start = time.perf_counter()
+            timestamp = parse_timestamp(s)
+            self.profile.timestamp_seconds += time.perf_counter() - start
+            return timestamp
+        return timed
+
+    def count_scanned(self, buffer, start: int, end: int) -> None:
+        if self.profile is not None:
+            self.profile.bytes += end - start
+            self.profile.lines += count_lines(buffer, start, end)
+
+    def parse_byte_range(self, path: str, start: int, end: int) -> None:
+        # 'start' must be at the beginning of a line. Tracing reports every ignored line, so it needs all of them.
+        if self.trace:
+            self.parse_all_lines(path, start, end)
+            return
+        if end <= start:
+            return
+
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            self.count_scanned(buffer, start, min(end, len(buffer)))
+            for line in candidate_lines(buffer, start, min(end, len(buffer))):
+                self.parse(line.decode(self.encoding))
+
+    def parse_all_lines(self, path: str, start: int, end: int) -> None:
+        # Every block is decoded through TextIOWrapper so that line splitting matches open(path, 'r') exactly
+        with open(path, 'rb') as file:
+            file.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                block = file.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                if len(block) < remaining and not block.endswith(b'\n'):
+                    block += file.readline(remaining - len(block))
+                remaining -= len(block)
+                self.count_scanned(block, 0, len(block))
+
+                for line in io.TextIOWrapper(io.BytesIO(block)):
+                    self.parse(line)
+
+    def parse_blocks(self, blocks: Iterable[bytes]) -> None:
+        # Blocks can end anywhere; the incomplete last line of each one is carried over to the next
+        partial = b''
+        for block in blocks:
+            block = partial + block
+            end = block.rfind(b'\n') + 1
+            partial = block[end:]
+            self.parse_block(block, end)
+        if partial:
+            self.parse_block(partial, len(partial))
+
+    def parse_block(self, block: bytes, end: int) -> None:
+        self.count_scanned(block, 0, end)
+        if self.trace:
+            for line in io.TextIOWrapper(io.BytesIO(block[:end])):
+                self.parse(line)
+        else:
+            for line in candidate_lines(block, 0, end):
+                self.parse(line.decode(self.encoding))
+
+    def parse_truffle_entry_legacy(self, log_line: str) -> Optional[TruffleEngineOptLogEntry]:
+        return ParseTruffleEngineOptLogEntry(log_line, self.keep_raw).entry()
+
+    def result(self) -> tuple[EventStore, EventStore]:
+        return self.hotspot_events.build(), self.truffle_events.build()
@@ -0,0 +1,73 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from .EventStore import EventStore
+from .LogLineParser import LogLineParser
+from .ParseProfile import ParseProfile
+
+# Chunks smaller than this aren't worth the overhead of shipping them to a worker process
+MIN_CHUNK_SIZE = 1024 * 1024
+CHUNKS_PER_JOB = 4
+
+
+def parse_byte_range(path: str, start: int, end: int, trace: bool, parser: str,
+                     profile: bool) -> tuple[EventStore, EventStore, list[str], Optional[ParseProfile]]:
+    messages: list[str] = []
+    parse_profile = ParseProfile() if profile else None
+    line_parser = LogLineParser(trace, messages.append, parser, parse_profile)
+    line_parser.parse_byte_range(path, start, end)
+
+    hotspot_events, truffle_events = line_parser.result()
+    return hotspot_events, truffle_events, messages, parse_profile
+
+
+class ParallelLogParser:
+    def __init__(self, path: str, jobs: int, trace: bool = False, parser: str = 'fast'):
+        self.path = path
+        self.jobs = jobs
+        self.trace = trace
+        self.parser = parser
+
+    def byte_ranges(self, start: int, end: int) -> list[tuple[int, int]]:
+        size = end - start
+        num_chunks = max(1, min(self.jobs * CHUNKS_PER_JOB, size // MIN_CHUNK_SIZE))
+        chunk_size = size // num_chunks
+
+        # Move every tentative boundary to just after the next newline so no line is split between two ranges
+        boundaries = [start]
+        with open(self.path, 'rb') as file:
+            for i in range(1, num_chunks):
+                offset = max(start + i * chunk_size, boundaries[-1])
+                file.seek(offset)
+                file.readline()
+                boundary = file.tell()
+                if boundary >= end:
+                    break
+                if boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+        boundaries.append(end)
+
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+    def parse(self, start: int, end: int, profile: Optional[ParseProfile] = None) -> tuple[EventStore, EventStore]:
+        ranges = self.byte_ranges(start, end)
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            # map() yields the results in submission order, i.e., in file order
+            results = list(executor.map(parse_byte_range,
+                                        [self.path] * len(ranges),
+                                        [start for start, _ in ranges],
+                                        [end for _, end in ranges],
+                                        [self.trace] * len(ranges),
+                                        [self.parser] * len(ranges),
+                                        [profile is not None] * len(ranges)))
+
+        for _, _, messages, range_profile in results:
+            for message in messages:
+                print(message)
+            if profile is not None:
+                range_profile.worker_processes = True
+                profile.merge(range_profile)
+
+        hotspot_events = EventStore.concat([hotspot for hotspot, _, _, _ in results])
+        truffle_events = EventStore.concat([truffle for _, truffle, _, _ in results])
+        return hotspot_events, truffle_events
@@ -0,0 +1,36 @@
+from dataclasses import dataclass, field
+
+
+# Counters collected while parsing with --profile. Lines are attributed to a handler: the opt kind of '[engine] opt'
+# lines ('queued', 'done', ...), 'flushing' for HotSpot code cache lines and 'other' for the rest. Profiles of byte
+# ranges and files parsed by different worker processes are merged into one.
+@dataclass
+class ParseProfile:
+    bytes: int = 0
+    lines: int = 0
+    handled: dict[str, int] = field(default_factory=dict)
+    rejected: dict[str, int] = field(default_factory=dict)
+    seconds: dict[str, float] = field(default_factory=dict)
+    # Part of the handlers' time spent decoding timestamps (fast parser only)
+    timestamp_seconds: float = 0.0
+    # Whether any of it was parsed by worker processes
+    worker_processes: bool = False
+
+    def record(self, handler: str, seconds: float, accepted: bool) -> None:
+        self.handled[handler] = self.handled.get(handler, 0) + 1
+        self.seconds[handler] = self.seconds.get(handler, 0.0) + seconds
+        if not accepted:
+            self.rejected[handler] = self.rejected.get(handler, 0) + 1
+
+    def merge(self, other: 'ParseProfile') -> None:
+        self.bytes += other.bytes
+        self.lines += other.lines
+        self.timestamp_seconds += other.timestamp_seconds
+        self.worker_processes |= other.worker_processes
+        for counters, other_counters in ((self.handled, other.handled), (self.rejected, other.rejected),
+                                         (self.seconds, other.seconds)):
+            for handler, value in other_counters.items():
+                counters[handler] = counters.get(handler, 0) + value
+
+    def events(self) -> int:
+        return sum(self.handled.values()) - sum(self.rejected.values())
@@ -1,8 +1,8 @@
 import re
-from datetime import datetime, timezone
 from typing import Optional
 
 from .LogEventType import LogEventType
+from .TimestampDecoder import TimestampDecoder
 from .TruffleEngineOptLogEntry import TruffleEngineOptLogEntry
 
 OPT_REGEX = re.compile(r'^\[engine] opt ([\w.]+)\s+engine=(\d+)\s+id=(\d+)(.*)')
@@ -20,9 +20,13 @@ CODE_SIZE_REGEX = re.compile(r'^CodeSize\s+(\d+)')
 ADDRESS_REGEX = re.compile(r'^Addr\s+(.*)')
 COMP_ID_REGEX = re.compile(r'CompId\s+(\d+)')
 
+# Shared by all instances, since an instance only parses a single line
+TIMESTAMPS = TimestampDecoder()
+
 
 class ParseTruffleEngineOptLogEntry:
-    def __init__(self, log_line: str):
+    def __init__(self, log_line: str, keep_raw: bool = False):
+        self.keep_raw = keep_raw
         self._entry = self.parse(log_line)
 
     def entry(self) -> Optional[TruffleEngineOptLogEntry]:
@@ -78,18 +82,16 @@ class ParseTruffleEngineOptLogEntry:
 
         raise ValueError(f"Failed to match {identifier} in '{s}'")
 
-    def parse_timestamp(self, s: str) -> datetime:
-        # truffle engine logs don't include the timezone offset, so this adds it
-        timestamp_z = self.match(s, TIMESTAMP_REGEX, 1, 'Timestamp')[0] + "+00:00"
-        return datetime.fromisoformat(timestamp_z).astimezone(timezone.utc)
+    def parse_timestamp(self, s: str) -> int:
+        return TIMESTAMPS.truffle(self.match(s, TIMESTAMP_REGEX, 1, 'Timestamp')[0])
 
     def queued(self, log_line: str, segments: list[str]) -> TruffleEngineOptLogEntry:
         identifiers = self.match(segments[0], OPT_REGEX, 4, "Operation")
         comp_thresholds = self.match(segments[2], THRESHOLDS_REGEX, 2, 'CompThresholds')
         queue_stats = self.match(segments[3], QUEUE_STATS_REGEX, 4, 'QueueStats')
 
-        return TruffleEngineOptLogEntry(
-            _raw=log_line,
+        return TruffleEngineOptLogEntry.create(
+            _raw=log_line if self.keep_raw else None,
             log_event_type=LogEventType.Enqueued,
             engine_id=int(identifiers[1]),
             id=int(identifiers[2]),
@@ -120,8 +122,8 @@ class ParseTruffleEngineOptLogEntry:
         identifiers = self.match(segments[0], OPT_REGEX, 4, "Operation")
         queue_stats = self.match(segments[4], QUEUE_STATS_REGEX, 4, 'QueueStats')
 
-        return TruffleEngineOptLogEntry(
-            _raw=log_line,
+        return TruffleEngineOptLogEntry.create(
+            _raw=log_line if self.keep_raw else None,
             log_event_type=LogEventType.Start,
             engine_id=int(identifiers[1]),
             id=int(identifiers[2]),
@@ -153,8 +155,8 @@ class ParseTruffleEngineOptLogEntry:
         inlines = self.match(segments[4], INLINE_REGEX, 1, 'Inlines')
         irs = self.match(segments[5], IR_REGEX, 1, 'IR')
 
-        return TruffleEngineOptLogEntry(
-            _raw=log_line,
+        return TruffleEngineOptLogEntry.create(
+            _raw=log_line if self.keep_raw else None,
             log_event_type=LogEventType.Done,
             engine_id=int(identifiers[1]),
             id=int(identifiers[2]),
@@ -182,8 +184,8 @@ class ParseTruffleEngineOptLogEntry:
 
     def deopt(self, log_line: str, segments: list[str]) -> TruffleEngineOptLogEntry:
         identifiers = self.match(segments[0], OPT_REGEX, 4, "Operation")
-        return TruffleEngineOptLogEntry(
-            _raw=log_line,
+        return TruffleEngineOptLogEntry.create(
+            _raw=log_line if self.keep_raw else None,
             log_event_type=LogEventType.Deoptimization,
             engine_id=int(identifiers[1]),
             id=int(identifiers[2]),
@@ -212,8 +214,8 @@ class ParseTruffleEngineOptLogEntry:
 
     def inval(self, log_line: str, segments: list[str]) -> TruffleEngineOptLogEntry:
         identifiers = self.match(segments[0], OPT_REGEX, 4, "Operation")
-        return TruffleEngineOptLogEntry(
-            _raw=log_line,
+        return TruffleEngineOptLogEntry.create(
+            _raw=log_line if self.keep_raw else None,
             log_event_type=LogEventType.Invalidation,
             engine_id=int(identifiers[1]),
             id=int(identifiers[2]),
@@ -242,8 +244,8 @@ class ParseTruffleEngineOptLogEntry:
 
     def flushed(self, log_line: str, segments: list[str]) -> TruffleEngineOptLogEntry:
         identifiers = self.match(segments[0], OPT_REGEX, 4, "Operation")
-        return TruffleEngineOptLogEntry(
-            _raw=log_line,
+        return TruffleEngineOptLogEntry.create(
+            _raw=log_line if self.keep_raw else None,
             log_event_type=LogEventType.Flushed,
             engine_id=int(identifiers[1]),
             id=int(identifiers[2]),
@@ -272,8 +274,8 @@ class ParseTruffleEngineOptLogEntry:
 
     def disabled(self, log_line: str, segments: list[str]) -> TruffleEngineOptLogEntry:
         identifiers = self.match(segments[0], OPT_REGEX, 4, "Operation")
-        return TruffleEngineOptLogEntry(
-            _raw=log_line,
+        return TruffleEngineOptLogEntry.create(
+            _raw=log_line if self.keep_raw else None,
             log_event_type=LogEventType.Disabled,
             engine_id=int(identifiers[1]),
             id=int(identifiers[2]),
@@ -302,8 +304,8 @@ class ParseTruffleEngineOptLogEntry:
 
     def enabled(self, log_line: str, segments: list[str]) -> TruffleEngineOptLogEntry:
         identifiers = self.match(segments[0], OPT_REGEX, 4, "Operation")
-        return TruffleEngineOptLogEntry(
-            _raw=log_line,
+        return TruffleEngineOptLogEntry.create(
+            _raw=log_line if self.keep_raw else None,
             log_event_type=LogEventType.Enabled,
             engine_id=int(identifiers[1]),
             id=int(identifiers[2]),
@@ -335,8 +337,8 @@ class ParseTruffleEngineOptLogEntry:
         comp_thresholds = self.match(segments[2], THRESHOLDS_REGEX, 2, 'CompThresholds')
         queue_stats = self.match(segments[3], QUEUE_STATS_REGEX, 4, 'QueueStats')
 
-        return TruffleEngineOptLogEntry(
-            _raw=log_line,
+        return TruffleEngineOptLogEntry.create(
+            _raw=log_line if self.keep_raw else None,
             log_event_type=LogEventType.Dequeued,
             engine_id=int(identifiers[1]),
             id=int(identifiers[2]),
@@ -364,8 +366,8 @@ class ParseTruffleEngineOptLogEntry:
 
     def failed(self, log_line: str, segments: list[str]) -> TruffleEngineOptLogEntry:
         identifiers = self.match(segments[0], OPT_REGEX, 4, "Operation")
-        return TruffleEngineOptLogEntry(
-            _raw=log_line,
+        return TruffleEngineOptLogEntry.create(
+            _raw=log_line if self.keep_raw else None,
             log_event_type=LogEventType.Failed,
             engine_id=int(identifiers[1]),
             id=int(identifiers[2]),
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .EventStore import EventStore
+
+# Bump whenever the parsers or the EventStore layout change in a way that makes older snapshots wrong
+CACHE_VERSION = 5
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+SNAPSHOT_SUFFIX = ".npz"
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "truffle-logs-analyzer")
+
+
+def complete_lines_end(path: str, size: int) -> int:
+    # Offset just after the last newline of the file, i.e., where a line that is still being written would start
+    with open(path, 'rb') as file:
+        end = size
+        while end > 0:
+            start = max(0, end - FINGERPRINT_BLOCK_SIZE)
+            file.seek(start)
+            newline = file.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+@dataclass
+class Snapshot:
+    hotspot_events: EventStore
+    truffle_events: EventStore
+    # Number of bytes of the log file that the events were parsed from. Always at the end of a line.
+    offset: int
+
+
+# Keeps binary snapshots of parsed log files so that later runs on the same file don't need to parse it again. Each
+# log file has one snapshot, named after its absolute path, which records the file identity (device and inode), how
+# many bytes of it were parsed, a fingerprint of the head and of the last block of those bytes, and the size and
+# modification time of the file when the snapshot was taken.
+#
+# A snapshot is still valid for a file that has only been appended to since: the events of the appended bytes can be
+# parsed and added to it. If the file shrank, was replaced (e.g., rotated) or rewritten, the fingerprint or identity no
+# longer match and the snapshot is ignored. A file rewritten in place at the same size is only caught by the
+# fingerprint if the change is in one of the hashed blocks, so a snapshot of a file that kept its size but was
+# modified since is ignored as well. The directory is kept under 'max_bytes' by evicting the least recently
+# used snapshots.
+class ParsedLogCache:
+    def __init__(self, cache_dir: str, max_bytes: int, verbose: bool = False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.verbose = verbose
+
+    def snapshot_path(self, path: str) -> str:
+        name = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + SNAPSHOT_SUFFIX)
+
+    @staticmethod
+    def fingerprint(path: str, offset: int) -> str:
+        # Hashing the head and the last block before 'offset' catches rewrites and truncate-then-regrow
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            digest.update(file.read(min(offset, FINGERPRINT_BLOCK_SIZE)))
+            if offset > FINGERPRINT_BLOCK_SIZE:
+                file.seek(max(FINGERPRINT_BLOCK_SIZE, offset - FINGERPRINT_BLOCK_SIZE))
+                digest.update(file.read(offset - file.tell()))
+        return digest.hexdigest()
+
+    def key(self, path: str, offset: int) -> np.ndarray:
+        stat = os.stat(path)
+        key = f"{CACHE_VERSION}|{os.path.abspath(path)}|{stat.st_dev}|{stat.st_ino}|{offset}|{self.fingerprint(path, offset)}"
+        return np.array(key)
+
+    def load(self, path: str) -> Optional[Snapshot]:
+        snapshot = self.snapshot_path(path)
+        if not os.path.exists(snapshot):
+            return None
+
+        try:
+            with np.load(snapshot) as arrays:
+                offset = int(arrays['offset'])
+                stat = os.stat(path)
+                rewritten = stat.st_size == int(arrays['size']) and stat.st_mtime_ns != int(arrays['mtime_ns'])
+                if offset > stat.st_size or rewritten or arrays['key'] != self.key(path, offset):
+                    if self.verbose:
+                        print(f"Ignoring outdated cache snapshot {snapshot}")
+                    return None
+                hotspot_events = EventStore.from_arrays(arrays, 'hotspot_')
+                truffle_events = EventStore.from_arrays(arrays, 'truffle_')
+        except (OSError, ValueError, KeyError) as e:
+            if self.verbose:
+                print(f"Ignoring unreadable cache snapshot {snapshot}: {e}")
+            return None
+
+        # The modification time doubles as the "last used" time for the LRU eviction
+        os.utime(snapshot)
+        return Snapshot(hotspot_events, truffle_events, offset)
+
+    def store(self, path: str, snapshot: Snapshot) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        stat = os.stat(path)
+        arrays = {'key': self.key(path, snapshot.offset), 'offset': np.array(snapshot.offset),
+                  'size': np.array(stat.st_size), 'mtime_ns': np.array(stat.st_mtime_ns)}
+        arrays.update(snapshot.hotspot_events.to_arrays('hotspot_'))
+        arrays.update(snapshot.truffle_events.to_arrays('truffle_'))
+
+        # Write to a temporary file first so concurrent runs never see a partially written snapshot
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                np.savez(file, **arrays)
+            os.replace(tmp_path, self.snapshot_path(path))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self.evict()
+
+    def evict(self) -> None:
+        snapshots = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(SNAPSHOT_SUFFIX):
+                stat = entry.stat()
+                snapshots.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in snapshots)
+        for _, size, snapshot in sorted(snapshots):
+            if total <= self.max_bytes:
+                break
+            if self.verbose:
+                print(f"Evicting cache snapshot {snapshot}")
+            try:
+                os.unlink(snapshot)
+            except FileNotFoundError:
+                pass
+            total -= size
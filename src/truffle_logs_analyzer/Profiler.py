@@ -0,0 +1,67 @@
+import contextlib
+import resource
+import sys
+import time
+from typing import Iterator, Optional
+
+from .ParseProfile import ParseProfile
+
+
+def cpu_seconds() -> float:
+    # CPU time of this process and of its finished worker processes (e.g., the parsing pool)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return resource.getrusage(who).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def profile_stage(profiler: Optional['Profiler'], name: str):
+    return profiler.stage(name) if profiler is not None else contextlib.nullcontext()
+
+
+# Wall and CPU time of the stages of a run with --profile, in the order they first ran, plus the counters of parsing
+class Profiler:
+    def __init__(self):
+        self.stages: dict[str, tuple[float, float]] = {}
+        self.parsing = ParseProfile()
+        # Whether worker processes ran outside of parsing (e.g., analyzing engines)
+        self.worker_processes = False
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), cpu_seconds()
+        try:
+            yield
+        finally:
+            total_wall, total_cpu = self.stages.get(name, (0.0, 0.0))
+            self.stages[name] = (total_wall + time.perf_counter() - wall, total_cpu + cpu_seconds() - cpu)
+
+    def print_report(self) -> None:
+        print("{stage:<40} | {wall:>10} | {cpu:>10}".format(stage = "Stage", wall = "Wall (s)", cpu = "CPU (s)"))
+        for name, (wall, cpu) in self.stages.items():
+            print(f"{name:<40} | {wall:>10.3f} | {cpu:>10.3f}")
+
+        parsing = self.parsing
+        print("Peak memory (MB)..........................................: {value:.1f}".format(value = peak_rss_mb(resource.RUSAGE_SELF)))
+        # Only worker processes that ran count; without any (--jobs 1, or a cache hit) there's nothing to report
+        if self.worker_processes or parsing.worker_processes:
+            print("Peak memory of worker processes (MB)......................: {value:.1f}".format(value = peak_rss_mb(resource.RUSAGE_CHILDREN)))
+        if parsing.lines == 0:
+            print("No lines were parsed (events came from the parsed log cache; use --no_cache to profile parsing)")
+            return
+
+        parse_wall = self.stages.get('parse', (0.0, 0.0))[0] or float('nan')
+        print("Bytes parsed..............................................: {value} ({rate:.1f} MB/s)".format(value = parsing.bytes, rate = parsing.bytes / (1024 * 1024) / parse_wall))
+        print("Lines.....................................................: {value} ({rate:,.0f} lines/s)".format(value = parsing.lines, rate = parsing.lines / parse_wall))
+        print("Events....................................................: {value} ({rate:,.0f} events/s)".format(value = parsing.events(), rate = parsing.events() / parse_wall))
+        print("Lines handed to the parsers...............................: {value}".format(value = sum(parsing.handled.values())))
+        print("Rejected lines............................................: {value}".format(value = sum(parsing.rejected.values())))
+        print("Timestamp decoding (s)....................................: {value:.3f}".format(value = parsing.timestamp_seconds))
+
+        print("{handler:<20} | {lines:>10} | {rejected:>10} | {seconds:>10} | {per_line:>10}".format(handler = "Handler", lines = "Lines", rejected = "Rejected", seconds = "Time (s)", per_line = "us/line"))
+        for handler, lines in sorted(parsing.handled.items(), key=lambda item: -parsing.seconds[item[0]]):
+            seconds = parsing.seconds[handler]
+            print(f"{handler:<20} | {lines:>10} | {parsing.rejected.get(handler, 0):>10} | {seconds:>10.3f} | {seconds / lines * 1e6:>10.2f}")
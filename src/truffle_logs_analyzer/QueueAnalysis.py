@@ -0,0 +1,89 @@
+from typing import Optional
+
+import numpy as np
+
+from .EventStore import EventStore
+from .LogEventType import LogEventType
+from .StringTable import MISSING
+
+# Events that make up the life of a compilation task, in the sequence of its call target and tier
+TASK_EVENTS = (LogEventType.Enqueued, LogEventType.Dequeued, LogEventType.Start, LogEventType.Done, LogEventType.Failed)
+
+
+def pair_with_previous(keys: np.ndarray, order: np.ndarray, firsts: np.ndarray, seconds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # 'order' sorts the events by key and then time. Every 'second' event that directly follows 'first' events of the
+    # same key is paired with the earliest of those. Returns the indices of the paired first and second events.
+    if len(order) == 0:
+        return order, order
+    keys, firsts, seconds = keys[order], firsts[order], seconds[order]
+    same_key = np.concatenate(([False], keys[1:] == keys[:-1]))
+    after_first = np.concatenate(([False], firsts[:-1])) & same_key
+
+    positions = np.arange(len(order))
+    run_starts = np.maximum.accumulate(np.where(firsts & ~after_first, positions, -1))
+    paired = np.flatnonzero(seconds & after_first)
+    return order[run_starts[paired - 1]], order[paired]
+
+
+# Compile queue behaviour: how long tasks waited in the queue (enqueue -> start of the same call target and tier),
+# which compilations ran when (start -> done/failed) and how deep and loaded the queue was according to the queue
+# statistics of the 'queued', 'start' and 'unque.' lines.
+class QueueAnalysis:
+    def __init__(self, truffle_events: EventStore):
+        types = truffle_events.log_event_type
+        tasks = np.flatnonzero(np.isin(types, [event_type.value for event_type in TASK_EVENTS]) &
+                               (truffle_events.tier != MISSING))
+        types = types[tasks]
+        timestamps = truffle_events.timestamp[tasks]
+
+        # Dense ids of the (process, engine, call target, tier) sequences, ordered by sequence and then time (log order
+        # on ties)
+        sequences = np.stack((truffle_events.process[tasks].astype(np.int64),
+                              truffle_events.engine_id[tasks].astype(np.int64), truffle_events.id[tasks],
+                              truffle_events.tier[tasks].astype(np.int64)))
+        keys = np.unique(sequences, axis=1, return_inverse=True)[1].reshape(-1)
+        order = np.lexsort((np.arange(len(tasks)), timestamps, keys))
+
+        enqueues, starts = pair_with_previous(keys, order, types == LogEventType.Enqueued.value,
+                                              types == LogEventType.Start.value)
+        self.wait_timestamps = timestamps[starts]
+        self.wait_tiers = truffle_events.tier[tasks[starts]]
+        self.waits = timestamps[starts] - timestamps[enqueues]
+
+        ends = (types == LogEventType.Done.value) | (types == LogEventType.Failed.value)
+        compilation_starts, compilation_ends = pair_with_previous(keys, order, types == LogEventType.Start.value, ends)
+        self.compilation_starts = timestamps[compilation_starts]
+        self.compilation_ends = timestamps[compilation_ends]
+
+        sampled = np.flatnonzero(truffle_events.queue_size != MISSING)
+        self.sample_timestamps = truffle_events.timestamp[sampled]
+        self.queue_sizes = truffle_events.queue_size[sampled]
+        self.queue_loads = truffle_events.queue_load[sampled]
+
+        self.enqueue_timestamps = truffle_events.timestamp[truffle_events.log_event_type == LogEventType.Enqueued.value]
+        self.start_timestamps = truffle_events.timestamp[truffle_events.log_event_type == LogEventType.Start.value]
+
+        # Number of compilations running after every start/end; ends go first on equal timestamps
+        times = np.concatenate((self.compilation_starts, self.compilation_ends))
+        deltas = np.concatenate((np.ones(len(self.compilation_starts), dtype=np.int64),
+                                 -np.ones(len(self.compilation_ends), dtype=np.int64)))
+        steps = np.lexsort((deltas, times))
+        self.step_times = times[steps]
+        self.running = np.cumsum(deltas[steps])
+
+    def max_running(self) -> int:
+        return int(self.running.max()) if len(self.running) > 0 else 0
+
+    def busy_time(self, boundaries: np.ndarray) -> np.ndarray:
+        # Compilation time (running compilations integrated over time, in ns) between consecutive boundaries
+        if len(self.step_times) == 0:
+            return np.zeros(len(boundaries) - 1)
+        integral = np.concatenate(([0], np.cumsum(self.running[:-1] * np.diff(self.step_times))))
+        steps = np.searchsorted(self.step_times, boundaries, side='right') - 1
+        before = steps < 0
+        steps = np.maximum(steps, 0)
+        at_boundaries = np.where(before, 0, integral[steps] + self.running[steps] * (boundaries - self.step_times[steps]))
+        return np.diff(at_boundaries)
+
+    def waits_of_tier(self, tier: Optional[int] = None) -> np.ndarray:
+        return self.waits if tier is None else self.waits[self.wait_tiers == tier]
@@ -8,4 +8,9 @@ class ReplCommand(Enum):
     CallId      = 5
     Hotspots    = 6
     FileName    = 7
-    Quit        = 8
\ No newline at end of file
+    Quit        = 8
+    CodeCache   = 9
+    Queue       = 10
+    Query       = 11
+    Deopts      = 12
+    Thrash      = 13
@@ -0,0 +1,148 @@
+from collections import deque
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .EventStore import EventStore, ns_to_datetime
+from .LogEventType import LogEventType
+
+NANOS_PER_MINUTE = 60 * 1_000_000_000
+# Most compilations remembered for matching the flushes of their code. Compiled code can stay in the code cache for far
+# longer than the window, so they're kept until flushed and only the oldest are dropped beyond this many.
+MAX_COMPILATIONS = 1_000_000
+
+
+@dataclass
+class MinuteBucket:
+    compilations: int = 0
+    produced_code: int = 0
+    time_spent: int = 0
+    evictions: int = 0
+    targets: set[tuple[int, int]] = field(default_factory=set)
+    sources: set[str] = field(default_factory=set)
+
+
+# Compilation statistics over a sliding window of log time, for following a log that keeps growing. Everything older
+# than the window is dropped, and the compilations kept for matching flushes are capped, so memory stays bounded no
+# matter how long the log is followed. Events are kept in deques in log time order, so expiring them only looks at the
+# expired ones.
+class RollingWindowStats:
+    def __init__(self, window_minutes: int):
+        self.window_ns = window_minutes * NANOS_PER_MINUTE
+        self.latest_ns = 0
+        self.minutes: dict[int, MinuteBucket] = {}
+        self.printed_minute = -1
+        # (timestamp, comp_time) of every compilation in the window
+        self.dones: deque[tuple[int, int]] = deque()
+        # (timestamp, event type) of deopts, invalidations and failures, and timestamps of evictions in the window. The
+        # HotSpot lines are kept apart since only each kind of line is in log time order.
+        self.others: deque[tuple[int, int]] = deque()
+        self.evictions: deque[int] = deque()
+        # (engine id, call target id) -> last time it had an event, and (timestamp, (engine id, call target id)) of the
+        # events that made it the last time, in log time order
+        self.targets: dict[tuple[int, int], int] = {}
+        self.target_events: deque[tuple[int, tuple[int, int]]] = deque()
+        # Compilation id -> (engine id, call target id) of the compilations whose code wasn't flushed yet, oldest first
+        self.compilations: dict[int, tuple[int, int]] = {}
+
+    def add(self, hotspot_events: EventStore, truffle_events: EventStore) -> None:
+        types = truffle_events.log_event_type.tolist()
+        # Call target ids are only unique within an engine
+        ids = list(zip(truffle_events.engine_id.tolist(), truffle_events.id.tolist()))
+        timestamps = truffle_events.timestamp.tolist()
+        for i, (event_type, ct_id, timestamp) in enumerate(zip(types, ids, timestamps)):
+            self.latest_ns = max(self.latest_ns, timestamp)
+            if timestamp > self.targets.get(ct_id, -1):
+                self.targets[ct_id] = timestamp
+                self.target_events.append((timestamp, ct_id))
+
+            if event_type == LogEventType.Done.value:
+                comp_time = int(truffle_events.comp_time[i])
+                code_size = int(truffle_events.code_size_in_bytes[i])
+                self.dones.append((timestamp, comp_time))
+                self._compiled(int(truffle_events.comp_id[i]), ct_id)
+
+                bucket = self._bucket(timestamp)
+                bucket.compilations += 1
+                bucket.produced_code += code_size
+                bucket.time_spent += comp_time
+                bucket.targets.add(ct_id)
+                bucket.sources.add(truffle_events.string('source', truffle_events.source[i]))
+            elif event_type in (LogEventType.Deoptimization.value, LogEventType.Invalidation.value, LogEventType.Failed.value):
+                self.others.append((timestamp, event_type))
+
+        # Like in the post-mortem reports, only flushes of compilations we saw count as evictions
+        for comp_id, timestamp in zip(hotspot_events.comp_id.tolist(), hotspot_events.timestamp.tolist()):
+            if self.compilations.pop(comp_id, None) is not None:
+                self.latest_ns = max(self.latest_ns, timestamp)
+                self.evictions.append(timestamp)
+                self._bucket(timestamp).evictions += 1
+
+        self._expire()
+
+    def _compiled(self, comp_id: int, ct_id: tuple[int, int]) -> None:
+        self.compilations.pop(comp_id, None)
+        self.compilations[comp_id] = ct_id
+        if len(self.compilations) > MAX_COMPILATIONS:
+            del self.compilations[next(iter(self.compilations))]
+
+    def _bucket(self, timestamp: int) -> MinuteBucket:
+        minute = timestamp // NANOS_PER_MINUTE
+        if minute not in self.minutes:
+            self.minutes[minute] = MinuteBucket()
+        return self.minutes[minute]
+
+    def _expire(self) -> None:
+        horizon = self.latest_ns - self.window_ns
+        while self.dones and self.dones[0][0] < horizon:
+            self.dones.popleft()
+        while self.others and self.others[0][0] < horizon:
+            self.others.popleft()
+        while self.evictions and self.evictions[0] < horizon:
+            self.evictions.popleft()
+
+        for minute in [m for m in self.minutes if (m + 1) * NANOS_PER_MINUTE <= horizon]:
+            del self.minutes[minute]
+        while self.target_events and self.target_events[0][0] < horizon:
+            _, ct_id = self.target_events.popleft()
+            # Targets with a later event stay
+            if self.targets.get(ct_id, horizon) < horizon:
+                del self.targets[ct_id]
+
+    def print_completed_minutes(self) -> None:
+        # A minute is complete once events of a later minute show up
+        current_minute = self.latest_ns // NANOS_PER_MINUTE
+        completed = sorted(m for m in self.minutes if self.printed_minute < m < current_minute)
+        if not completed:
+            return
+
+        print("{time_key:>20} | {compilations:>15} | {code:>15} | {time:>15} | {targets:>15} | {sources:>15} | {evictions:>15} |"
+                .format(time_key = "Datetime", compilations = "Compilations", code = "CodeGen (MB)", time = "CmplTime (s)", targets = "CallTargets", sources = "Sources", evictions = "Evictions"))
+        for minute in completed:
+            bucket = self.minutes[minute]
+            time_key = ns_to_datetime(minute * NANOS_PER_MINUTE).strftime("%Y-%m-%d %H:%M")
+            print(f"{time_key:>20} | "
+                  f"{bucket.compilations:>15} | "
+                  f"{bucket.produced_code/1024/1024:>15.0f} | "
+                  f"{bucket.time_spent/1000:>15.3f} | "
+                  f"{len(bucket.targets):>15} | "
+                  f"{len(bucket.sources):>15} | "
+                  f"{bucket.evictions:>15} | ")
+        self.printed_minute = completed[-1]
+
+    def print_stats(self, window_minutes: int) -> None:
+        comp_times = np.array([comp_time for _, comp_time in self.dones], dtype=np.int64)
+        other_types = [event_type for _, event_type in self.others]
+        p50, p99, p100 = np.percentile(comp_times, [50, 99, 100]) if len(comp_times) > 0 else (0, 0, 0)
+
+        print(f"Last {window_minutes} minutes up to {ns_to_datetime(self.latest_ns)}:")
+        print("  Active call targets.....................................: {value}".format(value = len(self.targets)))
+        print("  Number of compilations..................................: {value}".format(value = len(comp_times)))
+        print("  Number of evictions.....................................: {value}".format(value = len(self.evictions)))
+        print("  Number of invalidations.................................: {value}".format(value = other_types.count(LogEventType.Invalidation.value)))
+        print("  Number of deoptimizations...............................: {value}".format(value = other_types.count(LogEventType.Deoptimization.value)))
+        print("  Number of failures......................................: {value}".format(value = other_types.count(LogEventType.Failed.value)))
+        print("  Amount of time compiling (Sec)..........................: {value:>.2f}".format(value = comp_times.sum() / 1000))
+        print("    |-p50 Comp Entry (ms).................................: {value:>.2f}".format(value = p50))
+        print("    |-p99 Comp Entry (ms).................................: {value:>.2f}".format(value = p99))
+        print("    |-p100 Comp Entry (ms)................................: {value:>.2f}".format(value = p100))
@@ -0,0 +1,62 @@
+from typing import Optional
+
+import numpy as np
+
+MISSING = -1
+
+
+class StringTable:
+    def __init__(self, strings: Optional[list[str]] = None):
+        self.strings: list[str] = []
+        self._codes: dict[str, int] = {}
+        for s in strings or []:
+            self.intern(s)
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __getitem__(self, code: int) -> Optional[str]:
+        return None if code == MISSING else self.strings[code]
+
+    def intern(self, s: Optional[str]) -> int:
+        if s is None:
+            return MISSING
+
+        code = self._codes.get(s)
+        if code is None:
+            code = len(self.strings)
+            self._codes[s] = code
+            self.strings.append(s)
+        return code
+
+    def __getstate__(self) -> dict:
+        # The reverse index is rebuilt on unpickling, which halves what worker processes have to send back
+        return {'strings': self.strings}
+
+    def __setstate__(self, state: dict) -> None:
+        self.strings = state['strings']
+        self._codes = {s: code for code, s in enumerate(self.strings)}
+
+    def to_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        # All strings UTF-8 encoded back to back, plus the offset where each one ends
+        encoded = [s.encode('utf-8') for s in self.strings]
+        ends = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+        return np.frombuffer(b''.join(encoded), dtype=np.uint8), ends
+
+    @staticmethod
+    def from_arrays(data: np.ndarray, ends: np.ndarray) -> 'StringTable':
+        blob = data.tobytes()
+        starts = [0] + ends[:-1].tolist()
+        return StringTable([blob[start:end].decode('utf-8') for start, end in zip(starts, ends.tolist())])
+
+    def code(self, s: str) -> int:
+        return self._codes.get(s, MISSING)
+
+    def merge(self, other: 'StringTable') -> np.ndarray:
+        # Interns all strings of 'other' into this table and returns an array mapping codes of 'other' to codes of
+        # this table. The extra trailing slot maps MISSING (-1) onto itself.
+        remap = np.empty(len(other) + 1, dtype=np.int32)
+        for code, s in enumerate(other.strings):
+            remap[code] = self.intern(s)
+        remap[-1] = MISSING
+        return remap
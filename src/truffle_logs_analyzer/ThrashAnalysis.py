@@ -0,0 +1,98 @@
+from typing import Optional
+
+import numpy as np
+
+from .CallTarget import CallTargetKey
+from .CodeCacheAnalysis import CodeCacheAnalysis, search_by_key_and_time
+from .EventStore import EventStore
+from .LogEventType import LogEventType
+from .StringTable import MISSING
+
+NANOS_PER_MINUTE = 60 * 1_000_000_000
+
+
+# Code cache thrashing of every call target, over the compilations joined with the flushes of their code by
+# CodeCacheAnalysis. A target thrashes when most of its compiled code gets evicted and the target is compiled again
+# afterwards:
+# - thrash ratio: evicted compilations / compilations
+# - recompile cycles: evictions followed by a later compilation of the same target
+# - re-enqueue delay: time from an eviction to the next enqueue of the same target
+# - churn: bytes of evicted code per minute of log time
+class ThrashAnalysis:
+    def __init__(self, hotspot_events: EventStore, truffle_events: EventStore,
+                 code_cache: Optional[CodeCacheAnalysis] = None):
+        # The code cache report builds the same join, so it can be passed in
+        if code_cache is None:
+            code_cache = CodeCacheAnalysis(hotspot_events, truffle_events)
+        self.code_cache = dones = code_cache
+        enqueues = np.flatnonzero(truffle_events.log_event_type == LogEventType.Enqueued.value)
+
+        # Dense target keys shared by compilations and enqueues
+        targets, keys = np.unique(np.concatenate((np.stack((dones.process.astype(np.int64),
+                                                            dones.engine_ids.astype(np.int64), dones.ids)),
+                                                  np.stack((truffle_events.process[enqueues].astype(np.int64),
+                                                            truffle_events.engine_id[enqueues].astype(np.int64),
+                                                            truffle_events.id[enqueues]))), axis=1),
+                                  axis=1, return_inverse=True)
+        keys = keys.reshape(-1)
+        self.targets = targets
+        done_keys, enqueue_keys = keys[:len(dones.ids)], keys[len(dones.ids):]
+        num_targets = targets.shape[1]
+
+        self.compilations = np.bincount(done_keys, minlength=num_targets)
+        self.evictions = np.bincount(done_keys[dones.evicted], minlength=num_targets)
+        self.thrash_ratios = self.evictions / np.maximum(self.compilations, 1)
+
+        # Next compilation and next enqueue of the same target after every eviction
+        evicted = np.flatnonzero(dones.evicted)
+        evicted_keys = done_keys[evicted]
+        flush_timestamps = dones.flush_timestamps[evicted]
+        done_order = np.lexsort((dones.done_timestamps, done_keys))
+        next_dones = search_by_key_and_time(done_keys[done_order], dones.done_timestamps[done_order],
+                                            evicted_keys, flush_timestamps, side='right')
+        recompiled = next_dones < len(done_order)
+        recompiled[recompiled] = done_keys[done_order[next_dones[recompiled]]] == evicted_keys[recompiled]
+        self.recompile_cycles = np.bincount(evicted_keys[recompiled], minlength=num_targets)
+
+        enqueue_timestamps = truffle_events.timestamp[enqueues]
+        enqueue_order = np.lexsort((enqueue_timestamps, enqueue_keys))
+        next_enqueues = search_by_key_and_time(enqueue_keys[enqueue_order], enqueue_timestamps[enqueue_order],
+                                               evicted_keys, flush_timestamps)
+        reenqueued = next_enqueues < len(enqueue_order)
+        reenqueued[reenqueued] = enqueue_keys[enqueue_order[next_enqueues[reenqueued]]] == evicted_keys[reenqueued]
+        self.reenqueue_keys = evicted_keys[reenqueued]
+        self.reenqueue_delays = (enqueue_timestamps[enqueue_order[next_enqueues[reenqueued]]] -
+                                 flush_timestamps[reenqueued])
+
+        self.churned_bytes = np.bincount(evicted_keys, weights=dones.code_sizes[evicted],
+                                         minlength=num_targets).astype(np.int64)
+
+    def key_of(self, target: int) -> CallTargetKey:
+        return int(self.targets[0, target]), int(self.targets[1, target]), int(self.targets[2, target])
+
+    def thrashing(self, min_ratio: float, min_cycles: int) -> np.ndarray:
+        # Targets with a thrash ratio of at least 'min_ratio' and at least 'min_cycles' recompile cycles, most cycles
+        # first
+        flagged = np.flatnonzero((self.compilations > 0) & (self.thrash_ratios >= min_ratio) &
+                                 (self.recompile_cycles >= min_cycles))
+        return flagged[np.lexsort((-self.churned_bytes[flagged], -self.recompile_cycles[flagged]))]
+
+    def thrashing_keys(self, min_ratio: float, min_cycles: int) -> set[CallTargetKey]:
+        return {self.key_of(target) for target in self.thrashing(min_ratio, min_cycles).tolist()}
+
+    def average_reenqueue_delays(self) -> np.ndarray:
+        # Per target, in ns; NaN for targets never enqueued again after an eviction
+        counts = np.bincount(self.reenqueue_keys, minlength=len(self.compilations))
+        sums = np.bincount(self.reenqueue_keys, weights=self.reenqueue_delays, minlength=len(self.compilations))
+        return np.divide(sums, counts, out=np.full(len(counts), np.nan), where=counts > 0)
+
+    def churn_per_minute(self) -> tuple[int, np.ndarray]:
+        # First minute and the evicted bytes of every minute from it up to the last compilation or eviction
+        dones = self.code_cache
+        if len(dones.done_timestamps) == 0:
+            return MISSING, np.zeros(0, dtype=np.int64)
+        flushes = dones.flush_timestamps[dones.evicted]
+        times = np.concatenate((dones.done_timestamps, flushes))
+        first, last = int(times.min()) // NANOS_PER_MINUTE, int(times.max()) // NANOS_PER_MINUTE
+        return first, np.bincount(flushes // NANOS_PER_MINUTE - first, weights=dones.code_sizes[dones.evicted],
+                                  minlength=last - first + 1).astype(np.int64)
@@ -0,0 +1,56 @@
+import calendar
+from datetime import datetime, timezone
+
+NANOS_PER_SECOND = 1_000_000_000
+NANOS_PER_MILLI = 1_000_000
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def datetime_to_ns(timestamp: datetime) -> int:
+    delta = timestamp - EPOCH
+    return (delta.days * 86_400 + delta.seconds) * NANOS_PER_SECOND + delta.microseconds * 1_000
+
+
+# Decodes the two timestamp formats found in the logs into epoch nanoseconds:
+#   Truffle: 'yyyy-mm-ddTHH:MM:SS.fff' (UTC, the 'UTC ' prefix already removed)
+#   HotSpot: 'yyyy-mm-ddTHH:MM:SS.fff+hhmm'
+# Consecutive lines usually fall in the same second, so the epoch of the last decoded 'yyyy-mm-ddTHH:MM:SS' prefix is
+# cached and only the milliseconds are decoded for them. Anything not in the fixed format goes through fromisoformat.
+class TimestampDecoder:
+    def __init__(self):
+        self._truffle_prefix = None
+        self._truffle_second_ns = 0
+        self._hotspot_prefix = None
+        self._hotspot_second_ns = 0
+
+    def truffle(self, s: str) -> int:
+        if len(s) != 23 or s[19] != '.':
+            return datetime_to_ns(datetime.fromisoformat(s + "+00:00"))
+
+        prefix = s[:19]
+        if prefix != self._truffle_prefix:
+            self._truffle_second_ns = self._second_ns(prefix)
+            self._truffle_prefix = prefix
+
+        return self._truffle_second_ns + int(s[20:23]) * NANOS_PER_MILLI
+
+    def hotspot(self, s: str) -> int:
+        # The UTC offset is part of the cached prefix, i.e., 'yyyy-mm-ddTHH:MM:SS' + '+hhmm'
+        if len(s) != 28 or s[19] != '.':
+            return datetime_to_ns(datetime.fromisoformat(s[:-2] + ":" + s[-2:]))
+
+        prefix = s[:19] + s[23:]
+        if prefix != self._hotspot_prefix:
+            sign = -1 if s[23] == '-' else 1
+            offset = sign * (int(s[24:26]) * 3600 + int(s[26:28]) * 60)
+            self._hotspot_second_ns = self._second_ns(s[:19]) - offset * NANOS_PER_SECOND
+            self._hotspot_prefix = prefix
+
+        return self._hotspot_second_ns + int(s[20:23]) * NANOS_PER_MILLI
+
+    @staticmethod
+    def _second_ns(prefix: str) -> int:
+        seconds = calendar.timegm((int(prefix[0:4]), int(prefix[5:7]), int(prefix[8:10]),
+                                   int(prefix[11:13]), int(prefix[14:16]), int(prefix[17:19])))
+        return seconds * NANOS_PER_SECOND
@@ -1,36 +1,107 @@
-from dataclasses import dataclass
-from datetime import datetime
 from typing import Optional
 
 from .LogEventType import LogEventType
 
 
-@dataclass
+# A parsed log line. Every kind of line has its own slotted record type that only stores the fields the kind has; the
+# fields it doesn't have read as None from the class defaults below. The raw line is only kept when the parser is asked
+# to (keep_raw), since nothing but debugging output needs it.
 class TruffleEngineOptLogEntry:
-    _raw: str
-    log_event_type: LogEventType
-    engine_id: Optional[int]
-    id: Optional[int]
-    name: Optional[str]
-    tier: Optional[int]
-    exec_count: Optional[int]
-    threshold: Optional[int]
-    priority: Optional[int]
-    rate: Optional[float]
-    queue_size: Optional[int]
-    queue_change: Optional[int]
-    queue_load: Optional[float]
-    queue_time: Optional[int]
-    comp_time: Optional[int]
-    ast_size: Optional[int]
-    inline: Optional[str]
-    ir: Optional[str]
-    code_size_in_bytes: Optional[int]
-    code_addr: Optional[str]
-    comp_id: Optional[int]
-    timestamp: datetime
-    source: Optional[str]
-    reason: Optional[str]
+    __slots__ = ('log_event_type', 'engine_id', 'id', 'name', 'timestamp', 'source', '_raw')
+    # Fields stored by the kinds listing them in KIND_FIELDS
+    KIND_FIELDS: tuple[str, ...] = ()
+    tier: Optional[int] = None
+    exec_count: Optional[int] = None
+    threshold: Optional[int] = None
+    priority: Optional[int] = None
+    rate: Optional[float] = None
+    queue_size: Optional[int] = None
+    queue_change: Optional[int] = None
+    queue_load: Optional[float] = None
+    queue_time: Optional[int] = None
+    comp_time: Optional[int] = None
+    ast_size: Optional[int] = None
+    inline: Optional[str] = None
+    ir: Optional[str] = None
+    code_size_in_bytes: Optional[int] = None
+    code_addr: Optional[str] = None
+    comp_id: Optional[int] = None
+    reason: Optional[str] = None
+
+    def __init__(self, log_event_type: LogEventType, timestamp: int, engine_id: Optional[int] = None,
+                 id: Optional[int] = None, name: Optional[str] = None, source: Optional[str] = None,
+                 _raw: Optional[str] = None, **fields):
+        self.log_event_type = log_event_type
+        self.timestamp = timestamp  # nanoseconds since the epoch (UTC)
+        self.engine_id = engine_id
+        self.id = id
+        self.name = name
+        self.source = source
+        self._raw = _raw
+        for field in self.KIND_FIELDS:
+            setattr(self, field, fields.pop(field, None))
+        for field, value in fields.items():
+            if value is not None:
+                raise TypeError(f"{type(self).__name__} has no field '{field}'")
+
+    @staticmethod
+    def create(log_event_type: LogEventType, **fields) -> 'TruffleEngineOptLogEntry':
+        # Record of the type for 'log_event_type'. Fields the kind doesn't have may be passed as None.
+        return ENTRY_TYPES.get(log_event_type, TruffleEngineOptLogEntry)(log_event_type, **fields)
+
+    def fields(self) -> dict:
+        names = ('log_event_type', 'engine_id', 'id', 'name') + self.KIND_FIELDS + ('timestamp', 'source')
+        return {name: getattr(self, name) for name in names}
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.fields() == other.fields()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{name}={value!r}' for name, value in self.fields().items())})"
 
     def __str__(self):
-        return f"{self.log_event_type} | {self._raw}"
\ No newline at end of file
+        return f"{self.log_event_type} | {self._raw if self._raw is not None else repr(self)}"
+
+
+QUEUE_STATS_FIELDS = ('queue_size', 'queue_change', 'queue_load', 'queue_time')
+
+
+class QueuedEntry(TruffleEngineOptLogEntry):
+    __slots__ = KIND_FIELDS = ('tier', 'exec_count', 'threshold') + QUEUE_STATS_FIELDS
+
+
+class DequeuedEntry(TruffleEngineOptLogEntry):
+    __slots__ = KIND_FIELDS = ('tier', 'exec_count', 'threshold') + QUEUE_STATS_FIELDS + ('reason',)
+
+
+class StartEntry(TruffleEngineOptLogEntry):
+    __slots__ = KIND_FIELDS = ('tier', 'priority', 'rate') + QUEUE_STATS_FIELDS
+
+
+class DoneEntry(TruffleEngineOptLogEntry):
+    __slots__ = KIND_FIELDS = ('tier', 'comp_time', 'ast_size', 'inline', 'ir', 'code_size_in_bytes', 'code_addr',
+                               'comp_id')
+
+
+class FailedEntry(TruffleEngineOptLogEntry):
+    __slots__ = KIND_FIELDS = ('tier', 'comp_time', 'reason')
+
+
+class InvalidationEntry(TruffleEngineOptLogEntry):
+    __slots__ = KIND_FIELDS = ('reason',)
+
+
+class CacheFlushingEntry(TruffleEngineOptLogEntry):
+    __slots__ = KIND_FIELDS = ('comp_id',)
+
+
+# Kinds without fields of their own (deopt, flushed, disabled, enabled, ...) use TruffleEngineOptLogEntry itself
+ENTRY_TYPES = {
+    LogEventType.Enqueued: QueuedEntry,
+    LogEventType.Dequeued: DequeuedEntry,
+    LogEventType.Start: StartEntry,
+    LogEventType.Done: DoneEntry,
+    LogEventType.Failed: FailedEntry,
+    LogEventType.Invalidation: InvalidationEntry,
+    LogEventType.CacheFlushing: CacheFlushingEntry,
+}
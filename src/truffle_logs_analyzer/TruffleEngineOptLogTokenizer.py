@@ -0,0 +1,97 @@
+import re
+from typing import Optional
+
+from .LogEventType import LogEventType
+from .ParseTruffleEngineOptLogEntry import ParseTruffleEngineOptLogEntry
+from .TimestampDecoder import TimestampDecoder
+from .TruffleEngineOptLogEntry import ENTRY_TYPES, TruffleEngineOptLogEntry
+
+# Building blocks of the single-pass patterns. Each one matches a whole '|' separated segment, with the same anchoring
+# as the per-segment regexes of ParseTruffleEngineOptLogEntry.
+HEAD = r'^\[engine] opt {kind}\s+engine=(?P<engine_id>\d+)\s+id=(?P<id>\d+)(?P<name>[^|]*)'
+SEP = r'\|\s*'
+TIER = r'Tier\s+(?P<tier>\d)[^|]*'
+PRIORITY = r'Priority\s+(?P<priority>\d+)[^|]*'
+RATE = r'Rate\s+(?P<rate>\d*\.?\d+|NaN)[^|]*'
+QUEUE_STATS = (r'Queue:\s+Size\s+(?P<queue_size>\d+)\s+Change\s+(?P<queue_change>[+-]?\d+)'
+               r'\s+Load\s+(?P<queue_load>\d*\.?\d+)\s+Time\s+(?P<queue_time>\d+)us[^|]*')
+THRESHOLDS = r'Count/Thres\s+(?P<exec_count>\d+)/\s+(?P<threshold>\d+)[^|]*'
+TIME = r'Time\s+(?P<comp_time>\d+)[^|]*'
+AST = r'AST\s+(?P<ast_size>\d+)[^|]*'
+INLINE = r'(?P<inline>Inlined\s+\d+Y\s+\d+N)[^|]*'
+IR = r'(?P<ir>IR\s+\d+/\s*\d+)[^|]*'
+CODE_SIZE = r'CodeSize\s+(?P<code_size_in_bytes>\d+)[^|]*'
+ADDRESS = r'Addr\s+(?P<code_addr>[^|]*)'
+COMP_ID = r'CompId\s+(?P<comp_id>\d+)[^|]*'
+TIMESTAMP = r'UTC\s+(?P<timestamp>\d\d\d\d-[^|]*)'
+ANY = r'[^|]*'
+SOURCE = r'(?P<source>[^|]*)'
+REASON = r'(?P<reason>[^|]*)'
+
+
+# How the captured text of each field is converted into the value of the entry
+CONVERTERS = {
+    'engine_id': int, 'id': int, 'tier': int, 'exec_count': int, 'threshold': int, 'priority': int, 'queue_size': int,
+    'queue_change': int, 'queue_time': int, 'comp_time': int, 'ast_size': int, 'code_size_in_bytes': int, 'comp_id': int,
+    'rate': float, 'queue_load': float,
+    'name': str.strip, 'inline': str.strip, 'ir': str.strip, 'code_addr': str.strip, 'source': str.strip,
+    'reason': str.strip,
+}
+
+
+class OptKind:
+    def __init__(self, log_event_type: LogEventType, kind: str, *segments: str):
+        self.log_event_type = log_event_type
+        self.entry_type = ENTRY_TYPES.get(log_event_type, TruffleEngineOptLogEntry)
+        self.num_separators = len(segments)
+        self.pattern = re.compile(HEAD.format(kind=re.escape(kind)) + ''.join(SEP + segment for segment in segments) + '$')
+        # (field, index in match.groups(), converter) for every field captured by the pattern, except the timestamp
+        self.fields = tuple((name, group - 1, CONVERTERS[name])
+                            for name, group in self.pattern.groupindex.items() if name != 'timestamp')
+        self.timestamp_group = self.pattern.groupindex['timestamp'] - 1
+
+
+OPT_KINDS = {
+    'queued': OptKind(LogEventType.Enqueued, 'queued', TIER, THRESHOLDS, QUEUE_STATS, TIMESTAMP, SOURCE),
+    'start': OptKind(LogEventType.Start, 'start', TIER, PRIORITY, RATE, QUEUE_STATS, TIMESTAMP, SOURCE),
+    'done': OptKind(LogEventType.Done, 'done', TIER, TIME, AST, INLINE, IR, CODE_SIZE, ADDRESS, COMP_ID, TIMESTAMP, SOURCE),
+    'deopt': OptKind(LogEventType.Deoptimization, 'deopt', ANY, TIMESTAMP, SOURCE),
+    'inval.': OptKind(LogEventType.Invalidation, 'inval.', TIMESTAMP, SOURCE, REASON),
+    'unque.': OptKind(LogEventType.Dequeued, 'unque.', TIER, THRESHOLDS, QUEUE_STATS, TIMESTAMP, SOURCE, REASON),
+    'failed': OptKind(LogEventType.Failed, 'failed', TIER, TIME, REASON, TIMESTAMP, SOURCE),
+    'flushed': OptKind(LogEventType.Flushed, 'flushed', TIMESTAMP, SOURCE),
+    'disabled': OptKind(LogEventType.Disabled, 'disabled', TIMESTAMP, SOURCE),
+    'enabled': OptKind(LogEventType.Enabled, 'enabled', TIMESTAMP, SOURCE),
+}
+
+KIND_START = len("[engine] opt ")
+
+
+# Parses '[engine] opt' lines by matching each line once against the pattern of its opt kind. Lines that don't have the
+# expected shape are handed to ParseTruffleEngineOptLogEntry, so malformed lines are reported with the same errors.
+class TruffleEngineOptLogTokenizer:
+    def __init__(self, keep_raw: bool = False):
+        self.timestamps = TimestampDecoder()
+        self.keep_raw = keep_raw
+
+    def parse(self, log_line: str) -> Optional[TruffleEngineOptLogEntry]:
+        # FIXME...parse tregex
+        if "tregex" in log_line:
+            return None
+
+        kind = OPT_KINDS.get(log_line[KIND_START:log_line.find(' ', KIND_START)])
+        match = kind.pattern.match(log_line) if kind is not None and log_line.count('|') == kind.num_separators else None
+        if match is None:
+            return ParseTruffleEngineOptLogEntry(log_line, self.keep_raw).entry()
+
+        groups = match.groups()
+        values = {name: convert(groups[group]) for name, group, convert in kind.fields}
+        return kind.entry_type(
+            _raw=log_line if self.keep_raw else None,
+            log_event_type=kind.log_event_type,
+            timestamp=self.parse_timestamp(groups[kind.timestamp_group]),
+            **values,
+        )
+
+    def parse_timestamp(self, s: str) -> int:
+        return self.timestamps.truffle(s.strip())
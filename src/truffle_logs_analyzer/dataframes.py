@@ -0,0 +1,120 @@
+import os
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+from .CallTarget import EVENT_LISTS, CallTarget, CallTargetKey
+from .EventStore import FLOAT_COLUMNS, NUMERIC_COLUMNS, STRING_COLUMNS, EventStore
+from .LogEventType import LogEventType
+from .StringTable import MISSING
+from .truffle_logs import (argument_parser, collect_call_targets, expand_log_paths, group_log_files, load_log_files,
+                           populate_events_to_call_targets)
+
+# pandas API over parsed logs. The frames are built from the columns of the event stores (loaded from the parsed log
+# cache when possible), so no per-event objects are created on the way.
+
+# Formats the frames can be exported to, by file extension, and whether they need pyarrow
+EXPORT_FORMATS = {'.parquet': True, '.feather': True, '.csv': False}
+
+# Categories of the 'type' column and the category code of every LogEventType value
+EVENT_TYPE_NAMES = [event_type.name for event_type in LogEventType]
+EVENT_TYPE_CODES = np.full(max(event_type.value for event_type in LogEventType) + 1, -1, dtype=np.int8)
+for code, event_type in enumerate(LogEventType):
+    EVENT_TYPE_CODES[event_type.value] = code
+
+# Tiers whose compile time and code size get their own call target columns
+TIERS = (1, 2)
+
+
+def load_stores(paths: Union[str, list[str]], **options) -> tuple[EventStore, EventStore]:
+    # 'options' are the command line options, e.g. jobs=4 or no_cache=True
+    args = argument_parser().parse_args([paths] if isinstance(paths, str) else list(paths))
+    for name, value in options.items():
+        if name not in vars(args):
+            raise TypeError(f"Unknown option '{name}'")
+        setattr(args, name, value)
+    args.log_groups = group_log_files(expand_log_paths(args.logfiles))
+    return load_log_files(args)
+
+
+def load_events(paths: Union[str, list[str]], **options) -> pd.DataFrame:
+    hotspot_events, truffle_events = load_stores(paths, **options)
+    return events_frame(truffle_events, hotspot_events)
+
+
+def load_call_targets(paths: Union[str, list[str]], **options) -> pd.DataFrame:
+    hotspot_events, truffle_events = load_stores(paths, **options)
+    call_targets = collect_call_targets(truffle_events)
+    populate_events_to_call_targets(call_targets, hotspot_events, truffle_events)
+    return call_targets_frame(call_targets)
+
+
+def events_frame(truffle_events: EventStore, hotspot_events: EventStore = None) -> pd.DataFrame:
+    # One row per event in timestamp order. Absent values are <NA> (NaN for the float columns).
+    store = truffle_events if hotspot_events is None else EventStore.merge([truffle_events, hotspot_events])
+    columns = {
+        'type': pd.Categorical.from_codes(EVENT_TYPE_CODES[store.log_event_type], categories=EVENT_TYPE_NAMES),
+        'timestamp': pd.to_datetime(store.timestamp, unit='ns', utc=True),
+        'process': store.process,
+    }
+    for name in NUMERIC_COLUMNS:
+        if name not in columns and name != 'log_event_type':
+            values = store.columns[name]
+            columns[name] = pd.arrays.IntegerArray(values, values == MISSING)
+    for name in FLOAT_COLUMNS:
+        columns[name] = store.columns[name]
+    for name in STRING_COLUMNS:
+        # StringTable codes are category codes already, including -1 for absent values
+        columns[name] = pd.Categorical.from_codes(store.columns[name], categories=pd.Index(store.strings[name].strings))
+    return pd.DataFrame(columns)
+
+
+def call_targets_frame(call_targets: dict[CallTargetKey, CallTarget]) -> pd.DataFrame:
+    # One row per call target with its event counts and the aggregates of its CallTargetSummary
+    targets = list(call_targets.values())
+    summaries = [target.summary for target in targets]
+    columns = {
+        'process': np.array([target.process for target in targets], dtype=np.int32),
+        'engine_id': np.array([target.engine_id for target in targets], dtype=np.int32),
+        'id': np.array([target.id for target in targets], dtype=np.int64),
+        'name': pd.Categorical([target.name for target in targets]),
+        'source': pd.Categorical([target.source for target in targets]),
+    }
+    for event_type, list_name in EVENT_LISTS.items():
+        columns[list_name] = np.array([summary.count(event_type) for summary in summaries], dtype=np.int64)
+    columns['comp_time'] = np.array([summary.comp_time for summary in summaries], dtype=np.int64)
+    columns['code_size'] = np.array([summary.code_size for summary in summaries], dtype=np.int64)
+    for tier in TIERS:
+        columns[f'tier{tier}_comp_time'] = np.array([summary.comp_time_by_tier.get(tier, 0) for summary in summaries], dtype=np.int64)
+        columns[f'tier{tier}_code_size'] = np.array([summary.code_size_by_tier.get(tier, 0) for summary in summaries], dtype=np.int64)
+    columns['max_code_size'] = np.array([summary.max_code_size for summary in summaries], dtype=np.int64)
+    columns['exec_count'] = np.array([summary.exec_count for summary in summaries], dtype=np.int64)
+    for name in ('first_timestamp', 'last_timestamp'):
+        timestamps = pd.array([getattr(summary, name) for summary in summaries], dtype='Int64')
+        columns[name] = pd.to_datetime(timestamps, unit='ns', utc=True)
+    return pd.DataFrame(columns)
+
+
+def check_export_path(path: str) -> None:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Can't export to '{path}': the file extension must be one of {', '.join(EXPORT_FORMATS)}")
+    if EXPORT_FORMATS[extension] and pyarrow is None:
+        raise RuntimeError(f"Exporting to {extension} files needs the 'pyarrow' package")
+
+
+def export_frame(frame: pd.DataFrame, path: str) -> None:
+    check_export_path(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        frame.to_parquet(path, index=False)
+    elif extension == '.feather':
+        frame.to_feather(path)
+    else:
+        frame.to_csv(path, index=False)
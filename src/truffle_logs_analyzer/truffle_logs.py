@@ -1,77 +1,84 @@
 import argparse
-import datetime
+import contextlib
+import cProfile
+import glob
+import io
+import os
+import re
+import sys
+import time
 import numpy as np
-from collections import defaultdict
-from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
 from functools import cmp_to_key
-
-from .CallTarget import CallTarget
+from typing import Optional
+
+from .CallTarget import CallTarget, CallTargetKey
+from .CodeCacheAnalysis import CodeCacheAnalysis
+from .CompressedLog import decompressed_blocks, detect_compression
+from .DeoptAnalysis import DeoptAnalysis
+from .Distribution import PERCENTILES, Distribution
+from .EventList import EventList
+from .EventQuery import EventQuery
+from .EventStore import EventStore, ns_to_datetime
+from .LogDiff import LogDiff
 from .LogEventType import LogEventType
-from .ParseHotspotLogEntry import ParseHotspotLogEntry
-from .ParseTruffleEngineOptLogEntry import ParseTruffleEngineOptLogEntry
+from .LogFollower import LogFollower
+from .LogLineParser import PARSERS, LogLineParser
+from .ParallelLogParser import ParallelLogParser
+from .ParsedLogCache import ParsedLogCache, Snapshot, complete_lines_end, default_cache_dir
+from .ParseProfile import ParseProfile
+from .Profiler import Profiler, profile_stage
+from .QueueAnalysis import QueueAnalysis
 from .ReplCommand import ReplCommand
-from .TruffleEngineOptLogEntry import TruffleEngineOptLogEntry
+from .RollingWindowStats import RollingWindowStats
+from .StringTable import MISSING
+from .ThrashAnalysis import ThrashAnalysis
+from .TimestampDecoder import NANOS_PER_MILLI, NANOS_PER_SECOND
 
 
-def percentile_and_size(array, perc, unit):
-    value = np.percentile(array, perc)
-    size = np.sum(np.array(array) <= value)
+def percentile_and_size(distribution: Distribution, perc, unit):
+    value = distribution.percentile(perc)
+    size = distribution.count_at_most(value)
     return value/unit, size
 
-def stats(args, call_targets: dict[int, CallTarget]) -> None:
+def stats(args, call_targets: dict[CallTargetKey, CallTarget],
+          hotspot_events: EventStore,
+          truffle_events: EventStore) -> None:
     num_call_targets = len(call_targets)
     num_compilations = sum(len(ct.dones) for ct in call_targets.values())
     num_invalidations = sum(len(ct.invals) for ct in call_targets.values())
     num_deoptimizations = sum(len(ct.deopts) for ct in call_targets.values())
     num_failures = sum(len(ct.failures) for ct in call_targets.values())
-    amount_of_produced_code = sum(dn.code_size_in_bytes for ct in call_targets.values() for dn in ct.dones)
-    amount_of_time_compiling = sum(dn.comp_time for ct in call_targets.values() for dn in ct.dones)
-
-    # Calculate the largest seen code size for each call target
-    tier1_code_sizes = []
-    tier2_code_sizes = []
-    comp_times_tier1 = []
-    comp_times_tier2 = []
-    for ct in call_targets.values():
-        tier1_dones = [dn for dn in ct.dones if dn.tier == 1]
-        tier2_dones = [dn for dn in ct.dones if dn.tier == 2]
-
-        comp_times_tier1.extend([dn.comp_time for dn in tier1_dones])
-        comp_times_tier2.extend([dn.comp_time for dn in tier2_dones])
 
-        tier1_code_sizes.extend([dn.code_size_in_bytes for dn in tier1_dones])
-        tier2_code_sizes.extend([dn.code_size_in_bytes for dn in tier2_dones])
-
-    # Count how many call targets reached the maximum compilation threshold
+    # All 'done' events at once, as columns
+    dones = EventList.concat([ct.dones for ct in call_targets.values()])
+    tiers = dones.column('tier')
+    comp_times = dones.column('comp_time')
+    code_sizes = dones.column('code_size_in_bytes')
+    amount_of_produced_code = sum(ct.summary.code_size for ct in call_targets.values())
+    amount_of_time_compiling = sum(ct.summary.comp_time for ct in call_targets.values())
+
+    comp_times_tier1 = Distribution(comp_times[tiers == 1])
+    comp_times_tier2 = Distribution(comp_times[tiers == 2])
+    tier1_code_sizes = Distribution(code_sizes[tiers == 1])
+    tier2_code_sizes = Distribution(code_sizes[tiers == 2])
+
+    # Count how many call targets reached the maximum compilation threshold; a target is listed once per such failure
+    targets = list(call_targets.values())
+    failures = EventList.concat([ct.failures for ct in targets])
     ct_with_max_compilations = []
-    num_max_compilation_reached = 0
-    for ct in call_targets.values():
-        for flr in ct.failures:
-            if "Maximum compilation" in flr.reason:
-                ct_with_max_compilations.append(ct)
-                num_max_compilation_reached += 1
-
-    # Count how many flush call targets thrashed
-    num_max_cache_thrashing_cts = 0
-    for ct in ct_with_max_compilations:
-        flushes = 0
-
-        prev = None
-        for evt in ct.all_events_sorted():
-            if evt.log_event_type == LogEventType.CacheFlushing:
-                if prev is not None and (prev.log_event_type == LogEventType.Done or prev.log_event_type == LogEventType.CacheFlushing):
-                    flushes += 1
-            prev = evt
-
-        # Due to rolling logs, it's possible we've found flushes which have no corresponding dones...avoid divide by
-        # zero in those cases
-        if len(ct.dones) == 0:
-            if args.verbose:
-                print(f"Skipping thrash calculation for target {ct.id} as no 'done' events were encountered")
-            continue
-
-        if float(flushes)/len(ct.dones) >= 0.9:
-            num_max_cache_thrashing_cts += 1
+    if len(failures) > 0:
+        max_compilation = [code for code, reason in enumerate(failures.store.strings['reason'].strings)
+                           if "Maximum compilation" in reason]
+        owners = np.repeat(np.arange(len(targets)), [len(ct.failures) for ct in targets])
+        counts = np.bincount(owners[np.isin(failures.column('reason'), max_compilation)], minlength=len(targets))
+        for i in np.flatnonzero(counts):
+            ct_with_max_compilations.extend([targets[i]] * int(counts[i]))
+    num_max_compilation_reached = len(ct_with_max_compilations)
+
+    # Count the maximum compilation failures of call targets whose compiled code thrashed in the code cache
+    thrashing = ThrashAnalysis(hotspot_events, truffle_events).thrashing_keys(args.thrash_ratio, args.thrash_cycles)
+    num_max_cache_thrashing_cts = sum(1 for ct in ct_with_max_compilations if ct.key in thrashing)
 
     print("Number of call targets....................................: {value}".format(value = num_call_targets))
     print("Number of compilations....................................: {value}".format(value = num_compilations))
@@ -81,18 +88,18 @@ def stats(args, call_targets: dict[int, CallTarget]) -> None:
     print("Number of call targets that reached maximum compilation...: {value} ({perc:>.2f}%)".format(value = num_max_compilation_reached, perc = (float(num_max_compilation_reached) / num_call_targets)*100))
     print("Number of failures due to cache thrashing.................: {value}".format(value = num_max_cache_thrashing_cts))
     print("Amount of time compiling (Sec)............................: {value:>.2f}".format(value = amount_of_time_compiling / 1000))
-    print("  Tier 1 (Sec)............................................: {value:>.2f}".format(value = np.sum(comp_times_tier1) / 1000))
-    print("    |-avg Comp Entry (ms).................................: {value:>.2f}".format(value = np.average(comp_times_tier1)))
-    print("    |-p0 Comp Entry (ms)..................................: {value:>.2f}".format(value = np.min(comp_times_tier1)))
+    print("  Tier 1 (Sec)............................................: {value:>.2f}".format(value = comp_times_tier1.sum() / 1000))
+    print("    |-avg Comp Entry (ms).................................: {value:>.2f}".format(value = comp_times_tier1.average()))
+    print("    |-p0 Comp Entry (ms)..................................: {value:>.2f}".format(value = comp_times_tier1.min()))
     print("    |-p50 Comp Entry (ms).................................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier1, 50, 1)))
     print("    |-p90 Comp Entry (ms).................................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier1, 90, 1)))
     print("    |-p95 Comp Entry (ms).................................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier1, 95, 1)))
     print("    |-p99 Comp Entry (ms).................................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier1, 99, 1)))
     print("    |-p99.9 Comp Entry (ms)...............................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier1, 99.9, 1)))
     print("    |-p100 Comp Entry (ms)................................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier1, 100, 1)))
-    print("  Tier 2 (Sec)............................................: {value:>.2f}".format(value = sum(comp_times_tier2)))
-    print("    |-avg Comp Entry (ms).................................: {value:>.2f}".format(value = np.average(comp_times_tier2)))
-    print("    |-p0 Comp Entry (ms)..................................: {value:>.2f}".format(value = np.min(comp_times_tier2)))
+    print("  Tier 2 (Sec)............................................: {value:>.2f}".format(value = comp_times_tier2.sum()))
+    print("    |-avg Comp Entry (ms).................................: {value:>.2f}".format(value = comp_times_tier2.average()))
+    print("    |-p0 Comp Entry (ms)..................................: {value:>.2f}".format(value = comp_times_tier2.min()))
     print("    |-p50 Comp Entry (ms).................................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier2, 50, 1)))
     print("    |-p90 Comp Entry (ms).................................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier2, 90, 1)))
     print("    |-p95 Comp Entry (ms).................................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier2, 95, 1)))
@@ -100,18 +107,18 @@ def stats(args, call_targets: dict[int, CallTarget]) -> None:
     print("    |-p99.9 Comp Entry (ms)...............................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier2, 99.9, 1)))
     print("    |-p100 Comp Entry (ms)................................: {:>.2f} {}".format(*percentile_and_size(comp_times_tier2, 100, 1)))
     print("Amount of produced code (MB)..............................: {value:>.2f}".format(value = amount_of_produced_code / 1024 / 1024))
-    print("  Tier 1 (MB).............................................: {value:>.2f}".format(value = sum(tier1_code_sizes) / 1024 / 1024))
-    print("    |-avg Cache Entry (KB)................................: {value:>.2f}".format(value = np.average(tier1_code_sizes) / 1024))
-    print("    |-p0 Cache Entry (KB).................................: {value:>.2f}".format(value = np.min(tier1_code_sizes) / 1024))
+    print("  Tier 1 (MB).............................................: {value:>.2f}".format(value = tier1_code_sizes.sum() / 1024 / 1024))
+    print("    |-avg Cache Entry (KB)................................: {value:>.2f}".format(value = tier1_code_sizes.average() / 1024))
+    print("    |-p0 Cache Entry (KB).................................: {value:>.2f}".format(value = tier1_code_sizes.min() / 1024))
     print("    |-p50 Cache Entry (KB)................................: {:>.2f} {}".format(*percentile_and_size(tier1_code_sizes, 50, 1024)))
     print("    |-p90 Cache Entry (KB)................................: {:>.2f} {}".format(*percentile_and_size(tier1_code_sizes, 90, 1024)))
     print("    |-p95 Cache Entry (KB)................................: {:>.2f} {}".format(*percentile_and_size(tier1_code_sizes, 95, 1024)))
     print("    |-p99 Cache Entry (KB)................................: {:>.2f} {}".format(*percentile_and_size(tier1_code_sizes, 99, 1024)))
     print("    |-p99.9 Cache Entry (KB)..............................: {:>.2f} {}".format(*percentile_and_size(tier1_code_sizes, 99.9, 1024)))
     print("    |-p100 Cache Entry (KB)...............................: {:>.2f} {}".format(*percentile_and_size(tier1_code_sizes, 100, 1024)))
-    print("  Tier 2 (MB).............................................: {value:>.2f}".format(value = sum(tier2_code_sizes) / 1024 / 1024))
-    print("    |-avg Cache Entry (KB)................................: {value:>.2f}".format(value = np.average(tier2_code_sizes) / 1024))
-    print("    |-p0 Cache Entry (KB).................................: {value:>.2f}".format(value = np.min(tier2_code_sizes) / 1024))
+    print("  Tier 2 (MB).............................................: {value:>.2f}".format(value = tier2_code_sizes.sum() / 1024 / 1024))
+    print("    |-avg Cache Entry (KB)................................: {value:>.2f}".format(value = tier2_code_sizes.average() / 1024))
+    print("    |-p0 Cache Entry (KB).................................: {value:>.2f}".format(value = tier2_code_sizes.min() / 1024))
     print("    |-p50 Cache Entry (KB)................................: {:>.2f} {}".format(*percentile_and_size(tier2_code_sizes, 50, 1024)))
     print("    |-p90 Cache Entry (KB)................................: {:>.2f} {}".format(*percentile_and_size(tier2_code_sizes, 90, 1024)))
     print("    |-p95 Cache Entry (KB)................................: {:>.2f} {}".format(*percentile_and_size(tier2_code_sizes, 95, 1024)))
@@ -120,19 +127,30 @@ def stats(args, call_targets: dict[int, CallTarget]) -> None:
     print("    |-p100 Cache Entry (KB)...............................: {:>.2f} {}".format(*percentile_and_size(tier2_code_sizes, 100, 1024)))
 
 
-def details_for_call_id(call_id: int, call_targets: dict[int, CallTarget]) -> None:
-    if call_id not in call_targets:
+def details_for_call_id(args, call_id: int, call_targets: dict[CallTargetKey, CallTarget]) -> None:
+    # With logs of several processes or engines, the same id can belong to one target of each
+    targets = [ct for ct in call_targets.values() if ct.id == call_id]
+    if len(targets) == 0:
         print(f"Call target with ID {call_id} not present.")
         return 
 
-    target = call_targets[call_id]
+    engines = {target.engine_id for target in targets}
+    for target in targets:
+        if len(args.log_groups) > 1:
+            print(f"Process {target.process} ({', '.join(args.log_groups[target.process])}):")
+        if len(engines) > 1:
+            print(f"Engine {target.engine_id}:")
+        details_for_call_target(target)
+
+
+def details_for_call_target(target: CallTarget) -> None:
     num_compilations = len(target.dones)
     num_invalidations = len(target.invals)
     num_deoptimizations = len(target.deopts)
     num_failures = len(target.failures)
     num_evictions = len(target.evictions)
-    amount_of_produced_code = sum(dn.code_size_in_bytes for dn in target.dones)
-    amount_of_time_compiling = sum(dn.comp_time for dn in target.dones)
+    amount_of_produced_code = target.summary.code_size
+    amount_of_time_compiling = target.summary.comp_time
 
     print("Number of compilations..........: {value}".format(value = num_compilations))
     print("Number of invalidations.........: {value}".format(value = num_invalidations))
@@ -200,14 +218,12 @@ def details_for_call_id(call_id: int, call_targets: dict[int, CallTarget]) -> No
 
 
 
-def histogram(hsize: int, call_targets: dict[int, CallTarget]) -> None:
+def histogram(hsize: int, call_targets: dict[CallTargetKey, CallTarget]) -> None:
     def compare(entry1: CallTarget, entry2: CallTarget):
         if len(entry2.dones) != len(entry1.dones):
             return len(entry2.dones) - len(entry1.dones)
         else:
-            total_compile_time_1 = sum(dn.comp_time for dn in entry1.dones)
-            total_compile_time_2 = sum(dn.comp_time for dn in entry2.dones)
-            return total_compile_time_2 - total_compile_time_1
+            return entry2.summary.comp_time - entry1.summary.comp_time
 
     values = list(call_targets.values())
     sorted_values = sorted(values, key=cmp_to_key(compare))
@@ -239,8 +255,8 @@ def histogram(hsize: int, call_targets: dict[int, CallTarget]) -> None:
     print("--------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------")
 
     for target in sorted_values[:hsize]:
-        amount_of_produced_code = sum(dn.code_size_in_bytes for dn in target.dones) / 1024
-        amount_of_time_compiling = sum(dn.comp_time for dn in target.dones)
+        amount_of_produced_code = target.summary.code_size / 1024
+        amount_of_time_compiling = target.summary.comp_time
 
         print(f"{len(target.dones):>10} | "
               f"{amount_of_time_compiling:>15} | "
@@ -256,80 +272,338 @@ def histogram(hsize: int, call_targets: dict[int, CallTarget]) -> None:
               f"{target.source:>50}")
 
 
-def comp_rate(granularity: str, call_targets: dict[int, CallTarget]) -> None:
-    compilations = defaultdict(int)
-    produced_code = defaultdict(int)
-    time_spent = defaultdict(int)
-    evictions = defaultdict(int)
-    targets = defaultdict(set)
-    cumulative_targets = set() 
-    sources = defaultdict(set)
-    min_time = datetime.datetime.now(datetime.timezone.utc) + timedelta(days=3650)
-    max_time = datetime.datetime.now(datetime.timezone.utc) - timedelta(days=3650)
-
-    if granularity == "hour":
-        time_key_pattern = "%Y-%m-%d %H"
-        minutes_increment = 60
-    elif granularity == "minute":
-        time_key_pattern = "%Y-%m-%d %H:%M"
-        minutes_increment = 1
-    else:
+# Granularities of comp_rate by name, and the units of durations such as '10s' or '5m', in nanoseconds
+NAMED_GRANULARITIES = {'second': NANOS_PER_SECOND, 'minute': 60 * NANOS_PER_SECOND, 'hour': 3600 * NANOS_PER_SECOND,
+                       'day': 86400 * NANOS_PER_SECOND}
+GRANULARITY_UNITS = {'s': NANOS_PER_SECOND, 'm': 60 * NANOS_PER_SECOND, 'h': 3600 * NANOS_PER_SECOND,
+                     'd': 86400 * NANOS_PER_SECOND}
+
+
+def parse_granularity(granularity: str) -> Optional[int]:
+    if granularity in NAMED_GRANULARITIES:
+        return NAMED_GRANULARITIES[granularity]
+    match = re.fullmatch(r'(\d+)([smhd])', granularity)
+    if match is None or int(match.group(1)) == 0:
+        return None
+    return int(match.group(1)) * GRANULARITY_UNITS[match.group(2)]
+
+
+def time_key_pattern(bucket_ns: int) -> str:
+    # Show the time down to the smallest unit the buckets can start at
+    if bucket_ns % NAMED_GRANULARITIES['day'] == 0:
+        return "%Y-%m-%d"
+    if bucket_ns % NAMED_GRANULARITIES['hour'] == 0:
+        return "%Y-%m-%d %H"
+    if bucket_ns % NAMED_GRANULARITIES['minute'] == 0:
+        return "%Y-%m-%d %H:%M"
+    return "%Y-%m-%d %H:%M:%S"
+
+
+def comp_rate(granularity: str, call_targets: dict[CallTargetKey, CallTarget]) -> None:
+    bucket_ns = parse_granularity(granularity)
+    if bucket_ns is None:
         print(f"Unknown comp_rate granularity '{granularity}'.")
         return
-
-    for ct in call_targets.values():
-        for dn in ct.dones:
-            if dn.timestamp < min_time:
-                min_time = dn.timestamp
-            if dn.timestamp > max_time:
-                max_time = dn.timestamp
-
-            time_key = dn.timestamp.strftime(time_key_pattern)
-            compilations[time_key] += 1
-            produced_code[time_key] += dn.code_size_in_bytes
-            time_spent[time_key] += dn.comp_time
-            sources[time_key].add(ct.source)
-            targets[time_key].add(ct.id)
-
-        for eviction in ct.evictions:
-            time_key = eviction.timestamp.strftime(time_key_pattern)
-            evictions[time_key] += 1
+    pattern = time_key_pattern(bucket_ns)
 
     print("{time_key:>20} | {compilations:>15} | {code:>15} | {time:>15} | {targets:>15} | {sources:>15} | {cumul_tgts:>15} | {sum_uniq_comps:>15} | {evictions:>15} |"
             .format(time_key = "Datetime", compilations = "Compilations", code = "CodeGen (MB)", time = "CmplTime (s)", targets = "CallTargets", sources = "Sources", cumul_tgts = "CumTargets", sum_uniq_comps = "SumUniqComps (MB)", evictions = "Evictions"))
 
-    curr_time = min_time
-    while curr_time <= max_time:
-        time_key = curr_time.strftime(time_key_pattern)
-
-        # Find which is the largest compilation done within the given "time_key"
-        sum_largest_compilations = 0
-        for ct_id in targets[time_key]:
-            cumulative_targets.add(ct_id)
-            ct = call_targets[ct_id]
-            mx = 0
-            for dn in ct.dones:
-                dn_time = dn.timestamp.strftime(time_key_pattern)
-                if dn_time == time_key:
-                    if mx < dn.code_size_in_bytes:
-                        mx = dn.code_size_in_bytes
-            sum_largest_compilations += mx
+    targets = list(call_targets.values())
+    dones = EventList.concat([ct.dones for ct in targets])
+    if len(dones) == 0:
+        return
 
+    # Buckets are aligned to the epoch and numbered from the one of the first compilation. Every bucket up to the one of
+    # the last compilation gets a row, even if it's empty.
+    buckets = dones.column('timestamp') // bucket_ns
+    first_bucket = int(buckets.min())
+    buckets -= first_bucket
+    num_buckets = int(buckets.max()) + 1
+    owners = np.repeat(np.arange(len(targets)), [len(ct.dones) for ct in targets])
+    code_sizes = dones.column('code_size_in_bytes')
+
+    compilations = np.bincount(buckets, minlength=num_buckets)
+    produced_code = np.bincount(buckets, weights=code_sizes, minlength=num_buckets)
+    time_spent = np.bincount(buckets, weights=dones.column('comp_time'), minlength=num_buckets)
+
+    # One entry per (bucket, target) with compilations, ordered by bucket, holding the largest compilation
+    order = np.lexsort((owners, buckets))
+    sorted_buckets = buckets[order]
+    sorted_owners = owners[order]
+    starts = np.flatnonzero(np.concatenate(([True], (sorted_buckets[1:] != sorted_buckets[:-1]) |
+                                                   (sorted_owners[1:] != sorted_owners[:-1]))))
+    pair_buckets = sorted_buckets[starts]
+    pair_owners = sorted_owners[starts]
+    largest_compilations = np.maximum.reduceat(code_sizes[order], starts)
+
+    active_targets = np.bincount(pair_buckets, minlength=num_buckets)
+    sum_largest_compilations = np.bincount(pair_buckets, weights=largest_compilations, minlength=num_buckets)
+
+    source_codes: dict[Optional[str], int] = {}
+    target_sources = np.array([source_codes.setdefault(ct.source, len(source_codes)) for ct in targets], dtype=np.int64)
+    bucket_sources = np.unique(pair_buckets * len(source_codes) + target_sources[pair_owners])
+    active_sources = np.bincount(bucket_sources // len(source_codes), minlength=num_buckets)
+
+    # The pairs are ordered by bucket, so the first pair of each target is in the bucket it was first compiled in
+    _, first_pairs = np.unique(pair_owners, return_index=True)
+    cumulative_targets = np.cumsum(np.bincount(pair_buckets[first_pairs], minlength=num_buckets))
+
+    eviction_buckets = EventList.concat([ct.evictions for ct in targets]).column('timestamp') // bucket_ns - first_bucket
+    eviction_buckets = eviction_buckets[(eviction_buckets >= 0) & (eviction_buckets < num_buckets)]
+    evictions = np.bincount(eviction_buckets, minlength=num_buckets)
+
+    for bucket in range(num_buckets):
+        time_key = ns_to_datetime((first_bucket + bucket) * bucket_ns).strftime(pattern)
         print(f"{time_key:>20} | "
-              f"{compilations[time_key]:>15} | "
-              f"{produced_code[time_key]/1024/1024:>15.0f} | "
-              f"{time_spent[time_key]/1000:>15.3f} | "
-              f"{len(targets[time_key]):>15} | "
-              f"{len(sources[time_key]):>15} | " 
-              f"{len(cumulative_targets):>15} | " 
-              f"{sum_largest_compilations/1024/1024:>15.0f} | " 
-              f"{evictions[time_key]:>15} | ")
+              f"{compilations[bucket]:>15} | "
+              f"{produced_code[bucket]/1024/1024:>15.0f} | "
+              f"{time_spent[bucket]/1000:>15.3f} | "
+              f"{active_targets[bucket]:>15} | "
+              f"{active_sources[bucket]:>15} | " 
+              f"{cumulative_targets[bucket]:>15} | " 
+              f"{sum_largest_compilations[bucket]/1024/1024:>15.0f} | " 
+              f"{evictions[bucket]:>15} | ")
+
+
+# Number of call targets listed by wasted compile time
+WASTED_TOP = 20
+
+
+def code_cache(args, granularity: str,
+               call_targets: dict[CallTargetKey, CallTarget],
+               hotspot_events: EventStore,
+               truffle_events: EventStore) -> None:
+    bucket_ns = parse_granularity(granularity)
+    if bucket_ns is None:
+        print(f"Unknown code_cache granularity '{granularity}'.")
+        return
 
-        curr_time = curr_time + timedelta(minutes=minutes_increment)
+    analysis = CodeCacheAnalysis(hotspot_events, truffle_events)
+    print("Compilations..............................................: {value}".format(value = len(analysis.evicted)))
+    print("  Evicted.................................................: {value}".format(value = int(analysis.evicted.sum())))
+    print("  Still in the code cache at the end of the log...........: {value}".format(value = int((~analysis.evicted).sum())))
+    for tier in (1, 2):
+        lifetimes = Distribution(analysis.lifetimes_of_tier(tier))
+        print("{label:.<58}: {value}".format(label = f"  Tier {tier} evicted compilations", value = len(lifetimes)))
+        if len(lifetimes) == 0:
+            continue
+        print("    |-avg Lifetime (s)....................................: {value:>.2f}".format(value = lifetimes.average() / NANOS_PER_SECOND))
+        print("    |-p0 Lifetime (s).....................................: {value:>.2f}".format(value = lifetimes.min() / NANOS_PER_SECOND))
+        for perc in PERCENTILES:
+            label = f"    |-p{perc} Lifetime (s)"
+            print("{label:.<58}: {:>.2f} {}".format(*percentile_and_size(lifetimes, perc, NANOS_PER_SECOND), label = label))
+
+    # Live code at the end of every bucket and the most there was at any time within it
+    times, live = analysis.live_code()
+    if len(times) > 0:
+        peak = int(np.argmax(live))
+        print("Peak live compiled code (MB)..............................: {value:>.2f} at {when}".format(value = live[peak] / 1024 / 1024, when = ns_to_datetime(times[peak])))
+        buckets = times // bucket_ns
+        first_bucket = int(buckets[0])
+        num_buckets = int(buckets[-1]) - first_bucket + 1
+        starts = np.searchsorted(buckets, np.arange(first_bucket, first_bucket + num_buckets))
+        ends = np.append(starts[1:], len(times))
+        # Buckets without steps keep the size the code cache had at the end of the previous one
+        last_step = np.maximum.accumulate(np.where(ends > starts, ends - 1, -1))
+        peaks = np.maximum.reduceat(live, np.minimum(starts, len(live) - 1))
+
+        print("{time_key:>20} | {live:>15} | {peak:>15} |".format(time_key = "Datetime", live = "LiveCode (MB)", peak = "PeakCode (MB)"))
+        for bucket in range(num_buckets):
+            time_key = ns_to_datetime((first_bucket + bucket) * bucket_ns).strftime(time_key_pattern(bucket_ns))
+            end_value = live[last_step[bucket]]
+            bucket_peak = peaks[bucket] if ends[bucket] > starts[bucket] else end_value
+            print(f"{time_key:>20} | {end_value/1024/1024:>15.2f} | {bucket_peak/1024/1024:>15.2f} |")
+
+    wasted = analysis.wasted_compile_time(int(args.short_lived * NANOS_PER_SECOND))
+    print(f"Call targets with most compile time spent on code evicted within {args.short_lived}s:")
+    print("{time:>15} | {count:>10} | {id:>10} | {name:>50} | {source:>50}".format(time = "WastedTime(ms)", count = "Evicted", id = "ID", name = "Method", source = "Source"))
+    for key, time_spent, count in wasted[:WASTED_TOP]:
+        target = call_targets[key]
+        print(f"{time_spent:>15} | {count:>10} | {target.id:>10} | {target.name:>50} | {target.source:>50}")
+
+
+# Fraction of the compiler threads that must be busy for a bucket to count as saturated
+SATURATION = 0.9
+
+
+def queue(args, granularity: str, truffle_events: EventStore) -> None:
+    bucket_ns = parse_granularity(granularity)
+    if bucket_ns is None:
+        print(f"Unknown queue granularity '{granularity}'.")
+        return
+
+    analysis = QueueAnalysis(truffle_events)
+    threads = args.compiler_threads if args.compiler_threads is not None else analysis.max_running()
+    if args.compiler_threads is None:
+        print("Compiler threads (most compilations running at once)....: {value}".format(value = threads))
+    else:
+        print("Compiler threads..........................................: {value}".format(value = threads))
+
+    for tier in (1, 2):
+        waits = Distribution(analysis.waits_of_tier(tier))
+        print("{label:.<58}: {value}".format(label = f"Tier {tier} queue waits (enqueue to start)", value = len(waits)))
+        if len(waits) == 0:
+            continue
+        print("    |-avg Wait (ms).......................................: {value:>.2f}".format(value = waits.average() / NANOS_PER_MILLI))
+        for perc in PERCENTILES:
+            label = f"    |-p{perc} Wait (ms)"
+            print("{label:.<58}: {:>.2f} {}".format(*percentile_and_size(waits, perc, NANOS_PER_MILLI), label = label))
+
+    times = np.concatenate((analysis.enqueue_timestamps, analysis.start_timestamps, analysis.sample_timestamps))
+    if len(times) == 0 or threads == 0:
+        return
+
+    first_bucket = int(times.min()) // bucket_ns
+    num_buckets = int(times.max()) // bucket_ns - first_bucket + 1
+    def buckets_of(timestamps: np.ndarray) -> np.ndarray:
+        return timestamps // bucket_ns - first_bucket
+
+    enqueued = np.bincount(buckets_of(analysis.enqueue_timestamps), minlength=num_buckets)
+    started = np.bincount(buckets_of(analysis.start_timestamps), minlength=num_buckets)
+    wait_buckets = buckets_of(analysis.wait_timestamps)
+    waits = np.bincount(wait_buckets, minlength=num_buckets)
+    wait_sums = np.bincount(wait_buckets, weights=analysis.waits, minlength=num_buckets)
+    max_waits = np.zeros(num_buckets, dtype=np.int64)
+    np.maximum.at(max_waits, wait_buckets, analysis.waits)
+    sample_buckets = buckets_of(analysis.sample_timestamps)
+    max_queue = np.zeros(num_buckets, dtype=np.int64)
+    np.maximum.at(max_queue, sample_buckets, analysis.queue_sizes)
+    samples = np.bincount(sample_buckets, minlength=num_buckets)
+    load_sums = np.bincount(sample_buckets, weights=np.nan_to_num(analysis.queue_loads), minlength=num_buckets)
+    busy = analysis.busy_time((first_bucket + np.arange(num_buckets + 1)) * bucket_ns) / bucket_ns
+    saturated = (busy >= SATURATION * threads) & (max_queue > 0)
+
+    print("{time_key:>20} | {enqueued:>10} | {started:>10} | {avg_wait:>12} | {max_wait:>12} | {max_queue:>10} | {load:>8} | {busy:>12} | {saturated:>9} |"
+            .format(time_key = "Datetime", enqueued = "Enqueued", started = "Started", avg_wait = "AvgWait (ms)", max_wait = "MaxWait (ms)", max_queue = "MaxQueue", load = "AvgLoad", busy = "BusyThreads", saturated = "Saturated"))
+    pattern = time_key_pattern(bucket_ns)
+    for bucket in range(num_buckets):
+        time_key = ns_to_datetime((first_bucket + bucket) * bucket_ns).strftime(pattern)
+        avg_wait = wait_sums[bucket] / waits[bucket] / NANOS_PER_MILLI if waits[bucket] > 0 else 0
+        avg_load = load_sums[bucket] / samples[bucket] if samples[bucket] > 0 else 0
+        print(f"{time_key:>20} | "
+              f"{enqueued[bucket]:>10} | "
+              f"{started[bucket]:>10} | "
+              f"{avg_wait:>12.2f} | "
+              f"{max_waits[bucket] / NANOS_PER_MILLI:>12.2f} | "
+              f"{max_queue[bucket]:>10} | "
+              f"{avg_load:>8.2f} | "
+              f"{busy[bucket]:>12.2f} | "
+              f"{'yes' if saturated[bucket] else '':>9} |")
+
+    # Consecutive saturated buckets form one window
+    changes = np.flatnonzero(np.diff(np.concatenate(([0], saturated.astype(np.int8), [0]))))
+    print(f"Saturation windows (at least {SATURATION:.0%} of {threads} compiler threads busy while tasks were queued):")
+    for start, end in zip(changes[::2], changes[1::2]):
+        window_start = ns_to_datetime((first_bucket + start) * bucket_ns)
+        window_end = ns_to_datetime((first_bucket + end) * bucket_ns)
+        print(f"  {window_start} - {window_end} ({window_end - window_start})")
+
+
+# Number of call targets listed by the thrash report
+THRASH_TOP = 20
+
+
+def thrash(args, call_targets: dict[CallTargetKey, CallTarget],
+           hotspot_events: EventStore,
+           truffle_events: EventStore) -> None:
+    analysis = ThrashAnalysis(hotspot_events, truffle_events)
+    thrashing = analysis.thrashing(args.thrash_ratio, args.thrash_cycles)
+    compiled = analysis.compilations > 0
+    print("Call targets with compilations............................: {value}".format(value = int(compiled.sum())))
+    print("  With evicted compilations...............................: {value}".format(value = int((analysis.evictions > 0).sum())))
+    print("  Recompiled after an eviction............................: {value}".format(value = int((analysis.recompile_cycles > 0).sum())))
+    print("{label:.<58}: {value}".format(label = f"  Thrashing (ratio >= {args.thrash_ratio}, cycles >= {args.thrash_cycles})", value = len(thrashing)))
+    print("Evicted compilations......................................: {value}".format(value = int(analysis.evictions.sum())))
+    print("Recompile cycles after eviction...........................: {value}".format(value = int(analysis.recompile_cycles.sum())))
+    if compiled.any():
+        print("Average thrash ratio (evicted / compilations).............: {value:>.2f}".format(value = analysis.thrash_ratios[compiled].mean()))
+
+    delays = Distribution(analysis.reenqueue_delays)
+    print("Re-enqueues after eviction................................: {value}".format(value = len(delays)))
+    if len(delays) > 0:
+        print("    |-avg Eviction to re-enqueue (s)......................: {value:>.2f}".format(value = delays.average() / NANOS_PER_SECOND))
+        for perc in PERCENTILES:
+            label = f"    |-p{perc} Eviction to re-enqueue (s)"
+            print("{label:.<58}: {:>.2f} {}".format(*percentile_and_size(delays, perc, NANOS_PER_SECOND), label = label))
+
+    first_minute, churn = analysis.churn_per_minute()
+    if len(churn) > 0:
+        peak = int(np.argmax(churn))
+        print("Evicted code per minute (MB/min)..........................: {value:>.2f}".format(value = churn.mean() / 1024 / 1024))
+        print("Peak evicted code in one minute (MB)......................: {value:>.2f} at {when}".format(value = churn[peak] / 1024 / 1024, when = ns_to_datetime((first_minute + peak) * 60 * NANOS_PER_SECOND).strftime("%Y-%m-%d %H:%M")))
+
+    reenqueue_delays = analysis.average_reenqueue_delays()
+    print("Thrashing call targets:")
+    print("{compilations:>12} | {evicted:>10} | {ratio:>6} | {cycles:>8} | {delay:>16} | {churned:>12} | {id:>10} | {name:>50} | {source:>50}"
+            .format(compilations = "Compilations", evicted = "Evicted", ratio = "Ratio", cycles = "Cycles", delay = "AvgReenqueue(s)", churned = "Churned(MB)", id = "ID", name = "Method", source = "Source"))
+    for target in thrashing[:THRASH_TOP]:
+        ct = call_targets[analysis.key_of(target)]
+        print(f"{analysis.compilations[target]:>12} | "
+              f"{analysis.evictions[target]:>10} | "
+              f"{analysis.thrash_ratios[target]:>6.2f} | "
+              f"{analysis.recompile_cycles[target]:>8} | "
+              f"{reenqueue_delays[target] / NANOS_PER_SECOND:>16.2f} | "
+              f"{analysis.churned_bytes[target] / 1024 / 1024:>12.2f} | "
+              f"{ct.id:>10} | {ct.name:>50} | {ct.source:>50}")
+
+
+# Number of call targets and invalidation reasons listed by the deopts report
+STORM_TOP = 20
+
+
+def deopts(args, call_targets: dict[CallTargetKey, CallTarget], truffle_events: EventStore) -> None:
+    window_ns = int(args.storm_window * NANOS_PER_SECOND)
+    analysis = DeoptAnalysis(truffle_events, window_ns, int(args.short_lived * NANOS_PER_SECOND))
+    busiest, busiest_end = analysis.busiest_window(window_ns)
+    storms = analysis.storm_targets(args.storm_threshold)
+    looping = analysis.recompile_counts > 0
+    print("Number of deoptimizations.................................: {value}".format(value = int(analysis.deopt_counts.sum())))
+    print("Number of invalidations...................................: {value}".format(value = int(analysis.inval_counts.sum())))
+    print("{label:.<58}: {value}".format(label = f"Most deopts/invalidations within {args.storm_window}s", value = busiest), end = "")
+    print(f" (up to {ns_to_datetime(busiest_end)})" if busiest > 0 else "")
+    print("{label:.<58}: {value}".format(label = f"Call targets with >= {args.storm_threshold} within {args.storm_window}s", value = len(storms)))
+    print("Recompilations right after a deopt/invalidation...........: {value}".format(value = int(analysis.recompile_counts.sum())))
+    print("Call targets in deopt -> recompile loops..................: {value}".format(value = int(looping.sum())))
+    print("{label:.<58}: {value:>.2f}".format(label = f"Compile time invalidated within {args.short_lived}s (Sec)", value = analysis.wasted_times.sum() / 1000))
+
+    print(f"Call targets with the most deopts/invalidations within {args.storm_window}s:")
+    print("{peak:>10} | {when:>23} | {deopts:>8} | {invals:>8} | {recompiles:>10} | {wasted:>15} | {id:>10} | {name:>50} | {source:>50}"
+            .format(peak = "Peak", when = "PeakAt", deopts = "Deopts", invals = "Invals", recompiles = "Recompiles", wasted = "WastedTime(ms)", id = "ID", name = "Method", source = "Source"))
+    for target in storms[:STORM_TOP]:
+        ct = call_targets[analysis.target_key(target)]
+        print(f"{analysis.peaks[target]:>10} | "
+              f"{ns_to_datetime(analysis.peak_timestamps[target]).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]:>23} | "
+              f"{analysis.deopt_counts[target]:>8} | "
+              f"{analysis.inval_counts[target]:>8} | "
+              f"{analysis.recompile_counts[target]:>10} | "
+              f"{analysis.wasted_times[target]:>15} | "
+              f"{ct.id:>10} | {ct.name:>50} | {ct.source:>50}")
+
+    print("Invalidation reasons:")
+    print("{invals:>10} | {targets:>10} | {wasted:>15} | {reason}".format(invals = "Invals", targets = "Targets", wasted = "WastedTime(ms)", reason = "Reason"))
+    for reason, count, targets, wasted in analysis.reasons(truffle_events)[:STORM_TOP]:
+        print(f"{count:>10} | {targets:>10} | {wasted:>15} | {reason}")
+
+
+def query(text: str, hotspot_events: EventStore, truffle_events: EventStore) -> None:
+    try:
+        columns = EventQuery.parse(text).run(truffle_events, hotspot_events)
+    except ValueError as e:
+        print(f"Invalid query: {e}")
+        return
 
+    cells = [column.cells() for column in columns]
+    widths = [max([len(column.label)] + [len(cell) for cell in column_cells]) for column, column_cells in zip(columns, cells)]
+    aligns = ['<' if column.is_text() else '>' for column in columns]
+    print(" | ".join(f"{column.label:{align}{width}}" for column, align, width in zip(columns, aligns, widths)))
+    for row in zip(*cells):
+        print(" | ".join(f"{cell:{align}{width}}" for cell, align, width in zip(row, aligns, widths)))
+    num_rows = len(cells[0]) if len(cells) > 0 else 0
+    print(f"({num_rows} {'row' if num_rows == 1 else 'rows'})")
 
 
-def comp_pareto(call_targets: dict[id, CallTarget]):
+def comp_pareto(call_targets: dict[CallTargetKey, CallTarget]):
     counts = [0] * 101
     for ct in call_targets.values():
         counts[len(ct.dones)] += 1
@@ -343,7 +617,7 @@ def comp_pareto(call_targets: dict[id, CallTarget]):
         print("{freq:>5} | {count:>5} | {curr_perc:>7.2f}% | {acc_perc:>7.2f}%".format(freq = freq, count = counts[freq], curr_perc = curr_perc*100, acc_perc = acc_perc*100))
 
 
-def hotspots(hsize: int, call_targets: dict[id, CallTarget]):
+def hotspots(hsize: int, call_targets: dict[CallTargetKey, CallTarget]):
     def compare(entry1: CallTarget, entry2: CallTarget):
         if entry2.exec_count() != entry1.exec_count():
             return entry2.exec_count() - entry1.exec_count()
@@ -381,8 +655,8 @@ def hotspots(hsize: int, call_targets: dict[id, CallTarget]):
 
     for i in range(0, hsize):
         target = targets[i]
-        amount_of_produced_code = sum(dn.code_size_in_bytes for dn in target.dones) / 1024
-        amount_of_time_compiling = sum(dn.comp_time for dn in target.dones)
+        amount_of_produced_code = target.summary.code_size / 1024
+        amount_of_time_compiling = target.summary.comp_time
 
         print(f"{len(target.dones):>10} | "
               f"{amount_of_time_compiling:>15} | "
@@ -398,96 +672,304 @@ def hotspots(hsize: int, call_targets: dict[id, CallTarget]):
               f"{target.source:>50}")
 
 
-def parse_log_file(args) -> tuple[list[TruffleEngineOptLogEntry], list[TruffleEngineOptLogEntry]]:
-    hotspot_events: list[TruffleEngineOptLogEntry] = []
-    truffle_events: list[TruffleEngineOptLogEntry] = []
-
-    with open(args.logfile, 'r') as file:
-        for line in file:
-            stripped = line.rstrip()
-            if stripped.startswith("[engine] opt"):
-                entry = ParseTruffleEngineOptLogEntry(stripped).entry()
-                if entry is not None:
-                    truffle_events.append(entry)
-                elif args.trace:
-                    print(f"Ignoring engine log entry: {stripped}")
-            elif stripped.find("*flushing ") >= 0:
-                entry = ParseHotspotLogEntry(stripped).entry()
-                if entry is not None:
-                    hotspot_events.append(entry)
-                elif args.trace:
-                    print(f"Ignoring codecache log entry: {stripped}")
-            elif args.trace:
-                print(f"Ignoring log entry: {stripped}")
+def parse_log_file(args, path: str, start: int = 0, end: Optional[int] = None,
+                   profile: Optional[ParseProfile] = None) -> tuple[EventStore, EventStore]:
+    if end is None:
+        end = os.path.getsize(path)
 
-    return hotspot_events, truffle_events
+    compression = detect_compression(path)
+    if compression is not None:
+        # A compressed stream can't be split into byte ranges, so it's always decompressed and parsed from its start
+        if args.verbose:
+            print(f"Decompressing {compression} log file {path}")
+        parser = LogLineParser(args.trace, parser=args.parser, profile=profile)
+        parser.parse_blocks(decompressed_blocks(path, compression))
+        return parser.result()
 
+    if args.jobs > 1:
+        return ParallelLogParser(path, args.jobs, args.trace, args.parser).parse(start, end, profile)
 
-def collect_call_targets(events: list[TruffleEngineOptLogEntry]) -> dict[int, CallTarget]:
-    call_targets: dict[int, CallTarget] = {}
+    parser = LogLineParser(args.trace, parser=args.parser, profile=profile)
+    parser.parse_byte_range(path, start, end)
+    return parser.result()
 
-    for event in events:
-        if event.id not in call_targets:
-            call_targets[event.id] = CallTarget(id=event.id, name=event.name, source=event.source)
 
-    return call_targets
+def load_log_file(args, path: str, profile: Optional[ParseProfile] = None) -> tuple[EventStore, EventStore]:
+    size = os.path.getsize(path)
+    # A trailing line without newline may still be being written. It's parsed for this run but kept out of the
+    # snapshot, so that the next run parses it again once it's complete.
+    compressed = detect_compression(path) is not None
+    checkpoint = size if compressed else complete_lines_end(path, size)
 
+    # Tracing reports every ignored line, which only happens while actually parsing
+    if args.no_cache or args.trace:
+        hotspot_events, truffle_events = parse_log_file(args, path, 0, checkpoint, profile)
+    else:
+        snapshot = load_snapshot(args, path, checkpoint, compressed, profile)
+        hotspot_events, truffle_events = snapshot.hotspot_events, snapshot.truffle_events
+
+    if checkpoint < size:
+        try:
+            tail_hotspot_events, tail_truffle_events = parse_log_file(args, path, checkpoint, size, profile)
+        except ValueError as e:
+            # Cut off in the middle of being written
+            if args.verbose:
+                print(f"Skipping the incomplete last line of {path}: {e}")
+        else:
+            hotspot_events.extend(tail_hotspot_events)
+            truffle_events.extend(tail_truffle_events)
 
-def populate_events_to_call_targets(
-        call_targets: dict[int, CallTarget],
-        hotspot_events: list[TruffleEngineOptLogEntry],
-        truffle_events: list[TruffleEngineOptLogEntry]) -> None:
+    return hotspot_events, truffle_events
 
-    # TODO -> I don't think call target names are necessarily unique so this seems like different targets
-    #         may collide on the same name
-    speedup: dict[str, CallTarget] = {}
-    for ct in call_targets.values():
-        speedup[ct.name] = ct
 
-    for truffle_event in truffle_events:
-        if truffle_event.log_event_type == LogEventType.Start :
-            call_targets[truffle_event.id].starts.append(truffle_event)
+def load_snapshot(args, path: str, checkpoint: int, compressed: bool, profile: Optional[ParseProfile]) -> Snapshot:
+    # Snapshot of the events up to 'checkpoint', from the cache and the bytes appended since it was taken
+    cache = ParsedLogCache(args.cache_dir, args.cache_size_mb * 1024 * 1024, args.verbose)
+    snapshot = cache.load(path)
+    if compressed and snapshot is not None and snapshot.offset < checkpoint:
+        # New compressed data (e.g., an appended gzip member) can't be parsed on its own
+        snapshot = None
+    if snapshot is None:
+        snapshot = Snapshot(*parse_log_file(args, path, 0, checkpoint, profile), offset=checkpoint)
+        store_snapshot(cache, path, snapshot)
+    elif snapshot.offset < checkpoint:
+        if args.verbose:
+            print(f"Parsing {checkpoint - snapshot.offset} bytes appended since the cache snapshot was taken")
+        hotspot_events, truffle_events = parse_log_file(args, path, snapshot.offset, checkpoint, profile)
+        snapshot.hotspot_events.extend(hotspot_events)
+        snapshot.truffle_events.extend(truffle_events)
+        snapshot.offset = checkpoint
+        store_snapshot(cache, path, snapshot)
+    elif args.verbose:
+        print(f"Loaded parsed events from cache snapshot {cache.snapshot_path(path)}")
+    return snapshot
+
+
+def expand_log_paths(patterns: list[str], literal: bool = False) -> list[str]:
+    paths = []
+    for pattern in patterns:
+        # Existing files are taken as they are, even if their names contain glob characters. With 'literal' all paths
+        # are, since a followed log may not have been created yet or may be in the middle of being rotated.
+        matches = [pattern] if literal or os.path.exists(pattern) else sorted(glob.glob(pattern))
+        if len(matches) == 0:
+            raise FileNotFoundError(f"No log file matches '{pattern}'")
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+def log_group(path: str) -> str:
+    # Rotated files of one log ('engine.log', 'engine.log.1', 'engine.log.2.gz', 'engine-2024-05-01.log', ...) come from
+    # the same process. Logs in different directories (e.g., one per host) are kept apart.
+    name = re.sub(r'\.(gz|xz|zst)$', '', os.path.basename(path))
+    name = re.sub(r'\.\d+$', '', name)
+    name = re.sub(r'[-_.]\d{4}-?\d{2}-?\d{2}(?=\.|$)', '', name)
+    return os.path.join(os.path.dirname(os.path.abspath(path)), name)
+
+
+def group_log_files(paths: list[str]) -> list[list[str]]:
+    # Log groups are numbered in order of first appearance; the number is the 'process' of their events
+    groups: dict[str, list[str]] = {}
+    for path in paths:
+        groups.setdefault(log_group(path), []).append(path)
+    return list(groups.values())
+
+
+def load_profiled_log_file(args, path: str) -> tuple[tuple[EventStore, EventStore], ParseProfile]:
+    profile = ParseProfile()
+    return load_log_file(args, path, profile), profile
+
+
+def load_log_files(args, profile: Optional[ParseProfile] = None) -> tuple[EventStore, EventStore]:
+    paths = [path for group in args.log_groups for path in group]
+    if len(paths) == 1:
+        return load_log_file(args, paths[0], profile)
+
+    if args.jobs > 1:
+        # Each file is parsed by one worker process; splitting them further isn't worth it
+        file_args = argparse.Namespace(**{**vars(args), 'jobs': 1})
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            if profile is None:
+                results = list(executor.map(load_log_file, [file_args] * len(paths), paths))
+            else:
+                results = []
+                for stores, file_profile in executor.map(load_profiled_log_file, [file_args] * len(paths), paths):
+                    results.append(stores)
+                    file_profile.worker_processes = True
+                    profile.merge(file_profile)
+    else:
+        results = [load_log_file(args, path, profile) for path in paths]
 
-        elif truffle_event.log_event_type == LogEventType.Enqueued :
-            call_targets[truffle_event.id].enqueues.append(truffle_event)
+    processes = {path: process for process, group in enumerate(args.log_groups) for path in group}
+    for path, stores in zip(paths, results):
+        for store in stores:
+            store.columns['process'] = np.full(len(store), processes[path], dtype=store.columns['process'].dtype)
 
-        elif truffle_event.log_event_type == LogEventType.Dequeued:
-            call_targets[truffle_event.id].dequeues.append(truffle_event)
+    return (EventStore.merge([hotspot_events for hotspot_events, _ in results]),
+            EventStore.merge([truffle_events for _, truffle_events in results]))
 
-        elif truffle_event.log_event_type == LogEventType.Done :
-            call_targets[truffle_event.id].dones.append(truffle_event)
 
-        elif truffle_event.log_event_type == LogEventType.Deoptimization :
-            call_targets[truffle_event.id].deopts.append(truffle_event)
+def load_run(args, log_groups: list[list[str]]) -> tuple[EventStore, EventStore]:
+    return load_log_files(argparse.Namespace(**{**vars(args), 'log_groups': log_groups}))
 
-        elif truffle_event.log_event_type == LogEventType.Invalidation :
-            call_targets[truffle_event.id].invals.append(truffle_event)
 
-        elif truffle_event.log_event_type == LogEventType.Failed:
-            call_targets[truffle_event.id].failures.append(truffle_event)
+def diff(args) -> None:
+    runs = [args.base_groups, args.candidate_groups]
+    if args.jobs > 1:
+        # Each run is loaded by one worker process, which splits its share of the jobs among the files of the run
+        run_args = argparse.Namespace(**{**vars(args), 'jobs': max(1, args.jobs // 2)})
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(load_run, [run_args] * 2, runs))
+    else:
+        results = [load_run(args, log_groups) for log_groups in runs]
+
+    call_targets = []
+    for hotspot_events, truffle_events in results:
+        targets = collect_call_targets(truffle_events)
+        populate_events_to_call_targets(targets, hotspot_events, truffle_events)
+        call_targets.append(targets)
+    log_diff = LogDiff(call_targets[0], results[0][1], call_targets[1], results[1][1])
+
+    print(f"Base.......: {', '.join(path for group in args.base_groups for path in group)}")
+    print(f"Candidate..: {', '.join(path for group in args.candidate_groups for path in group)}")
+    print("{label:<40} | {base:>15} | {candidate:>15} | {delta:>15} | {change:>10}".format(label = "Metric", base = "Base", candidate = "Candidate", delta = "Delta", change = "Change"))
+    def number(value, sign: str = '') -> str:
+        return f"{value:{sign},}" if isinstance(value, int) else f"{value:{sign},.2f}"
+
+    for label, base, candidate in log_diff.metrics():
+        change = f"{(candidate - base) / base:>+10.1%}" if base != 0 and not np.isnan(base) and not np.isnan(candidate) else f"{'':>10}"
+        print(f"{label:<40} | {number(base):>15} | {number(candidate):>15} | {number(candidate - base, '+'):>15} | {change}")
+
+    print("{label:.<58}: {value}".format(label = "Methods in both runs (call targets by name and source)", value = log_diff.matched()))
+    print("  Only in base............................................: {value}".format(value = log_diff.only_in_base()))
+    print("  Only in candidate.......................................: {value}".format(value = log_diff.only_in_candidate()))
+
+    regressions = log_diff.regressions()
+    print(f"Methods whose compile time grew the most ({len(regressions)} grew):")
+    print("{delta:>15} | {base_time:>15} | {candidate_time:>15} | {base_comps:>10} | {candidate_comps:>10} | {failures:>10} | {evictions:>10} | {name:>50} | {source:>50}"
+            .format(delta = "Delta(ms)", base_time = "BaseTime(ms)", candidate_time = "CandTime(ms)", base_comps = "BaseComps", candidate_comps = "CandComps", failures = "+Failures", evictions = "+Evictions", name = "Method", source = "Source"))
+    for (name, source), base, candidate in regressions[:args.top]:
+        print(f"{candidate.comp_time - base.comp_time:>15} | "
+              f"{base.comp_time:>15} | "
+              f"{candidate.comp_time:>15} | "
+              f"{base.compilations:>10} | "
+              f"{candidate.compilations:>10} | "
+              f"{candidate.failures - base.failures:>+10} | "
+              f"{candidate.evictions - base.evictions:>+10} | "
+              f"{name:>50} | {source:>50}")
+
+
+def follow(args) -> None:
+    # Like 'tail -F': only the window of the most recent log time is kept, however long the log is followed
+    follower = LogFollower(args.log_groups[0][0], args.from_start)
+    window = RollingWindowStats(args.window)
+    next_refresh = time.monotonic() + args.refresh
+    try:
+        while True:
+            lines = follower.read_lines()
+            if lines:
+                parser = LogLineParser(args.trace, parser=args.parser)
+                for line in lines:
+                    # A corrupted or truncated line is reported and skipped rather than ending the session
+                    try:
+                        parser.parse(line)
+                    except ValueError as e:
+                        print(f"Skipping log line that could not be parsed ({e}): {line.rstrip()}")
+                window.add(*parser.result())
+
+            if time.monotonic() >= next_refresh:
+                window.print_completed_minutes()
+                if window.latest_ns > 0:
+                    window.print_stats(args.window)
+                next_refresh = time.monotonic() + args.refresh
+
+            if not lines:
+                time.sleep(min(1.0, args.refresh))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+
+
+def store_snapshot(cache: ParsedLogCache, path: str, snapshot: Snapshot) -> None:
+    try:
+        cache.store(path, snapshot)
+    except OSError as e:
+        print(f"Could not write cache snapshot: {e}")
+
+
+def collect_call_targets(events: EventStore) -> dict[CallTargetKey, CallTarget]:
+    call_targets: dict[CallTargetKey, CallTarget] = {}
+
+    # The first event of each target provides its name and source. Targets are kept in order of first appearance.
+    first_indices = np.sort([indices[0] for _, indices in
+                             group_indices([events.process, events.engine_id, events.id])]).astype(np.int64)
+    for i in first_indices:
+        target = CallTarget(id=int(events.id[i]),
+                            name=events.string('name', events.name[i]),
+                            source=events.string('source', events.source[i]),
+                            process=int(events.process[i]),
+                            engine_id=int(events.engine_id[i]))
+        call_targets[target.key] = target
 
-        elif truffle_event.log_event_type == LogEventType.Flushed:
-            call_targets[truffle_event.id].flushed.append(truffle_event)
+    return call_targets
 
-        elif truffle_event.log_event_type == LogEventType.Disabled:
-            call_targets[truffle_event.id].disabled.append(truffle_event)
 
-        elif truffle_event.log_event_type == LogEventType.Enabled:
-            call_targets[truffle_event.id].enabled.append(truffle_event)
+def group_indices(keys: list[np.ndarray]) -> list[tuple[tuple[int, ...], np.ndarray]]:
+    # Groups the row indices by the given key columns. Within a group the indices keep their original (file) order.
+    if len(keys[0]) == 0:
+        return []
 
-        elif truffle_event.log_event_type == LogEventType.TransferToInterpreter:
-            if truffle_event.name in speedup:
-                target = speedup[truffle_event.name]
-                call_targets[target.id].ttis.append(truffle_event)
+    order = np.lexsort(keys[::-1])
+    sorted_keys = [key[order] for key in keys]
+    changes = np.zeros(len(order), dtype=bool)
+    changes[0] = True
+    for key in sorted_keys:
+        changes[1:] |= key[1:] != key[:-1]
+    starts = np.flatnonzero(changes)
+    ends = np.append(starts[1:], len(order))
 
-    truffle_id_to_hotspot_id: dict[int, int]= {}
-    for ct in call_targets.values():
-        for done in ct.dones:
-            truffle_id_to_hotspot_id[done.comp_id] = ct.id
+    return [(tuple(int(key[s]) for key in sorted_keys), order[s:e]) for s, e in zip(starts, ends)]
 
-    for hotspot_event in hotspot_events:
-        if hotspot_event.comp_id in truffle_id_to_hotspot_id:
-            call_targets[truffle_id_to_hotspot_id[hotspot_event.comp_id]].evictions.append(hotspot_event)
+
+def populate_events_to_call_targets(
+        call_targets: dict[CallTargetKey, CallTarget],
+        hotspot_events: EventStore,
+        truffle_events: EventStore,
+        profiler: Optional[Profiler] = None) -> None:
+
+    # TODO -> I don't think call target names are necessarily unique so this seems like different targets
+    #         may collide on the same name
+    speedup: dict[tuple[int, int, str], CallTarget] = {}
+    for ct in call_targets.values():
+        speedup[ct.process, ct.engine_id, ct.name] = ct
+
+    with profile_stage(profiler, "populate.attach"):
+        for (process, engine_id, ct_id, event_type), indices in group_indices([truffle_events.process, truffle_events.engine_id, truffle_events.id, truffle_events.log_event_type]):
+            event_type = LogEventType(event_type)
+            if event_type != LogEventType.TransferToInterpreter and event_type != LogEventType.CacheFlushing:
+                call_targets[process, engine_id, ct_id].attach(event_type, truffle_events, indices)
+
+    with profile_stage(profiler, "populate.transfer_to_interpreter"):
+        ttis = np.flatnonzero(truffle_events.log_event_type == LogEventType.TransferToInterpreter.value)
+        for (process, engine_id, name), indices in group_indices([truffle_events.process[ttis], truffle_events.engine_id[ttis], truffle_events.name[ttis]]):
+            name = truffle_events.string('name', name)
+            if (process, engine_id, name) in speedup:
+                speedup[process, engine_id, name].attach(LogEventType.TransferToInterpreter, truffle_events, ttis[indices])
+
+    with profile_stage(profiler, "populate.evictions"):
+        # Compilation ids are unique within a process (they are HotSpot's), so a flush is attached to the target of the
+        # 'done' event with its compilation id, whatever the engine of that target
+        dones = np.flatnonzero(truffle_events.log_event_type == LogEventType.Done.value)
+        done_of_comp_id: dict[tuple[int, int], int] = dict(zip(zip(truffle_events.process[dones].tolist(),
+                                                                   truffle_events.comp_id[dones].tolist()),
+                                                               dones.tolist()))
+
+        owners = np.array([done_of_comp_id.get(key, -1)
+                           for key in zip(hotspot_events.process.tolist(), hotspot_events.comp_id.tolist())], dtype=np.int64)
+        evicted = np.flatnonzero(owners >= 0)
+        owners = owners[evicted]
+        for (process, engine_id, ct_id), indices in group_indices([hotspot_events.process[evicted], truffle_events.engine_id[owners], truffle_events.id[owners]]):
+            call_targets[process, engine_id, ct_id].attach(LogEventType.CacheFlushing, hotspot_events, evicted[indices])
 
 
 def repl_prompt():
@@ -525,83 +1007,306 @@ def repl_prompt():
                 print("Missing granularity to list comp_rate.")
         elif cmd == "comp_pareto":
             return ReplCommand.CompPareto, None
+        elif cmd == "queue":
+            if len(parts) > 1:
+                return ReplCommand.Queue, [parts[1]]
+            else:
+                print("Missing granularity to list queue.")
+        elif cmd == "code_cache":
+            if len(parts) > 1:
+                return ReplCommand.CodeCache, [parts[1]]
+            else:
+                print("Missing granularity to list code_cache.")
+        elif cmd == "deopts":
+            return ReplCommand.Deopts, None
+        elif cmd == "thrash":
+            return ReplCommand.Thrash, None
         elif cmd == "filename":
             return ReplCommand.FileName, None
+        elif cmd.lower() == "select":
+            return ReplCommand.Query, [line]
         else:
             print(f"What's '{cmd}' ?!?")
 
 
 
 def repl(args,
-         call_targets: dict[int, CallTarget],
-         hotspot_events: list[TruffleEngineOptLogEntry],
-         truffle_events: list[TruffleEngineOptLogEntry]) -> None:
+         call_targets: dict[CallTargetKey, CallTarget],
+         hotspot_events: EventStore,
+         truffle_events: EventStore) -> None:
     while True:
         cmd, info = repl_prompt()
         if cmd == ReplCommand.Quit:
             return
         elif cmd == ReplCommand.Stats:
-            stats(args, call_targets)
+            stats(args, call_targets, hotspot_events, truffle_events)
         elif cmd == ReplCommand.Histogram:
             histogram(info[0], call_targets)
         elif cmd == ReplCommand.CallId:
-            details_for_call_id(info[0], call_targets)
+            details_for_call_id(args, info[0], call_targets)
         elif cmd == ReplCommand.Hotspots:
             hotspots(info[0], call_targets)
         elif cmd == ReplCommand.CompRate:
             comp_rate(info[0], call_targets)
         elif cmd == ReplCommand.FileName:
-            print(args.logfile)
+            print("\n".join(path for group in args.log_groups for path in group))
         elif cmd == ReplCommand.CompPareto:
             comp_pareto(call_targets)
+        elif cmd == ReplCommand.Queue:
+            queue(args, info[0], truffle_events)
+        elif cmd == ReplCommand.CodeCache:
+            code_cache(args, info[0], call_targets, hotspot_events, truffle_events)
+        elif cmd == ReplCommand.Deopts:
+            deopts(args, call_targets, truffle_events)
+        elif cmd == ReplCommand.Thrash:
+            thrash(args, call_targets, hotspot_events, truffle_events)
+        elif cmd == ReplCommand.Query:
+            query(info[0], hotspot_events, truffle_events)
         else:
             print("What?!")
 
 
-def main():
-    parser = argparse.ArgumentParser(description='GraalVM Truffle Logs Utility')
-    parser.add_argument('logfile', type=str, help='Path of file containing Truffle engine logs.')
+def argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='GraalVM Truffle Logs Utility', epilog="Run 'truffle-logs diff BASE CANDIDATE' to compare two runs of the same workload.")
+    parser.add_argument('logfiles', type=str, nargs='+', help='Paths or glob patterns of files containing Truffle engine logs. Rotated files of one log are analyzed together; logs of different processes are kept apart.')
     parser.add_argument('--interactive', action='store_true', help='Enter the REPL mode.')
     parser.add_argument('--histogram', type=int, help='Print histogram with top N compilation targets with most compilations.')
     parser.add_argument('--stats', action='store_true', help='Print general information about compilations.')
     parser.add_argument('--call_id', type=int, help='Print all events related to the call target with the ID specified.')
-    parser.add_argument('--comp_rate', type=str, help='Print several statistics on a <hour/minute> granularity.')
+    parser.add_argument('--comp_rate', type=str, help='Print several statistics per time bucket: second, minute, hour, day, or a duration such as 10s, 5m, 2h or 1d.')
     parser.add_argument('--comp_pareto', action='store_true', help='Print pareto chart of number of call targets by number of compilations.')
     parser.add_argument('--hotspots', type=int, help='Print top N methods most executed.')
+    parser.add_argument('--code_cache', type=str, help='Print lifetimes of compiled code, the live code over time per <granularity> (as in --comp_rate) and the targets with most compile time wasted on short-lived code.')
+    parser.add_argument('--queue', type=str, help='Print compile queue wait latencies and the queue depth, load and compiler thread use per <granularity> (as in --comp_rate).')
+    parser.add_argument('--compiler_threads', type=int, help='With --queue, number of compiler threads. Defaults to the most compilations seen running at once.')
+    parser.add_argument('--thrash', action='store_true', help='Print code cache thrashing per call target: evicted compilations, recompile cycles after eviction, time from eviction to re-enqueue and evicted code per minute.')
+    parser.add_argument('--thrash_ratio', type=float, default=0.9, help='With --thrash and --stats, share of its compilations that must have been evicted for a call target to thrash.')
+    parser.add_argument('--thrash_cycles', type=int, default=1, help='With --thrash and --stats, recompilations after an eviction needed for a call target to thrash.')
+    parser.add_argument('--deopts', action='store_true', help='Print deoptimization/invalidation storms per call target, deopt -> recompile loops, invalidation reasons and compile time wasted on code invalidated within --short_lived seconds.')
+    parser.add_argument('--storm_window', type=float, default=10, help='With --deopts, seconds of the sliding window deopts and invalidations are counted in.')
+    parser.add_argument('--storm_threshold', type=int, default=5, help='With --deopts, call targets with at least this many deopts and invalidations within one window are listed.')
+    parser.add_argument('--query', type=str, help="Run a query over the events, e.g. \"select tier, count(), p99(comp_time) from done group by tier\" (see the README).")
+    parser.add_argument('--export_events', type=str, help='Write all events as a table to a .parquet, .feather (both need pyarrow) or .csv file.')
+    parser.add_argument('--export_call_targets', type=str, help='Write one row per call target with its event counts and totals to a .parquet, .feather or .csv file.')
+    parser.add_argument('--short_lived', type=float, default=60, help='With --code_cache and --deopts, compiled code evicted or invalidated within this many seconds counts as wasted.')
+    add_parsing_arguments(parser)
+    parser.add_argument('--follow', action='store_true', help='Keep reading the log file as it grows and periodically print rolling statistics.')
+    parser.add_argument('--from_start', action='store_true', help='With --follow, read the log file from its start instead of its end.')
+    parser.add_argument('--refresh', type=float, default=10, help='With --follow, seconds between printing statistics.')
+    parser.add_argument('--window', type=int, default=60, help='With --follow, minutes of log time covered by the rolling statistics.')
+    parser.add_argument('--profile', action='store_true', help='Print the wall and CPU time of every stage, parsing throughput and counts per line kind, and peak memory.')
+    parser.add_argument('--profile_output', type=str, help='Write cProfile statistics of the whole run to this file (readable with pstats).')
+    parser.add_argument('--engine', type=int, help='Only analyze the call targets of the Truffle engine with this id (engine=N in the log).')
+    parser.add_argument('--per_engine', action='store_true', help='Run the reports once per Truffle engine instead of over all engines together; with --jobs, engines are analyzed in parallel.')
     parser.add_argument('--verbose', action='store_true', help='Print tracing messages.')
     parser.add_argument('--trace', action='store_true', help='Print detailed tracing messages.')
+    return parser
+
+
+def add_parsing_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--jobs', type=int, default=1, help='Number of worker processes used to parse the log files.')
+    parser.add_argument('--parser', choices=PARSERS, default='fast', help='Parser used for "[engine] opt" lines.')
+    parser.add_argument('--cache_dir', type=str, default=default_cache_dir(), help='Directory for snapshots of parsed log files.')
+    parser.add_argument('--cache_size_mb', type=int, default=1024, help='Maximum size of the snapshot directory in MB.')
+    parser.add_argument('--no_cache', action='store_true', help='Always parse the log file, without reading or writing snapshots.')
+
+
+def diff_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='truffle-logs diff', description='Compare the compilations of two runs of the same workload, e.g. before and after a GraalVM upgrade.')
+    parser.add_argument('base', type=str, help='Path or glob pattern of the log files of the base run.')
+    parser.add_argument('candidate', type=str, help='Path or glob pattern of the log files of the candidate run.')
+    parser.add_argument('--top', type=int, default=20, help='Number of methods whose compile time grew the most to list.')
+    add_parsing_arguments(parser)
+    # The two runs are loaded at the same time, one per worker process
+    parser.set_defaults(jobs=2)
+    parser.add_argument('--verbose', action='store_true', help='Print tracing messages.')
+    parser.add_argument('--trace', action='store_true', help='Print detailed tracing messages.')
+    return parser
+
+
+def diff_main(argv: list[str]) -> None:
+    parser = diff_argument_parser()
+    args = parser.parse_args(argv)
+    if args.trace:
+        args.verbose = True
+
+    try:
+        args.base_groups = group_log_files(expand_log_paths([args.base]))
+        args.candidate_groups = group_log_files(expand_log_paths([args.candidate]))
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    diff(args)
+
+
+def main():
+    if sys.argv[1:2] == ['diff']:
+        diff_main(sys.argv[2:])
+        return
+
+    parser = argument_parser()
 
     args = parser.parse_args()
     if args.trace:
         args.verbose = True
 
-    hotspot_events, truffle_events = parse_log_file(args)
+    try:
+        args.log_groups = group_log_files(expand_log_paths(args.logfiles, literal=args.follow))
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    export_paths = [path for path in (args.export_events, args.export_call_targets) if path is not None]
+    if len(export_paths) > 0:
+        # pandas takes a while to import, so it's only imported when exporting
+        from .dataframes import check_export_path
+        for path in export_paths:
+            try:
+                check_export_path(path)
+            except (RuntimeError, ValueError) as e:
+                parser.error(str(e))
+
+    if args.per_engine and (args.interactive or len(export_paths) > 0):
+        parser.error("--per_engine can't be combined with --interactive, --export_events or --export_call_targets")
+
+    if args.follow:
+        if len(args.log_groups) != 1 or len(args.log_groups[0]) != 1:
+            parser.error("--follow takes a single log file")
+        follow(args)
+        return
+
+    profiler = Profiler() if args.profile else None
+    cprofile = cProfile.Profile() if args.profile_output is not None else None
+    if cprofile is not None:
+        cprofile.enable()
+    try:
+        analyze(args, profiler)
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(args.profile_output)
+            print(f"cProfile statistics written to {args.profile_output} (python -m pstats {args.profile_output})")
+        if profiler is not None:
+            profiler.print_report()
+
+
+def analyze(args, profiler: Optional[Profiler]) -> None:
+    with profile_stage(profiler, "parse"):
+        hotspot_events, truffle_events = load_log_files(args, profiler.parsing if profiler is not None else None)
     print("Parsing done.")
-    call_targets = collect_call_targets(truffle_events)
+
+    if args.engine is not None:
+        engines = [engine_id for engine_id in np.unique(truffle_events.engine_id).tolist() if engine_id != MISSING]
+        if args.engine not in engines:
+            sys.exit(f"truffle-logs: error: No events of engine {args.engine}. "
+                     f"Engines in the log: {', '.join(map(str, engines)) or '(none)'}")
+        hotspot_events, truffle_events = engine_events(hotspot_events, truffle_events, args.engine)
+    if args.per_engine:
+        analyze_engines(args, profiler, hotspot_events, truffle_events)
+    else:
+        analyze_events(args, profiler, hotspot_events, truffle_events)
+
+
+def engine_events(hotspot_events: EventStore, truffle_events: EventStore, engine_id: int) -> tuple[EventStore, EventStore]:
+    # Events of one engine. Code cache flushes have no engine; they go with the engine of the compilation they flush.
+    truffle_events = truffle_events.take(np.flatnonzero(truffle_events.engine_id == engine_id))
+    dones = truffle_events.log_event_type == LogEventType.Done.value
+    compilations = CodeCacheAnalysis.join_keys(truffle_events.process[dones], truffle_events.comp_id[dones])
+    flushes = np.isin(CodeCacheAnalysis.join_keys(hotspot_events.process, hotspot_events.comp_id), compilations)
+    return hotspot_events.take(np.flatnonzero(flushes)), truffle_events
+
+
+def engine_report(args, hotspot_events: EventStore, truffle_events: EventStore) -> str:
+    # Reports of one engine as text, so that the output of engines analyzed in worker processes doesn't interleave
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        analyze_events(args, None, hotspot_events, truffle_events)
+    return out.getvalue()
+
+
+def analyze_engines(args, profiler: Optional[Profiler], hotspot_events: EventStore, truffle_events: EventStore) -> None:
+    # Engines share no call targets, so each one is analyzed on its own, in a worker process of its own with --jobs
+    engines = np.unique(truffle_events.engine_id).tolist()
+    partitions = [engine_events(hotspot_events, truffle_events, engine_id) for engine_id in engines]
+    if args.jobs > 1 and len(engines) > 1:
+        if profiler is not None:
+            profiler.worker_processes = True
+        with profile_stage(profiler, "engines"), ProcessPoolExecutor(max_workers=min(args.jobs, len(engines))) as executor:
+            reports = executor.map(engine_report, [args] * len(engines), *zip(*partitions))
+            for engine_id, report in zip(engines, reports):
+                print(f"Engine {engine_id}:")
+                print(report, end="")
+    else:
+        for engine_id, (engine_hotspot_events, engine_truffle_events) in zip(engines, partitions):
+            print(f"Engine {engine_id}:")
+            analyze_events(args, profiler, engine_hotspot_events, engine_truffle_events)
+
+
+def analyze_events(args, profiler: Optional[Profiler], hotspot_events: EventStore, truffle_events: EventStore) -> None:
+    with profile_stage(profiler, "collect"):
+        call_targets = collect_call_targets(truffle_events)
     print("Collecting call targets done.")
-    populate_events_to_call_targets(call_targets, hotspot_events, truffle_events)
+    with profile_stage(profiler, "populate"):
+        populate_events_to_call_targets(call_targets, hotspot_events, truffle_events, profiler)
     print("Populating call targets done.")
 
     if args.interactive:
         repl(args, call_targets, hotspot_events, truffle_events)
     else:
         if args.histogram is not None and args.histogram > 0 :
-            histogram(args.histogram, call_targets)
+            with profile_stage(profiler, "report.histogram"):
+                histogram(args.histogram, call_targets)
 
         if args.call_id is not None and args.call_id > 0 :
-            details_for_call_id(args.call_id, call_targets)
+            with profile_stage(profiler, "report.call_id"):
+                details_for_call_id(args, args.call_id, call_targets)
 
         if args.comp_rate is not None and args.comp_rate != "" :
-            comp_rate(args.comp_rate, call_targets)
+            with profile_stage(profiler, "report.comp_rate"):
+                comp_rate(args.comp_rate, call_targets)
 
         if args.comp_pareto:
-            comp_pareto(call_targets)
+            with profile_stage(profiler, "report.comp_pareto"):
+                comp_pareto(call_targets)
 
         if args.hotspots is not None and args.hotspots > 0:
-            hotspots(args.hotspots, call_targets)
+            with profile_stage(profiler, "report.hotspots"):
+                hotspots(args.hotspots, call_targets)
+
+        if args.code_cache is not None and args.code_cache != "":
+            with profile_stage(profiler, "report.code_cache"):
+                code_cache(args, args.code_cache, call_targets, hotspot_events, truffle_events)
+
+        if args.queue is not None and args.queue != "":
+            with profile_stage(profiler, "report.queue"):
+                queue(args, args.queue, truffle_events)
+
+        if args.thrash:
+            with profile_stage(profiler, "report.thrash"):
+                thrash(args, call_targets, hotspot_events, truffle_events)
+
+        if args.deopts:
+            with profile_stage(profiler, "report.deopts"):
+                deopts(args, call_targets, truffle_events)
+
+        if args.query is not None and args.query != "":
+            with profile_stage(profiler, "report.query"):
+                query(args.query, hotspot_events, truffle_events)
+
+        if args.export_events is not None:
+            with profile_stage(profiler, "export.events"):
+                from .dataframes import events_frame, export_frame
+                frame = events_frame(truffle_events, hotspot_events)
+                export_frame(frame, args.export_events)
+            print(f"Exported {len(frame)} events to {args.export_events}")
+
+        if args.export_call_targets is not None:
+            with profile_stage(profiler, "export.call_targets"):
+                from .dataframes import call_targets_frame, export_frame
+                frame = call_targets_frame(call_targets)
+                export_frame(frame, args.export_call_targets)
+            print(f"Exported {len(frame)} call targets to {args.export_call_targets}")
 
         if args.stats:
-            stats(args, call_targets)
+            with profile_stage(profiler, "report.stats"):
+                stats(args, call_targets, hotspot_events, truffle_events)
 
 if __name__=="__main__":
     main()
\ No newline at end of file
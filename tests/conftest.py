@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from synthetic_log import generate
+from truffle_logs_analyzer.EventStore import FLOAT_COLUMNS, NUMERIC_COLUMNS, STRING_COLUMNS, EventStore
+
+
+@pytest.fixture
+def synthetic_log(tmp_path):
+    # Writes a seeded synthetic log and returns its path
+    def write(name: str = "engine.log", lines: int = 2000, **options) -> str:
+        path = tmp_path / name
+        with open(path, 'w') as out:
+            generate(out, lines, **options)
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def assert_same_events():
+    # Compares all columns of two stores. String codes depend on the order strings were interned in, so string
+    # columns are compared by their text.
+    def check(expected: EventStore, actual: EventStore) -> None:
+        assert len(actual) == len(expected)
+        for name in NUMERIC_COLUMNS:
+            np.testing.assert_array_equal(actual.columns[name], expected.columns[name], err_msg=name)
+        for name in FLOAT_COLUMNS:
+            np.testing.assert_array_equal(actual.columns[name], expected.columns[name], err_msg=name)
+        for name in STRING_COLUMNS:
+            assert ([actual.string(name, code) for code in actual.columns[name].tolist()] ==
+                    [expected.string(name, code) for code in expected.columns[name].tolist()]), name
+    return check
@@ -0,0 +1,159 @@
+import numpy as np
+import pytest
+
+from truffle_logs_analyzer.EventQuery import BoolOp, Comparison, EventQuery
+from truffle_logs_analyzer.EventStore import NUMERIC_COLUMNS, STRING_COLUMNS, EventStore
+from truffle_logs_analyzer.LogEventType import LogEventType
+from truffle_logs_analyzer.StringTable import MISSING
+from truffle_logs_analyzer.truffle_logs import query
+
+# (type, id, tier, comp_time, name, source); None is an absent value
+EVENTS = [
+    (LogEventType.Enqueued, 1, 1, None, "foo", "a.js:1"),
+    (LogEventType.Start, 1, 1, None, "foo", "a.js:1"),
+    (LogEventType.Done, 1, 1, 10, "foo", "a.js:1"),
+    (LogEventType.Enqueued, 1, 2, None, "foo", "a.js:1"),
+    (LogEventType.Start, 1, 2, None, "foo", "a.js:1"),
+    (LogEventType.Done, 1, 2, 40, "foo", "a.js:1"),
+    (LogEventType.Deoptimization, 1, None, None, "foo", "a.js:1"),
+    (LogEventType.Invalidation, 1, None, None, "foo", None),
+    (LogEventType.Enqueued, 2, 1, None, "bar", "b.js:7"),
+    (LogEventType.Start, 2, 1, None, "bar", "b.js:7"),
+    (LogEventType.Done, 2, 1, 25, "bar", "b.js:7"),
+    (LogEventType.Dequeued, 3, 2, None, None, None),
+]
+
+
+def make_store(events) -> EventStore:
+    store = EventStore.empty()
+    columns = {name: np.full(len(events), MISSING, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+    columns.update({name: np.full(len(events), np.nan) for name in ('rate', 'queue_load')})
+    columns.update({name: np.full(len(events), MISSING, dtype=np.int32) for name in STRING_COLUMNS})
+    for i, (event_type, id, tier, comp_time, name, source) in enumerate(events):
+        columns['log_event_type'][i] = event_type.value
+        columns['id'][i] = id
+        columns['tier'][i] = MISSING if tier is None else tier
+        columns['comp_time'][i] = MISSING if comp_time is None else comp_time
+        columns['timestamp'][i] = i * 1_000_000_000
+        columns['name'][i] = store.strings['name'].intern(name)
+        columns['source'][i] = store.strings['source'].intern(source)
+    columns['process'][:] = 0
+    store.columns = columns
+    return store
+
+
+@pytest.fixture
+def stores():
+    return make_store(EVENTS), EventStore.empty()
+
+
+def rows(stores, text: str) -> list[list[str]]:
+    columns = EventQuery.parse(text).run(*stores)
+    return [list(row) for row in zip(*(column.cells() for column in columns))]
+
+
+def indices(stores, where: str) -> list[int]:
+    # Positions of the matching events, by their timestamps in seconds
+    matched = EventQuery.parse(f"select timestamp from events where {where}").run(*stores)[0]
+    return (matched.values // 1_000_000_000).tolist()
+
+
+def test_parse():
+    query = EventQuery.parse("SELECT tier, count(*), p99.9(comp_time) AS slow FROM done "
+                             "WHERE source LIKE '%a.js%' AND NOT (tier = 2 OR tier IS NULL) "
+                             "GROUP BY tier ORDER BY slow DESC, 1 LIMIT 5;")
+    assert query.source == 'done'
+    assert [item.label for item in query.items] == ['tier', 'count()', 'slow']
+    assert query.items[2].expression.percentile == 99.9
+    assert query.group_by == ['tier']
+    assert query.order_by == [(2, True), (0, False)]
+    assert query.limit == 5
+    # 'not' is pushed down to the predicates
+    assert query.condition == BoolOp('and', Comparison('source', 'like', '%a.js%'),
+                                     BoolOp('and', Comparison('tier', '!=', 2), Comparison('tier', 'is not null')))
+
+
+@pytest.mark.parametrize("text", [
+    "select",
+    "select id from",
+    "select nope from events",
+    "select id from nowhere",
+    "select p101(comp_time) from done",
+    "select id from events where tier not = 1",
+    "select id from events order by name",
+    "select id from events limit",
+    "select id from events where name like 3",
+])
+def test_parse_errors(text):
+    with pytest.raises(ValueError):
+        EventQuery.parse(text)
+
+
+def test_nulls_and_not(stores):
+    assert indices(stores, "tier = 2") == [3, 4, 5, 11]
+    assert indices(stores, "tier != 2") == [0, 1, 2, 8, 9, 10]
+    assert indices(stores, "not (tier = 2)") == [0, 1, 2, 8, 9, 10]
+    assert indices(stores, "not not tier = 2") == [3, 4, 5, 11]
+    assert indices(stores, "not tier > 1") == [0, 1, 2, 8, 9, 10]
+    assert indices(stores, "tier is null") == [6, 7]
+    assert indices(stores, "not tier is null") == [0, 1, 2, 3, 4, 5, 8, 9, 10, 11]
+    assert indices(stores, "not (tier = 1 or name = 'bar')") == [3, 4, 5]
+    assert indices(stores, "not (tier = 1 or comp_time > 20)") == []
+    assert indices(stores, "not (tier = 2 and comp_time > 20)") == [0, 1, 2, 8, 9, 10]
+    assert indices(stores, "tier = 1 or comp_time > 20") == [0, 1, 2, 5, 8, 9, 10]
+    assert indices(stores, "tier = 2 and comp_time is not null") == [5]
+    assert indices(stores, "not source like '%.js%'") == []
+    assert indices(stores, "source not like 'a%'") == [8, 9, 10]
+    assert indices(stores, "not source not like 'a%'") == [0, 1, 2, 3, 4, 5, 6]
+
+
+def test_type_values(stores):
+    assert indices(stores, "type = 'deopt'") == [6]
+    assert indices(stores, "type = 'Deoptimization'") == [6]
+    assert indices(stores, "type in ('queued', 'start')") == [0, 1, 3, 4, 8, 9]
+    assert indices(stores, "type not in ('enqueued', 'start', 'done')") == [6, 7, 11]
+    assert indices(stores, "type != 'inval'") == [0, 1, 2, 3, 4, 5, 6, 8, 9, 10, 11]
+    assert indices(stores, "type like '%queued'") == [0, 3, 8, 11]
+    assert indices(stores, "not type like 'd%'") == [0, 1, 3, 4, 7, 8, 9]
+    for where in ("type = 'deopts'", "type in ('queued', 'nope')"):
+        with pytest.raises(ValueError):
+            EventQuery.parse(f"select id from events where {where}").run(*stores)
+
+
+def test_string_values(stores):
+    assert indices(stores, "name = 'bar'") == [8, 9, 10]
+    assert indices(stores, "name in ('bar', 'baz')") == [8, 9, 10]
+    assert indices(stores, "name not in ('bar')") == [0, 1, 2, 3, 4, 5, 6, 7]
+    assert indices(stores, "source like 'b.js:_'") == [8, 9, 10]
+    assert indices(stores, "name is null") == [11]
+
+
+def test_group_by(stores):
+    assert rows(stores, "select type, count() from events group by type order by 2 desc, 1") == [
+        ['done', '3'], ['enqueued', '3'], ['start', '3'], ['deoptimization', '1'], ['dequeued', '1'],
+        ['invalidation', '1']]
+    assert rows(stores, "select name, sum(comp_time), max(comp_time) from done group by name order by name") == [
+        ['bar', '25', '25'], ['foo', '50', '40']]
+    assert rows(stores, "select tier, count() from done where name = 'baz' group by tier") == []
+    assert rows(stores, "select count(), sum(comp_time), avg(comp_time) from done where name = 'baz'") == [
+        ['0', '', '']]
+
+
+@pytest.mark.parametrize("percentile", [0, 10, 50, 90, 99, 99.9, 100])
+def test_percentiles(percentile):
+    generator = np.random.default_rng(7)
+    comp_times = generator.integers(0, 1000, size=101)
+    tiers = generator.integers(1, 3, size=101)
+    store = make_store([(LogEventType.Done, i, int(tier), int(comp_time), "m", "s")
+                        for i, (tier, comp_time) in enumerate(zip(tiers, comp_times))])
+    columns = EventQuery.parse(f"select tier, p{percentile}(comp_time) from done group by tier").run(
+        store, EventStore.empty())
+    assert columns[0].values.tolist() == [1, 2]
+    for tier, value in zip(columns[0].values.tolist(), columns[1].values.tolist()):
+        assert value == pytest.approx(np.percentile(comp_times[tiers == tier], percentile))
+
+
+@pytest.mark.parametrize("where, footer", [("id = 3", "(1 row)"), ("id = 2", "(3 rows)"), ("id = 4", "(0 rows)")])
+def test_query_footer(stores, capsys, where, footer):
+    query(f"select id from events where {where}", stores[1], stores[0])
+    assert capsys.readouterr().out.splitlines()[-1] == footer
@@ -0,0 +1,86 @@
+import mmap
+
+import pytest
+
+from truffle_logs_analyzer.LogLineParser import HOTSPOT_MARKER, TRUFFLE_MARKER, LogLineParser, candidate_lines
+
+TRUFFLE = b"[engine] opt deopt    engine=1 id=118    fn118                         |Addr 0x7f00|UTC 2024-05-01T10:00:01.514|Src file1.js:118"
+HOTSPOT = b"[2024-05-01T10:00:02.119+0000] *flushing  nmethod 101/0x00007f00000065 level 4 size 1234"
+NOISE = b"2024-05-01 10:00:02,119 INFO  [worker-1] c.e.app.RequestHandler - handled request 1 in 5 ms"
+
+
+def expected_lines(buffer: bytes, start: int, end: int) -> list[bytes]:
+    # Lines of buffer[start:end] containing a marker, as splitting every line finds them
+    lines = buffer[start:end].splitlines(keepends=True)
+    return [line for line in lines if TRUFFLE_MARKER in line or HOTSPOT_MARKER in line]
+
+
+def test_lines_with_markers():
+    buffer = b"\n".join([NOISE, TRUFFLE, NOISE, NOISE, HOTSPOT, TRUFFLE, HOTSPOT, NOISE]) + b"\n"
+    assert list(candidate_lines(buffer, 0, len(buffer))) == [TRUFFLE + b"\n", HOTSPOT + b"\n", TRUFFLE + b"\n",
+                                                             HOTSPOT + b"\n"]
+
+
+def test_both_markers_in_one_line_yield_it_once():
+    line = NOISE + b" " + HOTSPOT + b" " + TRUFFLE + b"\n"
+    assert list(candidate_lines(line, 0, len(line))) == [line]
+
+
+def test_last_line_without_newline():
+    buffer = NOISE + b"\n" + TRUFFLE + b"\n" + HOTSPOT
+    assert list(candidate_lines(buffer, 0, len(buffer))) == [TRUFFLE + b"\n", HOTSPOT]
+
+
+def test_empty():
+    assert list(candidate_lines(b"", 0, 0)) == []
+    assert list(candidate_lines(b"\n\n", 0, 2)) == []
+    buffer = TRUFFLE + b"\n"
+    assert list(candidate_lines(buffer, len(buffer), len(buffer))) == []
+
+
+@pytest.mark.parametrize("split", range(1, len(TRUFFLE_MARKER)))
+def test_marker_split_by_the_range_end(split):
+    # A marker cut off by the end of the range isn't a marker, and the line after the range isn't looked at
+    buffer = NOISE + b"\n" + TRUFFLE + b"\n" + NOISE + b"\n"
+    end = len(NOISE) + 1 + split
+    assert list(candidate_lines(buffer, 0, end)) == []
+    assert list(candidate_lines(buffer, 0, len(buffer))) == [TRUFFLE + b"\n"]
+
+
+def test_ranges_split_at_every_line_find_every_line():
+    lines = [NOISE, TRUFFLE, HOTSPOT, NOISE, TRUFFLE, NOISE, NOISE, HOTSPOT, TRUFFLE]
+    buffer = b"\n".join(lines) + b"\n"
+    starts = [0] + [i + 1 for i, byte in enumerate(buffer) if byte == ord("\n")]
+    for middle in starts:
+        found = list(candidate_lines(buffer, 0, middle)) + list(candidate_lines(buffer, middle, len(buffer)))
+        assert found == expected_lines(buffer, 0, len(buffer))
+
+
+def test_mmap(tmp_path):
+    path = tmp_path / "engine.log"
+    content = b"\n".join([NOISE, TRUFFLE, NOISE, HOTSPOT]) + b"\n" + TRUFFLE[:40]
+    path.write_bytes(content)
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        assert list(candidate_lines(buffer, 0, len(buffer))) == expected_lines(content, 0, len(content))
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.log"
+    path.write_bytes(b"")
+    parser = LogLineParser()
+    parser.parse_byte_range(str(path), 0, 0)
+    hotspot_events, truffle_events = parser.result()
+    assert len(hotspot_events) == 0 and len(truffle_events) == 0
+
+
+def test_prefilter_finds_the_same_events_as_parsing_every_line(synthetic_log, assert_same_events):
+    path = synthetic_log(lines=3000)
+    with open(path, 'rb') as file:
+        size = len(file.read())
+    prefiltered = LogLineParser()
+    prefiltered.parse_byte_range(path, 0, size)
+    every_line = LogLineParser()
+    every_line.parse_all_lines(path, 0, size)
+    for expected, actual in zip(every_line.result(), prefiltered.result()):
+        assert len(expected) > 0
+        assert_same_events(expected, actual)
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from truffle_logs_analyzer import ParallelLogParser as parallel
+from truffle_logs_analyzer.LogLineParser import LogLineParser
+from truffle_logs_analyzer.ParallelLogParser import ParallelLogParser
+
+
+def sequential(path: str, start: int, end: int):
+    parser = LogLineParser()
+    parser.parse_byte_range(path, start, end)
+    return parser.result()
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Splits even small logs into many ranges
+    monkeypatch.setattr(parallel, 'MIN_CHUNK_SIZE', 512)
+
+
+def test_byte_ranges_end_at_line_ends(synthetic_log, small_chunks):
+    path = synthetic_log(lines=3000)
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    ranges = ParallelLogParser(path, 4).byte_ranges(0, size)
+    assert len(ranges) == 16
+    assert ranges[0][0] == 0 and ranges[-1][1] == size
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        # The tentative boundaries fall mid-line; every range starts right after a newline
+        assert data[start - 1:start] == b'\n'
+
+
+@pytest.mark.parametrize("jobs", [2, 3, 8])
+def test_same_events_as_sequential(synthetic_log, small_chunks, assert_same_events, jobs):
+    path = synthetic_log(lines=3000)
+    size = os.path.getsize(path)
+    expected_hotspot, expected_truffle = sequential(path, 0, size)
+    hotspot, truffle = ParallelLogParser(path, jobs).parse(0, size)
+    assert len(expected_truffle) > 0 and len(expected_hotspot) > 0
+    assert_same_events(expected_hotspot, hotspot)
+    assert_same_events(expected_truffle, truffle)
+
+
+def test_byte_range_within_the_file(synthetic_log, small_chunks, assert_same_events):
+    path = synthetic_log(lines=3000)
+    with open(path, 'rb') as file:
+        data = file.read()
+    # Ranges must start at the beginning of a line
+    start = data.index(b'\n', len(data) // 3) + 1
+    end = data.index(b'\n', 2 * len(data) // 3) + 1
+    expected_hotspot, expected_truffle = sequential(path, start, end)
+    hotspot, truffle = ParallelLogParser(path, 4).parse(start, end)
+    assert_same_events(expected_hotspot, hotspot)
+    assert_same_events(expected_truffle, truffle)
+
+
+def test_more_jobs_than_lines(synthetic_log, small_chunks, assert_same_events):
+    path = synthetic_log(lines=5, noise=0)
+    size = os.path.getsize(path)
+    assert len(ParallelLogParser(path, 64).byte_ranges(0, size)) <= 5
+    expected_hotspot, expected_truffle = sequential(path, 0, size)
+    hotspot, truffle = ParallelLogParser(path, 64).parse(0, size)
+    assert len(expected_truffle) == 5
+    assert_same_events(expected_hotspot, hotspot)
+    assert_same_events(expected_truffle, truffle)
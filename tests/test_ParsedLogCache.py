@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from truffle_logs_analyzer.LogLineParser import LogLineParser
+from truffle_logs_analyzer.ParsedLogCache import FINGERPRINT_BLOCK_SIZE, ParsedLogCache, Snapshot
+
+
+def parse(path: str) -> Snapshot:
+    parser = LogLineParser()
+    size = os.path.getsize(path)
+    parser.parse_byte_range(path, 0, size)
+    return Snapshot(*parser.result(), offset=size)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParsedLogCache(str(tmp_path / "cache"), 1024 * 1024 * 1024)
+
+
+def test_load_stored_snapshot(synthetic_log, cache, assert_same_events):
+    path = synthetic_log()
+    snapshot = parse(path)
+    cache.store(path, snapshot)
+
+    loaded = cache.load(path)
+    assert loaded.offset == snapshot.offset
+    assert_same_events(snapshot.hotspot_events, loaded.hotspot_events)
+    assert_same_events(snapshot.truffle_events, loaded.truffle_events)
+
+
+def test_appended_file_keeps_snapshot(synthetic_log, cache):
+    path = synthetic_log()
+    snapshot = parse(path)
+    cache.store(path, snapshot)
+    with open(path, 'a') as file:
+        file.write("appended line\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.load(path).offset == snapshot.offset
+
+
+def test_rewritten_in_place_at_same_size(synthetic_log, cache):
+    path = synthetic_log(lines=5000)
+    size = os.path.getsize(path)
+    assert size > 3 * FINGERPRINT_BLOCK_SIZE
+    cache.store(path, parse(path))
+
+    # Change a byte that neither the head nor the last block of the fingerprint covers
+    with open(path, 'r+b') as file:
+        file.seek(size // 2)
+        byte = file.read(1)
+        file.seek(size // 2)
+        file.write(b'x' if byte != b'x' else b'y')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert os.path.getsize(path) == size
+    assert cache.load(path) is None
+
+
+def test_truncated_file(synthetic_log, cache):
+    path = synthetic_log()
+    cache.store(path, parse(path))
+    with open(path, 'r+b') as file:
+        file.truncate(os.path.getsize(path) // 2)
+
+    assert cache.load(path) is None
@@ -0,0 +1,77 @@
+from truffle_logs_analyzer import RollingWindowStats as rolling
+from truffle_logs_analyzer.LogLineParser import LogLineParser
+from truffle_logs_analyzer.RollingWindowStats import RollingWindowStats
+
+
+# Log time of minute 0 of the test logs, in ns and in minutes since the epoch
+START_NS = 1714557600 * 10**9
+START_MINUTE = START_NS // (60 * 10**9)
+
+
+def utc(minute: int) -> str:
+    return f"2024-05-01T{10 + minute // 60:02}:{minute % 60:02}:00.000"
+
+
+def done(target: int, comp_id: int, minute: int) -> str:
+    return (f"[engine] opt done     engine=1 id={target:<6} fn{target:<28}|Tier 1|Time   100( 10+20 )ms|AST    10"
+            f"|Inlined   0Y   0N|IR     12/    24|CodeSize     1000|Addr 0x7f{comp_id:08x}|CompId {comp_id:6}"
+            f"|UTC {utc(minute)}|Src file.js:{target}")
+
+
+def deopt(target: int, minute: int) -> str:
+    return f"[engine] opt deopt    engine=1 id={target:<6} fn{target:<28}|Addr 0x7f00|UTC {utc(minute)}|Src file.js:{target}"
+
+
+def flushing(comp_id: int, minute: int) -> str:
+    return f"[{utc(minute)}+0000] *flushing  nmethod {comp_id}/0x00007f{comp_id:08x} level 4 size 1234"
+
+
+def add(window: RollingWindowStats, *lines: str) -> None:
+    parser = LogLineParser()
+    for line in lines:
+        parser.parse(line)
+    window.add(*parser.result())
+
+
+def test_flush_of_code_older_than_the_window_is_an_eviction():
+    window = RollingWindowStats(10)
+    add(window, done(1, 101, 0))
+    add(window, *(deopt(2, minute) for minute in range(1, 120)))
+    add(window, flushing(101, 120))
+    assert len(window.evictions) == 1
+    assert window.minutes[START_MINUTE + 120].evictions == 1
+    # Flushed code is forgotten, so flushing it again doesn't count
+    add(window, flushing(101, 121))
+    assert len(window.evictions) == 1
+
+
+def test_only_flushes_of_seen_compilations_count():
+    window = RollingWindowStats(10)
+    add(window, done(1, 101, 0), flushing(999, 1))
+    assert len(window.evictions) == 0
+
+
+def test_compilations_are_capped(monkeypatch):
+    monkeypatch.setattr(rolling, 'MAX_COMPILATIONS', 2)
+    window = RollingWindowStats(10)
+    add(window, done(1, 101, 0), done(2, 102, 0), done(3, 103, 0))
+    assert list(window.compilations) == [102, 103]
+    add(window, flushing(101, 1), flushing(103, 1))
+    assert len(window.evictions) == 1
+
+
+def test_expiry():
+    window = RollingWindowStats(10)
+    add(window, done(1, 101, 0), deopt(2, 0), deopt(3, 0))
+    add(window, deopt(2, 8))
+    assert set(window.targets) == {(1, 1), (1, 2), (1, 3)}
+
+    add(window, deopt(4, 15))
+    # The window starts at minute 5: target 2 had an event since, the others didn't
+    assert set(window.targets) == {(1, 2), (1, 4)}
+    assert len(window.dones) == 0
+    assert [timestamp for timestamp, _ in window.others] == [START_NS + 8 * 60 * 10**9, START_NS + 15 * 60 * 10**9]
+    assert len(window.target_events) == 2
+    assert len(window.minutes) == 0
+    # The compilation is still known for matching its flush
+    assert list(window.compilations) == [101]
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from truffle_logs_analyzer.TimestampDecoder import TimestampDecoder, datetime_to_ns
+
+# Consecutive timestamps crossing second, minute, hour, day, month and year boundaries, including a leap day, and
+# going back in time (lines slightly out of order)
+TRUFFLE_TIMESTAMPS = [
+    "2024-05-01T10:00:00.000",
+    "2024-05-01T10:00:00.999",
+    "2024-05-01T10:00:01.000",
+    "2024-05-01T10:00:00.500",
+    "2024-05-01T10:00:59.999",
+    "2024-05-01T10:01:00.001",
+    "2024-05-01T23:59:59.999",
+    "2024-05-02T00:00:00.000",
+    "2024-05-31T23:59:59.998",
+    "2024-06-01T00:00:00.002",
+    "2024-02-28T23:59:59.999",
+    "2024-02-29T00:00:00.000",
+    "2024-02-29T23:59:59.999",
+    "2024-03-01T00:00:00.000",
+    "2024-12-31T23:59:59.999",
+    "2025-01-01T00:00:00.000",
+    "1970-01-01T00:00:00.001",
+]
+
+
+def strptime_ns(s: str, format: str) -> int:
+    timestamp = datetime.strptime(s, format)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return datetime_to_ns(timestamp)
+
+
+def test_truffle_timestamps():
+    decoder = TimestampDecoder()
+    for s in TRUFFLE_TIMESTAMPS:
+        assert decoder.truffle(s) == strptime_ns(s, '%Y-%m-%dT%H:%M:%S.%f'), s
+
+
+def test_truffle_timestamps_every_millisecond_across_a_second():
+    decoder = TimestampDecoder()
+    start = datetime(2024, 5, 31, 23, 59, 59, tzinfo=timezone.utc)
+    for ms in range(0, 2000, 7):
+        s = (start + timedelta(milliseconds=ms)).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+        assert decoder.truffle(s) == strptime_ns(s, '%Y-%m-%dT%H:%M:%S.%f'), s
+
+
+@pytest.mark.parametrize("s, expected", [
+    ("2024-05-01T10:00:00.5", "2024-05-01T10:00:00.500000"),
+    ("2024-05-01T10:00:00.12", "2024-05-01T10:00:00.120000"),
+    ("2024-05-01T10:00:00.123456", "2024-05-01T10:00:00.123456"),
+    ("2024-05-01T10:00:00", "2024-05-01T10:00:00.000000"),
+])
+def test_truffle_fractional_seconds(s, expected):
+    # Timestamps other than 'yyyy-mm-ddTHH:MM:SS.fff' aren't cached, but decoded the same way
+    decoder = TimestampDecoder()
+    decoder.truffle("2024-05-01T10:00:00.000")
+    assert decoder.truffle(s) == strptime_ns(expected, '%Y-%m-%dT%H:%M:%S.%f')
+
+
+def test_hotspot_timestamps():
+    decoder = TimestampDecoder()
+    for s in TRUFFLE_TIMESTAMPS:
+        for offset in ("+0000", "+0200", "-0530", "+0200"):
+            assert decoder.hotspot(s + offset) == strptime_ns(s + offset, '%Y-%m-%dT%H:%M:%S.%f%z'), s + offset
+
+
+def test_hotspot_fractional_seconds():
+    decoder = TimestampDecoder()
+    assert decoder.hotspot("2024-05-01T10:00:00.123456+0100") == strptime_ns("2024-05-01T10:00:00.123456+0100",
+                                                                            '%Y-%m-%dT%H:%M:%S.%f%z')
+    assert decoder.hotspot("2024-05-01T10:00:00.999+0100") - decoder.hotspot("2024-05-01T10:00:00.001+0100") == 998_000_000
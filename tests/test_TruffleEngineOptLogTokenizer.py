@@ -0,0 +1,110 @@
+import math
+
+import pytest
+
+from truffle_logs_analyzer.LogEventType import LogEventType
+from truffle_logs_analyzer.ParseTruffleEngineOptLogEntry import ParseTruffleEngineOptLogEntry
+from truffle_logs_analyzer.TruffleEngineOptLogTokenizer import KIND_START, OPT_KINDS, TruffleEngineOptLogTokenizer
+
+# One line of every opt kind, by kind
+LINES = {
+    'queued': "[engine] opt queued   engine=1 id=278    fn278                         |Tier 2|Count/Thres      109/     1000|Queue: Size    6 Change +1 Load  0.97 Time    237us|UTC 2024-05-01T10:00:02.141|Src file5.js:278",
+    'start': "[engine] opt start    engine=1 id=261    fn261                         |Tier 1|Priority     2683|Rate 0.520938|Queue: Size   12 Change -1 Load  0.37 Time    242us|UTC 2024-05-01T10:00:06.127|Src file1.js:261",
+    'done': "[engine] opt done     engine=1 id=33     fn33                          |Tier 2|Time   121( 10+20 )ms|AST   254|Inlined   3Y   0N|IR    457/   920|CodeSize    99840|Addr 0x7f3988ec5|CompId    101|UTC 2024-05-01T10:00:00.137|Src file7.js:33",
+    'deopt': "[engine] opt deopt    engine=1 id=118    fn118                         |Addr 0x7f00|UTC 2024-05-01T10:00:01.514|Src file1.js:118",
+    'inval.': "[engine] opt inval.   engine=1 id=2      fn2                           |UTC 2024-05-01T10:00:01.242|Src file2.js:2|Reason profile changed",
+    'unque.': "[engine] opt unque.   engine=1 id=52     fn52                          |Tier 1|Count/Thres      100/     1000|Queue: Size    8 Change -1 Load  0.74 Time    685us|UTC 2024-05-01T10:00:34.186|Src file0.js:52|Reason dequeued",
+    'failed': "[engine] opt failed   engine=2 id=98     fn98                          |Tier 2|Time   291( 10+20 )ms|Reason: bailout|UTC 2024-05-01T10:00:04.081|Src file7.js:98",
+    'flushed': "[engine] opt flushed  engine=1 id=279    fn279                         |UTC 2024-05-01T10:01:18.039|Src file6.js:279",
+    'disabled': "[engine] opt disabled engine=1 id=64     fn64                          |UTC 2024-05-01T10:02:57.787|Src file12.js:64",
+    'enabled': "[engine] opt enabled  engine=1 id=46     fn46                          |UTC 2024-05-01T10:03:05.944|Src file7.js:46",
+}
+
+# Lines with less common but valid values
+VARIANTS = [
+    "[engine] opt start    engine=3 id=7      Object.<anonymous> (a b)      |Tier 2|Priority        1|Rate NaN|Queue: Size    0 Change +0 Load  0.00 Time      0us|UTC 2024-12-31T23:59:59.999|<unknown>",
+    "[engine] opt inval.   engine=1 id=2      fn2                           |UTC 2024-05-01T10:00:01.242|Src file2.js:2|",
+    "[engine] opt done     engine=1 id=33     fn33                          |Tier 1|Time     7(  4+3   )ms|AST     1|Inlined   0Y   0N|IR     12/    24|CodeSize       80|Addr 0x0|CompId      1|UTC 2024-05-01T10:00:00.000|Src file7.js:33",
+]
+
+
+def tokenize(line: str, keep_raw: bool = False):
+    return TruffleEngineOptLogTokenizer(keep_raw).parse(line)
+
+
+def legacy(line: str, keep_raw: bool = False):
+    return ParseTruffleEngineOptLogEntry(line, keep_raw).entry()
+
+
+def assert_same_entries(entry, expected):
+    assert type(entry) is type(expected)
+    fields, expected_fields = entry.fields(), expected.fields()
+    assert fields.keys() == expected_fields.keys()
+    for name, value in fields.items():
+        expected_value = expected_fields[name]
+        # 'Rate NaN' is parsed as NaN, which doesn't equal itself
+        if isinstance(expected_value, float) and math.isnan(expected_value):
+            assert isinstance(value, float) and math.isnan(value), name
+        else:
+            assert type(value) is type(expected_value) and value == expected_value, name
+
+
+def test_every_kind_has_a_line():
+    assert set(LINES) == set(OPT_KINDS)
+
+
+@pytest.mark.parametrize("line", list(LINES.values()) + VARIANTS)
+def test_same_entries_as_legacy_parser(line):
+    # The line must take the single-pass path, not the fallback to the legacy parser
+    kind = OPT_KINDS[line[KIND_START:].split()[0]]
+    assert kind.pattern.match(line) is not None
+
+    entry = tokenize(line, keep_raw=True)
+    assert_same_entries(entry, legacy(line, keep_raw=True))
+    assert entry.log_event_type == kind.log_event_type
+    assert entry._raw == line
+    assert tokenize(line)._raw is None
+
+
+def test_fields():
+    entry = tokenize(LINES['done'])
+    assert entry.log_event_type == LogEventType.Done
+    assert (entry.engine_id, entry.id, entry.name, entry.tier) == (1, 33, "fn33", 2)
+    assert (entry.comp_time, entry.ast_size, entry.code_size_in_bytes, entry.comp_id) == (121, 254, 99840, 101)
+    assert (entry.inline, entry.ir, entry.code_addr) == ("Inlined   3Y   0N", "IR    457/   920", "0x7f3988ec5")
+    assert entry.timestamp == 1714557600137000000
+    assert entry.source == "Src file7.js:33"
+
+
+def test_fallback_to_legacy_parser():
+    # The kind of the single-pass pattern is found by the space after it, but the legacy parser accepts any whitespace
+    line = LINES['done'].replace("done     engine", "done\tengine")
+    assert line[KIND_START:line.find(' ', KIND_START)] not in OPT_KINDS
+    assert_same_entries(tokenize(line), legacy(line))
+    assert_same_entries(tokenize(line), tokenize(LINES['done']))
+
+
+def test_tregex_lines_are_ignored():
+    line = LINES['done'].replace("fn33", "tregex fn33")
+    assert tokenize(line) is None
+    assert legacy(line) is None
+
+
+@pytest.mark.parametrize("line", [
+    # Truncated while being written
+    LINES['done'][:LINES['done'].index("|AST")],
+    LINES['queued'][:-40],
+    # Extra segment
+    LINES['flushed'] + "|extra",
+    # Malformed segment
+    LINES['start'].replace("Priority     2683", "Priority     high"),
+    LINES['queued'].replace("UTC 2024", "UTC 24"),
+    # Unknown kind
+    LINES['flushed'].replace("opt flushed ", "opt dumped  "),
+])
+def test_same_errors_as_legacy_parser(line):
+    with pytest.raises(ValueError) as expected:
+        legacy(line)
+    with pytest.raises(ValueError) as error:
+        tokenize(line)
+    assert str(error.value) == str(expected.value)
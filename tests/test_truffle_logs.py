@@ -0,0 +1,83 @@
+import sys
+
+import pytest
+
+from truffle_logs_analyzer.LogEventType import LogEventType
+from truffle_logs_analyzer.truffle_logs import argument_parser, load_log_file, main
+
+
+def load(path: str, *options: str):
+    return load_log_file(argument_parser().parse_args([path, *options]), path)
+
+
+def dones(truffle_events) -> int:
+    return int((truffle_events.log_event_type == LogEventType.Done.value).sum())
+
+
+@pytest.fixture
+def logs(synthetic_log, tmp_path):
+    # The same log complete, without its final newline, and with its last line cut off while being written
+    path = synthetic_log(noise=0)
+    with open(path, 'rb') as file:
+        data = file.read()
+    cut = data.index(b"|AST", data.rindex(b"[engine] opt done"))
+    variants = {
+        'complete': data,
+        'no final newline': data[:-1],
+        'incomplete last line': data[:cut],
+    }
+    paths = {}
+    for name, content in variants.items():
+        paths[name] = str(tmp_path / f"{name.replace(' ', '_')}.log")
+        with open(paths[name], 'wb') as file:
+            file.write(content)
+    return paths
+
+
+@pytest.mark.parametrize("variant", ['complete', 'no final newline', 'incomplete last line'])
+@pytest.mark.parametrize("jobs", ['1', '2'])
+def test_cached_and_uncached_runs_agree(logs, tmp_path, assert_same_events, variant, jobs):
+    path = logs[variant]
+    cache = ['--cache_dir', str(tmp_path / "cache"), '--jobs', jobs]
+    expected_hotspot, expected_truffle = load(path, '--no_cache', '--jobs', jobs)
+    # The first run stores a snapshot, the second one loads it
+    for _ in range(2):
+        hotspot, truffle = load(path, *cache)
+        assert_same_events(expected_hotspot, hotspot)
+        assert_same_events(expected_truffle, truffle)
+
+
+def test_last_line_without_newline_is_parsed(logs, tmp_path):
+    complete = dones(load(logs['complete'], '--no_cache')[1])
+    for _ in range(2):
+        assert dones(load(logs['no final newline'], '--cache_dir', str(tmp_path / "cache"))[1]) == complete
+
+
+def test_incomplete_last_line_is_parsed_once_complete(logs, tmp_path):
+    path = logs['incomplete last line']
+    cache = ['--cache_dir', str(tmp_path / "cache")]
+    with open(logs['complete'], 'rb') as file:
+        complete = file.read()
+    before = dones(load(path, *cache)[1])
+
+    # The writer finishes the line
+    with open(path, 'ab') as file:
+        cut = complete.index(b"|AST", complete.rindex(b"[engine] opt done"))
+        file.write(complete[cut:complete.index(b'\n', cut) + 1])
+    assert dones(load(path, *cache)[1]) == before + 1
+    assert dones(load(path, '--no_cache')[1]) == before + 1
+
+
+def profile_report(monkeypatch, capsys, *args: str) -> str:
+    monkeypatch.setattr(sys, 'argv', ['truffle-logs', *args, '--profile'])
+    main()
+    return capsys.readouterr().out
+
+
+def test_worker_memory_is_reported_only_with_workers(synthetic_log, tmp_path, monkeypatch, capsys):
+    path = synthetic_log()
+    cache = ['--cache_dir', str(tmp_path / "cache")]
+    assert "Peak memory of worker processes" not in profile_report(monkeypatch, capsys, path, *cache, '--jobs', '1')
+    # Loaded from the cache, nothing is parsed by workers
+    assert "Peak memory of worker processes" not in profile_report(monkeypatch, capsys, path, *cache, '--jobs', '2')
+    assert "Peak memory of worker processes" in profile_report(monkeypatch, capsys, path, '--no_cache', '--jobs', '2')